@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de bout en bout du pipeline sur des jeux synthétiques
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/benchmark_pipeline.py
+
+Pour chaque facteur d'échelle (1x, 10x, 100x... la taille de
+donnees_agences_avis.csv), génère le jeu synthétique s'il n'existe pas puis
+chronomètre les étapes import_raw_data.py, text_features.py, dbt run et
+lda_topic_modeling.py contre la base PostgreSQL locale (configuration de
+database.py). Chaque mesure est ajoutée à DATA/benchmarks/benchmark_results.csv
+avec le commit git courant, pour comparer les performances d'une modification
+à l'autre.
+"""
+
+from datetime import datetime
+import argparse
+import csv
+import shlex
+import subprocess
+import sys
+import os
+import time
+
+import generate_synthetic_reviews
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # Remonte à morocco_banks_reviews/
+LOGS_DIR = os.path.join(PROJECT_ROOT, "logs")
+BENCHMARKS_DIR = os.path.join(SCRIPT_DIR, "..", "benchmarks")
+RESULTS_FILE = os.path.join(BENCHMARKS_DIR, "benchmark_results.csv")
+
+STEPS = ('import', 'features', 'dbt', 'lda')
+DEFAULT_SCALES = [1, 10, 100, 1000]
+RESULT_COLUMNS = [
+    'run_id', 'git_commit', 'scale', 'rows', 'file_bytes', 'step',
+    'seconds', 'rows_per_sec', 'returncode', 'command'
+]
+
+
+def git_commit():
+    """Commit git courant (pour rattacher les mesures à une version du code)"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return 'inconnu'
+
+
+def step_command(step, csv_path, args):
+    """Commande et répertoire de travail d'une étape"""
+    if step == 'import':
+        command = [sys.executable, 'import_raw_data.py', '--csv', csv_path] + shlex.split(args.import_args)
+        return command, SCRIPT_DIR
+    if step == 'features':
+        return [sys.executable, 'text_features.py'] + shlex.split(args.features_args), SCRIPT_DIR
+    if step == 'dbt':
+        return [args.dbt_executable, 'run'] + shlex.split(args.dbt_args), PROJECT_ROOT
+    if step == 'lda':
+        return [sys.executable, 'lda_topic_modeling.py'] + shlex.split(args.lda_args), SCRIPT_DIR
+    raise ValueError(f"Étape inconnue: {step}")
+
+
+def run_step(step, csv_path, run_id, scale, args):
+    """Exécuter une étape, retourne (durée en secondes, code retour, commande)"""
+    command, cwd = step_command(step, csv_path, args)
+    log_path = os.path.join(LOGS_DIR, f"benchmark_{run_id}_x{scale:g}_{step}.log")
+
+    print(f"[BENCH] x{scale:g} {step}: {' '.join(command)}")
+    start = time.perf_counter()
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        result = subprocess.run(command, cwd=cwd, stdout=log_file, stderr=subprocess.STDOUT)
+    elapsed = time.perf_counter() - start
+
+    status = "OK" if result.returncode == 0 else f"ÉCHEC (code {result.returncode}, voir {log_path})"
+    print(f"[BENCH] x{scale:g} {step}: {elapsed:.2f}s - {status}")
+    return elapsed, result.returncode, ' '.join(command)
+
+
+def append_results(results):
+    """Ajouter les mesures au fichier de résultats (en-tête écrit à la création)"""
+    os.makedirs(BENCHMARKS_DIR, exist_ok=True)
+    new_file = not os.path.exists(RESULTS_FILE)
+    with open(RESULTS_FILE, 'a', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(results)
+
+
+def run_benchmark(args):
+    """Lancer le benchmark pour toutes les échelles demandées"""
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    commit = git_commit()
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    results = []
+
+    for scale in args.scales:
+        csv_path = generate_synthetic_reviews.synthetic_csv_path(scale, args.duplicate_rate, args.seed)
+        n_rows = int(generate_synthetic_reviews.REFERENCE_ROWS * scale)
+        if not os.path.exists(csv_path) or args.regenerate:
+            print(f"[BENCH] Génération de {n_rows} avis (x{scale:g}) -> {csv_path}")
+            generator = generate_synthetic_reviews.SyntheticReviewGenerator(
+                seed=args.seed, duplicate_rate=args.duplicate_rate
+            )
+            generator.write_csv(csv_path, n_rows)
+        file_bytes = os.path.getsize(csv_path)
+
+        for step in args.steps:
+            elapsed, returncode, command = run_step(step, csv_path, run_id, scale, args)
+            results.append({
+                'run_id': run_id,
+                'git_commit': commit,
+                'scale': scale,
+                'rows': n_rows,
+                'file_bytes': file_bytes,
+                'step': step,
+                'seconds': round(elapsed, 3),
+                'rows_per_sec': round(n_rows / elapsed, 1) if elapsed > 0 else None,
+                'returncode': returncode,
+                'command': command,
+            })
+            if returncode != 0 and not args.keep_going:
+                print(f"[BENCH] Étape {step} en échec, arrêt pour l'échelle x{scale:g}")
+                break
+
+    append_results(results)
+
+    print("\n" + "=" * 80)
+    print(f"RÉSULTATS DU BENCHMARK {run_id} (commit {commit})")
+    print("=" * 80)
+    for result in results:
+        print(f"x{result['scale']:<6g} {result['step']:<7} {result['rows']:>10} avis "
+              f"{result['seconds']:>10.2f}s {result['rows_per_sec'] or 0:>12.0f} avis/s  code {result['returncode']}")
+    print(f"\nRésultats ajoutés à {RESULTS_FILE}")
+    return all(result['returncode'] == 0 for result in results)
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Benchmark de bout en bout du pipeline morocco_banks_reviews")
+    parser.add_argument('--scales', type=lambda value: [float(v) for v in value.split(',')],
+                        default=DEFAULT_SCALES, help="Facteurs d'échelle séparés par des virgules (défaut: 1,10,100,1000)")
+    parser.add_argument('--steps', type=lambda value: value.split(','), default=list(STEPS),
+                        help="Étapes à chronométrer parmi import,features,dbt,lda (défaut: toutes)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.02, help="Part de doublons exacts (défaut: 0.02)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur (défaut: 42)")
+    parser.add_argument('--regenerate', action='store_true', help="Regénérer les jeux synthétiques existants")
+    parser.add_argument('--import-args', default='', help="Options supplémentaires pour import_raw_data.py")
+    parser.add_argument('--features-args', default='', help="Options supplémentaires pour text_features.py")
+    parser.add_argument('--dbt-args', default='', help="Options supplémentaires pour dbt run")
+    parser.add_argument('--lda-args', default='', help="Options supplémentaires pour lda_topic_modeling.py")
+    parser.add_argument('--dbt-executable', default='dbt', help="Exécutable dbt (défaut: dbt)")
+    parser.add_argument('--keep-going', action='store_true', help="Continuer les étapes suivantes après un échec")
+    args = parser.parse_args(argv)
+
+    unknown_steps = [step for step in args.steps if step not in STEPS]
+    if unknown_steps:
+        parser.error(f"Étapes inconnues: {unknown_steps}")
+    return args
+
+
+def main(argv=None):
+    """Fonction principale"""
+    args = parse_args(argv)
+    return 0 if run_benchmark(args) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
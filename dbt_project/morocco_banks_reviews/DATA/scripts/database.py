@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Configuration et pool de connexions partagés pour la base bank_maroc
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/database.py
+
+La configuration est lue dans cet ordre (le dernier l'emporte):
+    1. valeurs par défaut (DEFAULT_DB_CONFIG)
+    2. fichier INI, section [database] (BANK_MAROC_DB_CONFIG ou DATA/scripts/database.ini)
+    3. variables d'environnement BANK_MAROC_DB_HOST, _PORT, _NAME, _USER, _PASSWORD,
+       _STATEMENT_TIMEOUT_MS, _POOL_MIN, _POOL_MAX
+
+Chaque processus possède son propre pool (recréé après un fork), ce qui permet
+aux workers parallèles d'emprunter des connexions sans les partager.
+"""
+
+from contextlib import contextmanager
+import configparser
+import logging
+import threading
+import os
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CONFIG_FILE = os.path.join(SCRIPT_DIR, "database.ini")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'bank_maroc',
+    'user': 'airflow1',
+    'password': 'airflow',
+    'port': 5432,
+}
+DEFAULT_POOL_CONFIG = {
+    'statement_timeout_ms': 0,  # 0 = pas de limite
+    'pool_min': 1,
+    'pool_max': 8,
+}
+
+# Variables d'environnement -> (clé, type)
+ENV_VARIABLES = {
+    'BANK_MAROC_DB_HOST': ('host', str),
+    'BANK_MAROC_DB_PORT': ('port', int),
+    'BANK_MAROC_DB_NAME': ('database', str),
+    'BANK_MAROC_DB_USER': ('user', str),
+    'BANK_MAROC_DB_PASSWORD': ('password', str),
+    'BANK_MAROC_DB_STATEMENT_TIMEOUT_MS': ('statement_timeout_ms', int),
+    'BANK_MAROC_DB_POOL_MIN': ('pool_min', int),
+    'BANK_MAROC_DB_POOL_MAX': ('pool_max', int),
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def load_settings(config_file=None):
+    """Lire la configuration complète (connexion + pool) depuis le fichier et l'environnement"""
+    settings = dict(DEFAULT_DB_CONFIG, **DEFAULT_POOL_CONFIG)
+    types = {key: value_type for key, value_type in ENV_VARIABLES.values()}
+
+    config_file = config_file or os.environ.get('BANK_MAROC_DB_CONFIG', DEFAULT_CONFIG_FILE)
+    if os.path.exists(config_file):
+        parser = configparser.ConfigParser()
+        parser.read(config_file, encoding='utf-8')
+        if parser.has_section('database'):
+            for key, value in parser.items('database'):
+                if key in settings:
+                    settings[key] = types.get(key, str)(value)
+
+    for variable, (key, value_type) in ENV_VARIABLES.items():
+        if variable in os.environ:
+            settings[key] = value_type(os.environ[variable])
+
+    return settings
+
+
+def load_db_config(config_file=None):
+    """Paramètres de connexion psycopg2 (host, database, user, password, port)"""
+    settings = load_settings(config_file)
+    return {key: settings[key] for key in DEFAULT_DB_CONFIG}
+
+
+def connect_kwargs(settings):
+    """Arguments de psycopg2.connect, avec le statement_timeout de la session"""
+    kwargs = {key: settings[key] for key in DEFAULT_DB_CONFIG}
+    if settings['statement_timeout_ms']:
+        kwargs['options'] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+    return kwargs
+
+
+def get_pool():
+    """Pool de connexions du processus courant (créé au premier appel)"""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            settings = load_settings()
+            # Un pool hérité d'un fork n'est pas réutilisable: on en crée un nouveau
+            _pool = ThreadedConnectionPool(settings['pool_min'], settings['pool_max'], **connect_kwargs(settings))
+            _pool_pid = os.getpid()
+            logger.info(f"[DB] Pool de connexions créé ({settings['pool_min']}-{settings['pool_max']}) "
+                        f"vers {settings['database']}@{settings['host']}:{settings['port']}")
+        return _pool
+
+
+def get_connection():
+    """Emprunter une connexion au pool"""
+    return get_pool().getconn()
+
+
+def release_connection(connection):
+    """Rendre une connexion au pool (annule une transaction restée ouverte)"""
+    if connection is None or _pool is None or _pool_pid != os.getpid():
+        if connection is not None and not connection.closed:
+            connection.close()
+        return
+
+    if not connection.closed and connection.status != psycopg2.extensions.STATUS_READY:
+        connection.rollback()
+    _pool.putconn(connection, close=bool(connection.closed))
+
+
+@contextmanager
+def connection():
+    """Context manager: connexion empruntée au pool puis rendue"""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
+
+@contextmanager
+def server_side_cursor(connection, name, itersize=2000):
+    """Context manager: curseur nommé (côté serveur) qui lit les lignes par paquets de itersize"""
+    cursor = connection.cursor(name=name)
+    cursor.itersize = itersize
+    try:
+        yield cursor
+    finally:
+        cursor.close()
+
+
+def set_statement_timeout(connection, timeout_ms):
+    """Changer le statement_timeout de la transaction courante (0 = pas de limite)"""
+    cursor = connection.cursor()
+    cursor.execute("SET LOCAL statement_timeout = %s;", (int(timeout_ms),))
+    cursor.close()
+
+
+def close_pool():
+    """Fermer toutes les connexions du pool du processus courant"""
+    global _pool, _pool_pid
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _pool_pid = None
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export CSV des tables produites par dbt et par l'analyse LDA
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/export_results.py
+
+Chaque table est écrite en flux par COPY ... TO STDOUT (aucune ligne chargée
+en mémoire côté Python) dans exports/<table>.csv, via un fichier temporaire
+renommé à la fin: un export interrompu ne laisse pas de CSV partiel.
+"""
+
+import argparse
+import logging
+import sys
+import time
+import os
+
+# Configuration et pool de connexions partagés
+import database
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # Remonte à morocco_banks_reviews/
+EXPORTS_DIR = os.path.join(PROJECT_ROOT, "exports")
+
+# Tables exportées par défaut (marts dbt et topics LDA)
+DEFAULT_TABLES = [
+    'mart_reviews_enriched',
+    'mart_bank_topic_weights',
+    'fact_reviews',
+    'dim_bank',
+    'dim_branch',
+    'dim_location',
+    'dim_sentiment',
+    'dim_topic',
+    'temp_review_topics',
+    'review_topic_weights',
+]
+
+logger = logging.getLogger(__name__)
+
+
+def export_table(connection, table, output_dir=EXPORTS_DIR):
+    """Exporter une table en CSV (en-tête, UTF-8), retourne (chemin, octets) ou None si absente"""
+    cursor = connection.cursor()
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", (table,))
+    if not cursor.fetchone()[0]:
+        logger.warning(f"[EXPORT] Table absente, ignorée: {table}")
+        cursor.close()
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"{table}.csv")
+    tmp_path = output_path + '.tmp'
+
+    start = time.perf_counter()
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        cursor.copy_expert(f"COPY (SELECT * FROM {table}) TO STDOUT WITH (FORMAT csv, HEADER true)", f)
+    rows = cursor.rowcount
+    cursor.close()
+    os.replace(tmp_path, output_path)
+
+    size = os.path.getsize(output_path)
+    logger.info(f"[EXPORT] {table}: {rows} lignes, {size} octets en {time.perf_counter() - start:.2f}s -> {output_path}")
+    return output_path, size
+
+
+def export_tables(tables=None, output_dir=EXPORTS_DIR):
+    """Exporter plusieurs tables, retourne le nombre de fichiers écrits"""
+    written = 0
+    with database.connection() as connection:
+        for table in tables or DEFAULT_TABLES:
+            if export_table(connection, table, output_dir) is not None:
+                written += 1
+        connection.rollback()
+    return written
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Export CSV des tables du projet morocco_banks_reviews")
+    parser.add_argument('tables', nargs='*', default=DEFAULT_TABLES,
+                        help="Tables à exporter (défaut: marts dbt et topics LDA)")
+    parser.add_argument('--output-dir', default=EXPORTS_DIR, help="Dossier de sortie (défaut: exports/)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fonction principale"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    try:
+        written = export_tables(args.tables, args.output_dir)
+    except Exception as e:
+        logger.error(f"[EXPORT] Erreur lors de l'export: {e}")
+        return 1
+    finally:
+        database.close_pool()
+
+    print(f"{written}/{len(args.tables)} table(s) exportée(s) dans {args.output_dir}")
+    return 0 if written else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
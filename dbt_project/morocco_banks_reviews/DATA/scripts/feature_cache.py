@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache disque des textes préprocessés et des matrices TF-IDF
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/feature_cache.py
+
+Une entrée est identifiée par l'empreinte du corpus: ids et textes des avis,
+langue et paramètres de préprocessing / vectorisation. Elle contient les
+textes préprocessés (Parquet), la matrice TF-IDF creuse (CSR, .npz) et le
+vectoriseur ajusté (vocabulaire et IDF, joblib) dans DATA/cache/features/<empreinte>/.
+Les entrées les moins récemment utilisées sont supprimées au-delà d'une
+taille totale ou d'un âge maximum.
+"""
+
+from datetime import datetime
+import argparse
+import hashlib
+import json
+import logging
+import shutil
+import sys
+import os
+
+import pandas as pd
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Dossier propre au cache: clear() le supprime entièrement
+CACHE_DIR = os.path.join(SCRIPT_DIR, "..", "cache", "features")
+
+# À incrémenter si le format des entrées change
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_MAX_CACHE_MB = 2048
+DEFAULT_MAX_CACHE_AGE_DAYS = 30
+
+PROCESSED_FILE = "processed.parquet"
+MATRIX_FILE = "tfidf.npz"
+VECTORIZER_FILE = "vectorizer.joblib"
+META_FILE = "meta.json"
+
+logger = logging.getLogger(__name__)
+
+
+def corpus_fingerprint(ids, texts, settings):
+    """Empreinte SHA-256 d'un corpus (ids, textes) et des paramètres qui déterminent les features"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {'format': CACHE_FORMAT_VERSION, **settings}, sort_keys=True, ensure_ascii=False, default=str
+    ).encode('utf-8'))
+    for review_id, text in zip(ids, texts):
+        digest.update(f"{review_id}\x1f{'' if text is None else text}\x1e".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    def __init__(self, cache_dir=CACHE_DIR, max_mb=DEFAULT_MAX_CACHE_MB, max_age_days=DEFAULT_MAX_CACHE_AGE_DAYS):
+        """Initialiser le cache (taille maximum en Mo, âge maximum en jours depuis la dernière utilisation)"""
+        self.cache_dir = cache_dir
+        self.max_bytes = max_mb * 1024 * 1024
+        self.max_age_days = max_age_days
+
+    def entry_dir(self, key):
+        """Dossier d'une entrée"""
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """Charger une entrée: (DataFrame id/processed_text, matrice CSR, vectoriseur), None si absente"""
+        import joblib
+        import scipy.sparse
+
+        entry_dir = self.entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            processed = pd.read_parquet(os.path.join(entry_dir, PROCESSED_FILE))
+            matrix = scipy.sparse.load_npz(os.path.join(entry_dir, MATRIX_FILE)).tocsr()
+            vectorizer = joblib.load(os.path.join(entry_dir, VECTORIZER_FILE))
+        except Exception as e:
+            logger.warning(f"[CACHE] Entrée {key[:12]} illisible, ignorée: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # Date de dernière utilisation (pour l'éviction)
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        meta['last_used_at'] = datetime.now().isoformat(timespec='seconds')
+        self.write_meta(entry_dir, meta)
+
+        logger.info(f"[CACHE] Entrée {key[:12]} chargée ({matrix.shape[0]} avis, {matrix.shape[1]} termes)")
+        return processed, matrix, vectorizer
+
+    def save(self, key, processed, matrix, vectorizer, description=None):
+        """Enregistrer une entrée (écrite dans un dossier temporaire puis renommée)"""
+        import joblib
+        import scipy.sparse
+
+        entry_dir = self.entry_dir(key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        processed.to_parquet(os.path.join(tmp_dir, PROCESSED_FILE), index=False)
+        scipy.sparse.save_npz(os.path.join(tmp_dir, MATRIX_FILE), scipy.sparse.csr_matrix(matrix))
+        joblib.dump(vectorizer, os.path.join(tmp_dir, VECTORIZER_FILE))
+
+        now = datetime.now().isoformat(timespec='seconds')
+        self.write_meta(tmp_dir, {
+            'key': key,
+            'description': description,
+            'n_documents': int(matrix.shape[0]),
+            'n_features': int(matrix.shape[1]),
+            'bytes': self.directory_size(tmp_dir),
+            'created_at': now,
+            'last_used_at': now,
+        })
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        logger.info(f"[CACHE] Entrée {key[:12]} enregistrée ({description})")
+        self.evict()
+
+    def write_meta(self, entry_dir, meta):
+        """Écrire les métadonnées d'une entrée"""
+        meta_path = os.path.join(entry_dir, META_FILE)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    @staticmethod
+    def directory_size(path):
+        """Taille totale des fichiers d'un dossier"""
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+    def entries(self):
+        """Entrées valides, de la moins récemment utilisée à la plus récente"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            meta_path = os.path.join(self.cache_dir, name, META_FILE)
+            if '.tmp-' in name or not os.path.exists(meta_path):
+                continue
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['path'] = os.path.join(self.cache_dir, name)
+            entries.append(meta)
+        return sorted(entries, key=lambda meta: meta['last_used_at'])
+
+    def evict(self):
+        """Supprimer les entrées trop anciennes, puis les moins utilisées au-delà de la taille maximum"""
+        entries = self.entries()
+        now = datetime.now()
+        removed = 0
+
+        kept = []
+        for meta in entries:
+            age_days = (now - datetime.fromisoformat(meta['last_used_at'])).total_seconds() / 86400
+            if age_days > self.max_age_days:
+                shutil.rmtree(meta['path'], ignore_errors=True)
+                removed += 1
+            else:
+                kept.append(meta)
+
+        total_bytes = sum(meta['bytes'] for meta in kept)
+        while kept and total_bytes > self.max_bytes:
+            meta = kept.pop(0)
+            shutil.rmtree(meta['path'], ignore_errors=True)
+            total_bytes -= meta['bytes']
+            removed += 1
+
+        if removed:
+            logger.info(f"[CACHE] {removed} entrée(s) supprimée(s), {len(kept)} restante(s) "
+                        f"({total_bytes / 1024 / 1024:.1f} Mo)")
+        return removed
+
+    def clear(self):
+        """Vider le cache"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Cache des textes préprocessés et matrices TF-IDF")
+    parser.add_argument('--clear', action='store_true', help="Vider le cache")
+    parser.add_argument('--evict', action='store_true', help="Appliquer les limites de taille et d'âge")
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_CACHE_MB,
+                        help=f"Taille maximum en Mo (défaut: {DEFAULT_MAX_CACHE_MB})")
+    parser.add_argument('--max-age-days', type=float, default=DEFAULT_MAX_CACHE_AGE_DAYS,
+                        help=f"Âge maximum en jours depuis la dernière utilisation (défaut: {DEFAULT_MAX_CACHE_AGE_DAYS})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fonction principale: afficher, nettoyer ou vider le cache"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+    cache = FeatureCache(max_mb=args.max_mb, max_age_days=args.max_age_days)
+
+    if args.clear:
+        cache.clear()
+        print(f"Cache vidé: {cache.cache_dir}")
+        return 0
+    if args.evict:
+        cache.evict()
+
+    entries = cache.entries()
+    for meta in entries:
+        print(f"{meta['key'][:12]}  {meta['description'] or '':<30} {meta['n_documents']:>8} avis "
+              f"{meta['bytes'] / 1024 / 1024:>8.1f} Mo  utilisée le {meta['last_used_at']}")
+    print(f"{len(entries)} entrée(s), {sum(meta['bytes'] for meta in entries) / 1024 / 1024:.1f} Mo")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
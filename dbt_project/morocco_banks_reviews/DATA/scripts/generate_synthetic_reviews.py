@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Générateur de jeux d'avis synthétiques pour les tests de montée en charge
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/generate_synthetic_reviews.py
+
+Produit un CSV au format de DATA/raw/donnees_agences_avis.csv (séparateur ;,
+UTF-8 avec BOM, mêmes colonnes) à N fois la taille du fichier de référence:
+banques et villes de script1.py, avis en français, arabe ou mixtes (parfois
+sur plusieurs lignes), dates relatives ("il y a 5 mois") et taux de doublons
+configurable. Chaque avis combine des fragments, un ou deux détails de visite
+(nombres, quartier, jour) et des mots remplacés par des synonymes: les
+doublons exacts ne viennent que du tirage --duplicate-rate, même à grande
+échelle. Le fichier est écrit en flux: la mémoire ne dépend pas de N.
+"""
+
+import argparse
+import ast
+import csv
+import random
+import re
+import sys
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # Remonte à morocco_banks_reviews/
+REPO_ROOT = os.path.dirname(os.path.dirname(PROJECT_ROOT))
+DATA_RAW_DIR = os.path.join(SCRIPT_DIR, "..", "raw")
+SCRAPER_PATH = os.path.join(REPO_ROOT, "script1.py")
+REFERENCE_CSV = os.path.join(DATA_RAW_DIR, "donnees_agences_avis.csv")
+SYNTHETIC_DIR = os.path.join(SCRIPT_DIR, "..", "synthetic")
+
+CSV_COLUMNS = ['Banque', 'Ville', 'Nom Agence', 'Localisation', 'Note', 'Avis', 'Date Avis']
+REFERENCE_ROWS = 4977  # Nombre d'avis dans donnees_agences_avis.csv
+
+# Fragments d'avis (français, arabe) combinés aléatoirement
+AVIS_FR = [
+    "Trop d'attente, aucune organisation !",
+    "Service rapide et personnel très aimable.",
+    "Le guichet automatique est souvent en panne.",
+    "Accueil médiocre, le conseiller ne répond jamais au téléphone.",
+    "Agence propre, bon conseil pour ouvrir mon compte.",
+    "Deux heures d'attente pour un simple retrait.",
+    "Les frais de tenue de compte sont trop élevés.",
+    "Parking difficile mais l'agence est proche du centre.",
+    "Horaires d'ouverture non respectés, agence fermée à 14h.",
+    "Très professionnel, je recommande cette agence.",
+    "Problème de carte bancaire réglé en 10 minutes, merci.",
+    "Personnel impoli et peu compétent.",
+]
+AVIS_AR = [
+    "خدمة ممتازة وموظفين محترمين",
+    "انتظار طويل جدا في هذه الوكالة",
+    "أسوأ بنك تعاملت معه",
+    "الشباك الأوتوماتيكي لا يعمل دائما",
+    "موظف الاستقبال مهني وسريع",
+    "مشكلة في البطاقة ولا أحد يجيب",
+    "الوكالة نظيفة والخدمة جيدة",
+]
+QUARTIERS = [
+    "Centre", "Hassan II", "Mohammed V", "Principale", "Maarif", "Gueliz",
+    "Agdal", "Anfa", "Bd Zerktouni", "Hay Riad", "Mall", "Gare", "Université",
+]
+# Détails propres à chaque visite, sans mot porteur de sentiment (voir macro analyze_sentiment)
+DETAILS_FR = [
+    "Passage le {jour} vers {heure}h.",
+    "Agence {quartier}, guichet {guichet}.",
+    "Client depuis {annees} ans.",
+    "Reçu au bout de {minutes} minutes.",
+    "Ticket n°{ticket}.",
+    "Dossier {reference} ouvert en {mois}.",
+    "{personnes} personnes devant moi ce jour-là.",
+    "Visite du {jour_mois} {mois}.",
+]
+DETAILS_AR = [
+    "زرت الوكالة يوم {jour_ar} على الساعة {heure}",
+    "زبون منذ {annees} سنة في وكالة {quartier}",
+    "رقم التذكرة {ticket} يوم {jour_mois}",
+    "كان أمامي {personnes} أشخاص يوم {jour_ar}",
+    "الشباك رقم {guichet} على الساعة {heure}",
+]
+JOURS = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi"]
+JOURS_AR = ["الاثنين", "الثلاثاء", "الأربعاء", "الخميس", "الجمعة", "السبت"]
+MOIS = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+        "août", "septembre", "octobre", "novembre", "décembre"]
+
+# Synonymes tirés mot par mot dans les fragments français
+SUBSTITUTIONS_FR = {
+    "très": ["vraiment", "franchement", "assez"],
+    "agence": ["succursale", "agence bancaire"],
+    "conseiller": ["chargé de clientèle", "responsable"],
+    "personnel": ["staff", "équipe"],
+    "souvent": ["régulièrement", "parfois", "toujours"],
+    "compte": ["compte courant", "compte bancaire"],
+    "simple": ["petit", "banal"],
+    "merci": ["merci beaucoup", "bravo"],
+    "heures": ["heures et demie", "longues heures"],
+    "téléphone": ["fixe", "portable"],
+}
+SUBSTITUTIONS_RE = re.compile(r'\b(' + '|'.join(SUBSTITUTIONS_FR) + r')\b')
+SUBSTITUTION_RATE = 0.4
+SECOND_DETAIL_RATE = 0.5
+
+RUES = ["Av. Hassan II", "Bd Mohammed V", "Rue Allal Ben Abdellah", "Av. des FAR", "Bd Zerktouni"]
+DATES_RELATIVES = (
+    ["il y a un jour", "il y a une semaine", "il y a un mois", "il y a un an"]
+    + [f"il y a {n} jours" for n in range(2, 7)]
+    + [f"il y a {n} semaines" for n in range(2, 5)]
+    + [f"il y a {n} mois" for n in range(2, 12)]
+    + [f"il y a {n} ans" for n in range(2, 9)]
+)
+# Poids proches du fichier de référence: les dates en années dominent
+DATES_WEIGHTS = [1, 1, 3, 20] + [1] * 5 + [1] * 3 + [2] * 10 + [15, 12, 8, 7, 5, 5, 2]
+
+LANGUAGE_MIX = {'fr': 0.80, 'ar': 0.08, 'mixed': 0.12}
+MULTILINE_RATE = 0.17  # Part des avis sur plusieurs lignes dans les données réelles
+NOTE_EMPTY_RATE = 0.01
+
+
+def load_scraper_lists(scraper_path=SCRAPER_PATH):
+    """Lire BANQUES et VILLES dans script1.py sans l'exécuter (pas de navigateur lancé)"""
+    with open(scraper_path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=scraper_path)
+
+    lists = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in ('BANQUES', 'VILLES'):
+                lists[node.targets[0].id] = ast.literal_eval(node.value)
+    return lists['BANQUES'], lists['VILLES']
+
+
+class SyntheticReviewGenerator:
+    def __init__(self, seed=42, duplicate_rate=0.02, agences_per_city=3):
+        """Initialiser le générateur (graine fixe pour des jeux reproductibles)"""
+        self.random = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        self.banques, self.villes = load_scraper_lists()
+
+        # Agences fixes par (banque, ville), comme le scraping réel
+        self.agences = {}
+        for banque in self.banques:
+            for ville in self.villes:
+                self.agences[(banque, ville)] = [
+                    self.make_agence(banque, ville) for _ in range(self.random.randint(1, agences_per_city))
+                ]
+
+    def make_agence(self, banque, ville):
+        """Créer un nom d'agence, une localisation et une note"""
+        nom = self.random.choice([banque, f"{banque} {self.random.choice(QUARTIERS)}", f"{banque} - Agence {ville}"])
+        plus_code = ''.join(self.random.choice('23456789CFGHJMPQRVWX') for _ in range(4))
+        plus_code += '+' + ''.join(self.random.choice('23456789CFGHJMPQRVWX') for _ in range(3))
+        localisation = f"{plus_code}, {self.random.choice(RUES)}, {ville}"
+        note = None if self.random.random() < NOTE_EMPTY_RATE else f"{self.random.uniform(1, 5):.1f}".replace('.', ',')
+        return nom, localisation, note
+
+    def substitute(self, match):
+        """Remplacer un mot par un synonyme (SUBSTITUTION_RATE des occurrences)"""
+        if self.random.random() < SUBSTITUTION_RATE:
+            return self.random.choice(SUBSTITUTIONS_FR[match.group(1)])
+        return match.group(1)
+
+    def make_detail(self, templates):
+        """Créer un détail de visite (nombres, quartier, jour) à partir d'un modèle"""
+        return self.random.choice(templates).format(
+            jour=self.random.choice(JOURS),
+            jour_ar=self.random.choice(JOURS_AR),
+            jour_mois=self.random.randint(1, 28),
+            mois=self.random.choice(MOIS),
+            heure=self.random.randint(8, 17),
+            quartier=self.random.choice(QUARTIERS),
+            guichet=self.random.randint(1, 12),
+            annees=self.random.randint(1, 40),
+            minutes=self.random.randint(5, 240),
+            ticket=self.random.randint(1, 999),
+            reference=self.random.randint(10000, 99999),
+            personnes=self.random.randint(2, 60),
+        )
+
+    def make_avis(self):
+        """Créer un texte d'avis en français, arabe ou mixte, avec un ou deux détails de visite insérés au hasard"""
+        language = self.random.choices(list(LANGUAGE_MIX), weights=list(LANGUAGE_MIX.values()))[0]
+        if language == 'fr':
+            parts = self.random.sample(AVIS_FR, self.random.randint(1, 3))
+        elif language == 'ar':
+            parts = self.random.sample(AVIS_AR, self.random.randint(1, 2))
+        else:
+            parts = [self.random.choice(AVIS_FR), self.random.choice(AVIS_AR)]
+        parts = [SUBSTITUTIONS_RE.sub(self.substitute, part) for part in parts]
+
+        n_details = 2 if self.random.random() < SECOND_DETAIL_RATE else 1
+        for _ in range(n_details):
+            detail = self.make_detail(DETAILS_AR if language == 'ar' else DETAILS_FR)
+            parts.insert(self.random.randint(0, len(parts)), detail)
+
+        separator = '\n' if self.random.random() < MULTILINE_RATE else ' '
+        return separator.join(parts)
+
+    def rows(self, n_rows):
+        """Générer n_rows lignes (liste de valeurs dans l'ordre de CSV_COLUMNS)"""
+        recent = []
+        for _ in range(n_rows):
+            if recent and self.random.random() < self.duplicate_rate:
+                yield self.random.choice(recent)
+                continue
+
+            banque = self.random.choice(self.banques)
+            ville = self.random.choice(self.villes)
+            nom, localisation, note = self.random.choice(self.agences[(banque, ville)])
+            date = self.random.choices(DATES_RELATIVES, weights=DATES_WEIGHTS)[0]
+            row = [banque, ville, nom, localisation, note, self.make_avis(), date]
+
+            # Fenêtre bornée de lignes récentes pour tirer les doublons
+            recent.append(row)
+            if len(recent) > 1000:
+                recent.pop(0)
+            yield row
+
+    def write_csv(self, output_path, n_rows):
+        """Écrire le CSV synthétique en flux, retourne le nombre de lignes écrites"""
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        count = 0
+        with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(CSV_COLUMNS)
+            for row in self.rows(n_rows):
+                writer.writerow(row)
+                count += 1
+        return count
+
+
+def synthetic_csv_path(scale, duplicate_rate, seed):
+    """Chemin par défaut d'un jeu synthétique (réutilisé s'il existe déjà)"""
+    return os.path.join(SYNTHETIC_DIR, f"avis_x{scale:g}_dup{duplicate_rate:g}_seed{seed}.csv")
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Génération d'avis bancaires synthétiques")
+    parser.add_argument('--scale', type=float, default=10,
+                        help=f"Multiple de la taille de référence ({REFERENCE_ROWS} avis, défaut: 10)")
+    parser.add_argument('--rows', type=int, default=None, help="Nombre exact de lignes (prioritaire sur --scale)")
+    parser.add_argument('--duplicate-rate', type=float, default=0.02, help="Part de doublons exacts (défaut: 0.02)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire (défaut: 42)")
+    parser.add_argument('--output', default=None, help="Fichier de sortie (défaut: DATA/synthetic/...)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fonction principale"""
+    args = parse_args(argv)
+    n_rows = args.rows or int(REFERENCE_ROWS * args.scale)
+    output_path = args.output or synthetic_csv_path(args.scale, args.duplicate_rate, args.seed)
+
+    generator = SyntheticReviewGenerator(seed=args.seed, duplicate_rate=args.duplicate_rate)
+    count = generator.write_csv(output_path, n_rows)
+
+    print(f"{count} avis synthétiques écrits dans {output_path} ({os.path.getsize(output_path)} octets)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
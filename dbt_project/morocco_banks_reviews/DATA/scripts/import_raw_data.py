@@ -11,49 +11,107 @@ Utilisateur: airflow1
 
 import pandas as pd
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.extras import execute_values, Json
 import logging
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import codecs
+import glob
+import io
+import time
 import sys
 import os
 
+# Configuration et pool de connexions partagés
+import database
+
 # Configuration des chemins relatifs au projet dbt
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # Remonte à morocco_banks_reviews/
 DATA_RAW_DIR = os.path.join(SCRIPT_DIR, "..", "raw")
 LOGS_DIR = os.path.join(PROJECT_ROOT, "logs")
 
-# Créer le dossier logs s'il n'existe pas
-os.makedirs(LOGS_DIR, exist_ok=True)
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    """Configurer le logging (fichier logs/import_raw_data.log + console), appelé au lancement"""
+    # Créer le dossier logs s'il n'existe pas
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    
+    # Configuration de logging sans emojis pour Windows
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(LOGS_DIR, 'import_raw_data.log'), encoding='utf-8'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+# Colonnes attendues dans le CSV et colonnes correspondantes dans public.raw_reviews
+CSV_COLUMNS = ['Banque', 'Ville', 'Nom Agence', 'Localisation', 'Note', 'Avis', 'Date Avis']
+DB_COLUMNS = ['banque', 'ville', 'nom_agence', 'localisation', 'note', 'avis', 'date_avis']
+CSV_TO_DB_COLUMNS = dict(zip(CSV_COLUMNS, DB_COLUMNS))
 
-# Configuration de logging sans emojis pour Windows
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(LOGS_DIR, 'import_raw_data.log'), encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
+# Encodages testés pour la lecture du CSV (détection sur un échantillon)
+CSV_ENCODINGS = ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252']
+# Encodages qui décodent les mêmes octets (hors BOM): l'échec de l'un vaut pour l'autre
+SAME_DECODING = {'utf-8-sig': 'utf-8'}
+ENCODING_SAMPLE_SIZE = 1024 * 1024  # 1 Mo lu au début et à la fin du fichier
+
+# Lecture par morceaux pour le chemin execute_values (mémoire bornée)
+CSV_CHUNK_SIZE = 50000
+
+# Modes de chargement: COPY en flux (rapide) ou execute_values (historique, fallback)
+LOAD_MODES = ('copy', 'values')
+COPY_BUFFER_SIZE = 1024 * 1024  # 1 Mo par lecture envoyée au serveur
+
+# Mode incrémental: table de staging de session et empreinte de contenu d'un avis
+RAW_TABLE = 'public.raw_reviews'
+STAGING_TABLE = 'raw_reviews_staging'
+CONTENT_HASH_SQL = (
+    "md5(concat_ws(chr(31), coalesce({p}banque, ''), coalesce({p}nom_agence, ''), "
+    "coalesce({p}avis, ''), coalesce({p}date_avis, '')))"
 )
-logger = logging.getLogger(__name__)
+
+class DecodeCheckedReader:
+    """Fichier transmis à COPY: garde l'UnicodeDecodeError que psycopg2 transforme en erreur de COPY"""
+    def __init__(self, f):
+        self.f = f
+        self.error = None
+    
+    def read(self, size=-1):
+        try:
+            return self.f.read(size)
+        except UnicodeDecodeError as e:
+            self.error = e
+            raise
 
 class RawDataImporter:
-    def __init__(self):
+    def __init__(self, load_mode='copy', incremental=False, use_parquet=False):
         """Initialiser l'importeur avec la configuration de la base"""
-        self.db_config = {
-            'host': 'localhost',
-            'database': 'bank_maroc',
-            'user': 'airflow1',
-            'password': 'airflow',
-            'port': 5432
-        }
+        if load_mode not in LOAD_MODES:
+            raise ValueError(f"Mode de chargement inconnu: {load_mode} (attendu: {', '.join(LOAD_MODES)})")
+        self.load_mode = load_mode
+        self.incremental = incremental
+        self.use_parquet = use_parquet
+        self.db_config = database.load_db_config()
         self.connection = None
         
+        # Suivi de l'import en cours (voir start_run / record_import_run)
+        self.run_source = None
+        self.run_started_at = None
+        self.run_start = None
+        self.bytes_read = 0
+        self.rows_loaded = 0
+        
     def test_connection(self):
         """Tester la connexion à la base de données"""
         try:
             logger.info("[CONNEXION] Test de connexion à la base de données bank_maroc...")
-            self.connection = psycopg2.connect(**self.db_config)
+            self.connection = database.get_connection()
             cursor = self.connection.cursor()
             
             # Tester avec une requête simple
@@ -102,18 +160,124 @@ class RawDataImporter:
         
         return csv_path
     
-    def insert_raw_data(self, df):
+    def log_throughput(self, mode, rows, elapsed):
+        """Afficher le débit d'insertion (lignes/seconde) d'un mode de chargement"""
+        rate = rows / elapsed if elapsed > 0 else float(rows)
+        logger.info(f"[PERF] Mode {mode}: {rows} lignes en {elapsed:.2f}s ({rate:.0f} lignes/s)")
+        return rate
+    
+    def read_csv_header(self, csv_file_path, encoding):
+        """Lire et valider l'en-tête du CSV, retourne la liste des colonnes"""
+        with open(csv_file_path, 'r', encoding=encoding, newline='') as f:
+            header = f.readline().rstrip('\r\n')
+        columns = [col.strip().strip('"') for col in header.split(';')]
+        
+        missing_columns = [col for col in CSV_COLUMNS if col not in columns]
+        unknown_columns = [col for col in columns if col not in CSV_TO_DB_COLUMNS]
+        if missing_columns or unknown_columns:
+            logger.error(f"[ERREUR] En-tête CSV incompatible avec COPY - manquantes: {missing_columns}, inconnues: {unknown_columns}")
+            return None
+        return columns
+    
+    def detect_encoding(self, csv_file_path, sample_size=ENCODING_SAMPLE_SIZE):
+        """Détecter l'encodage du CSV en une seule passe sur un échantillon
+        
+        Seuls le début et la fin du fichier sont lus (sample_size octets chacun),
+        au lieu de relire tout le fichier pour chaque encodage candidat.
+        """
+        file_size = os.path.getsize(csv_file_path)
+        with open(csv_file_path, 'rb') as f:
+            head = f.read(sample_size)
+            tail = b''
+            if file_size > 2 * sample_size:
+                f.seek(file_size - sample_size)
+                tail = f.read()
+        
+        for encoding in CSV_ENCODINGS:
+            try:
+                # Décodeur incrémental: un caractère multi-octets coupé en fin d'échantillon n'est pas une erreur
+                codecs.getincrementaldecoder(encoding)().decode(head, final=len(head) == file_size)
+                if tail:
+                    # Le début de l'échantillon de fin peut tomber au milieu d'un caractère
+                    codecs.getincrementaldecoder(encoding)().decode(tail.lstrip(bytes(range(0x80, 0xC0))), final=True)
+                logger.info(f"[ENCODAGE] Encodage détecté: {encoding}")
+                return encoding
+            except UnicodeDecodeError as e:
+                logger.warning(f"[AVERTISSEMENT] Échec avec encoding {encoding}: {e}")
+                continue
+        
+        logger.error("[ERREUR] Impossible de lire le fichier CSV avec les encodages testés")
+        return None
+    
+    def copy_raw_data(self, csv_file_path, encoding, target_table=RAW_TABLE, truncate=True):
+        """Charger le CSV brut en flux dans public.raw_reviews avec COPY FROM STDIN
+        
+        Le fichier est transmis tel quel au serveur par blocs de COPY_BUFFER_SIZE:
+        aucune ligne n'est convertie en objet Python. Les champs vides (NaN pour
+        pandas) sont chargés en NULL grâce à FORCE_NULL.
+        """
+        reader = None
+        try:
+            columns = self.read_csv_header(csv_file_path, encoding)
+            if columns is None:
+                return False
+            
+            db_columns = ', '.join(CSV_TO_DB_COLUMNS[col] for col in columns)
+            copy_query = f"""
+            COPY {target_table} ({db_columns})
+            FROM STDIN WITH (FORMAT csv, DELIMITER ';', HEADER true, QUOTE '"', FORCE_NULL ({db_columns}))
+            """
+            
+            cursor = self.connection.cursor()
+            
+            # Vider la table avant insertion (même transaction que le COPY)
+            if truncate:
+                logger.info("[NETTOYAGE] Suppression des données existantes...")
+                cursor.execute(f"TRUNCATE TABLE {target_table} RESTART IDENTITY;")
+            
+            logger.info(f"[COPY] Chargement en flux de {csv_file_path} (encoding: {encoding})...")
+            start = time.perf_counter()
+            with open(csv_file_path, 'r', encoding=encoding, newline='', buffering=COPY_BUFFER_SIZE) as f:
+                reader = DecodeCheckedReader(f)
+                cursor.copy_expert(copy_query, reader, size=COPY_BUFFER_SIZE)
+            rows = cursor.rowcount
+            
+            if rows <= 0:
+                # CSV vide ou en-tête seul: le TRUNCATE est annulé, raw_reviews garde ses données
+                logger.error("[ERREUR] Aucune donnée à insérer")
+                self.connection.rollback()
+                cursor.close()
+                return False
+            
+            self.connection.commit()
+            self.rows_loaded = rows
+            self.log_throughput('copy', rows, time.perf_counter() - start)
+            cursor.close()
+            
+            logger.info("[SUCCÈS] Insertion des données brutes réussie!")
+            return True
+            
+        except Exception as e:
+            if reader is not None and reader.error is not None:
+                # Octet invalide hors de l'échantillon de detect_encoding: load_csv essaie l'encodage suivant
+                self.connection.rollback()
+                raise reader.error
+            logger.error(f"[ERREUR] Erreur lors du COPY: {e}")
+            self.connection.rollback()
+            return False
+    
+    def insert_raw_data(self, df, target_table=RAW_TABLE, truncate=True, commit=True):
         """Insérer les données brutes SANS AUCUN nettoyage dans public.raw_reviews"""
         try:
             cursor = self.connection.cursor()
             
             # Vider la table avant insertion
-            logger.info("[NETTOYAGE] Suppression des données existantes...")
-            cursor.execute("TRUNCATE TABLE public.raw_reviews RESTART IDENTITY;")
+            if truncate:
+                logger.info("[NETTOYAGE] Suppression des données existantes...")
+                cursor.execute(f"TRUNCATE TABLE {target_table} RESTART IDENTITY;")
             
             # Vérifier les colonnes du DataFrame
-            expected_columns = ['Banque', 'Ville', 'Nom Agence', 'Localisation', 'Note', 'Avis', 'Date Avis']
-            missing_columns = [col for col in expected_columns if col not in df.columns]
+            missing_columns = [col for col in CSV_COLUMNS if col not in df.columns]
             
             if missing_columns:
                 logger.error(f"[ERREUR] Colonnes manquantes dans le CSV: {missing_columns}")
@@ -121,6 +285,7 @@ class RawDataImporter:
                 return False
             
             # Préparer les données exactement comme elles sont
+            start = time.perf_counter()
             data_tuples = []
             skipped_rows = 0
             
@@ -147,14 +312,14 @@ class RawDataImporter:
                 logger.warning(f"[AVERTISSEMENT] {skipped_rows} lignes ignorées à cause d'erreurs")
             
             # Requête d'insertion
-            insert_query = """
-            INSERT INTO public.raw_reviews 
+            insert_query = f"""
+            INSERT INTO {target_table} 
             (banque, ville, nom_agence, localisation, note, avis, date_avis) 
             VALUES %s
             """
             
             # Insertion par batch
-            logger.info(f"[INSERTION] Insertion de {len(data_tuples)} lignes brutes dans public.raw_reviews...")
+            logger.info(f"[INSERTION] Insertion de {len(data_tuples)} lignes brutes dans {target_table}...")
             
             if len(data_tuples) > 0:
                 execute_values(
@@ -165,7 +330,9 @@ class RawDataImporter:
                     page_size=1000
                 )
                 
-                self.connection.commit()
+                if commit:
+                    self.connection.commit()
+                self.log_throughput('values', len(data_tuples), time.perf_counter() - start)
                 logger.info("[SUCCÈS] Insertion des données brutes réussie!")
             else:
                 logger.error("[ERREUR] Aucune donnée à insérer")
@@ -180,51 +347,400 @@ class RawDataImporter:
                 self.connection.rollback()
             return False
     
-    def verify_insertion(self):
-        """Vérifier l'insertion avec des statistiques basiques"""
+    def ensure_incremental_schema(self):
+        """Préparer public.raw_reviews pour le mode incrémental (idempotent)
+        
+        Ajoute l'empreinte de contenu (content_hash) et le lot d'import
+        (import_batch_id), crée la table import_batches et calcule l'empreinte
+        des lignes chargées par un import complet. Les doublons historiques
+        gardent une empreinte NULL pour ne pas violer l'index unique; toutes
+        les lignes examinées sont marquées (content_hash_checked) pour que le
+        calcul ne porte ensuite que sur les lignes des nouveaux imports complets.
+        """
+        cursor = self.connection.cursor()
+        
+        cursor.execute("""
+            ALTER TABLE public.raw_reviews ADD COLUMN IF NOT EXISTS content_hash TEXT;
+            ALTER TABLE public.raw_reviews ADD COLUMN IF NOT EXISTS import_batch_id INTEGER;
+            ALTER TABLE public.raw_reviews ADD COLUMN IF NOT EXISTS content_hash_checked BOOLEAN NOT NULL DEFAULT false;
+            
+            CREATE TABLE IF NOT EXISTS public.import_batches (
+                batch_id SERIAL PRIMARY KEY,
+                source_file TEXT,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP,
+                rows_staged INTEGER,
+                rows_inserted INTEGER,
+                min_review_id INTEGER,
+                max_review_id INTEGER
+            );
+            
+            CREATE UNIQUE INDEX IF NOT EXISTS raw_reviews_content_hash_uidx
+                ON public.raw_reviews (content_hash)
+                WHERE content_hash IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS raw_reviews_import_batch_idx
+                ON public.raw_reviews (import_batch_id);
+            CREATE INDEX IF NOT EXISTS raw_reviews_hash_unchecked_idx
+                ON public.raw_reviews (id)
+                WHERE NOT content_hash_checked;
+            -- Filtre des modèles dbt incrémentaux (id ou created_at au-delà du maximum chargé)
+            CREATE INDEX IF NOT EXISTS raw_reviews_created_at_idx
+                ON public.raw_reviews (created_at);
+        """)
+        
+        # Empreinte des lignes pas encore examinées (première occurrence uniquement, NULL pour les doublons)
+        cursor.execute(f"""
+            UPDATE public.raw_reviews r
+            SET content_hash = h.content_hash,
+                content_hash_checked = true
+            FROM (
+                SELECT id,
+                       CASE
+                           WHEN row_number() OVER (PARTITION BY content_hash ORDER BY id) = 1
+                                AND NOT EXISTS (
+                                    SELECT 1 FROM public.raw_reviews known
+                                    WHERE known.content_hash = candidates.content_hash
+                                      AND known.id <> candidates.id
+                                )
+                           THEN content_hash
+                       END AS content_hash
+                FROM (
+                    SELECT id, {CONTENT_HASH_SQL.format(p='')} AS content_hash
+                    FROM public.raw_reviews
+                    WHERE NOT content_hash_checked
+                ) candidates
+            ) h
+            WHERE r.id = h.id;
+        """)
+        if cursor.rowcount > 0:
+            logger.info(f"[INCREMENTAL] Empreinte vérifiée pour {cursor.rowcount} lignes existantes")
+        
+        self.connection.commit()
+        cursor.close()
+    
+    def create_staging_table(self, table_name, temporary=True):
+        """Créer une table de staging vide (temporaire, ou UNLOGGED si partagée entre connexions)"""
+        kind = "TEMP" if temporary else "UNLOGGED"
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            DROP TABLE IF EXISTS {table_name};
+            CREATE {kind} TABLE {table_name} (
+                staging_id BIGSERIAL,
+                banque TEXT,
+                ville TEXT,
+                nom_agence TEXT,
+                localisation TEXT,
+                note TEXT,
+                avis TEXT,
+                date_avis TEXT
+            );
+        """)
+        self.connection.commit()
+        cursor.close()
+    
+    def merge_staging_tables(self, staging_tables, source_file):
+        """Fusionner les tables de staging dans public.raw_reviews en une seule transaction
+        
+        En mode incrémental, seuls les avis d'empreinte inconnue sont ajoutés et
+        le lot est enregistré dans import_batches. Sinon la table est vidée puis
+        rechargée. Les tables de staging sont supprimées dans la même transaction.
+        """
         try:
+            start = time.perf_counter()
             cursor = self.connection.cursor()
             
-            # Compter le nombre total de lignes
-            cursor.execute("SELECT COUNT(*) FROM public.raw_reviews;")
-            total_rows = cursor.fetchone()[0]
+            # Concaténation des tables dans l'ordre des fichiers puis des lignes
+            staged_rows = " UNION ALL ".join(
+                f"SELECT {position} AS file_position, staging_id, banque, ville, nom_agence, "
+                f"localisation, note, avis, date_avis FROM {table}"
+                for position, table in enumerate(staging_tables)
+            )
+            cursor.execute(f"SELECT COUNT(*) FROM ({staged_rows}) staged;")
+            rows_staged = cursor.fetchone()[0]
+            
+            if self.incremental:
+                cursor.execute(
+                    "INSERT INTO public.import_batches (source_file, rows_staged) VALUES (%s, %s) RETURNING batch_id;",
+                    (source_file, rows_staged)
+                )
+                batch_id = cursor.fetchone()[0]
+                
+                cursor.execute(f"""
+                    WITH inserted AS (
+                        INSERT INTO public.raw_reviews
+                            (banque, ville, nom_agence, localisation, note, avis, date_avis,
+                             content_hash, content_hash_checked, import_batch_id)
+                        SELECT banque, ville, nom_agence, localisation, note, avis, date_avis,
+                               {CONTENT_HASH_SQL.format(p='')}, true, %s
+                        FROM ({staged_rows}) staged
+                        ORDER BY file_position, staging_id
+                        ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO NOTHING
+                        RETURNING id
+                    )
+                    SELECT COUNT(*), MIN(id), MAX(id) FROM inserted;
+                """, (batch_id,))
+                rows_inserted, min_id, max_id = cursor.fetchone()
+                
+                cursor.execute("""
+                    UPDATE public.import_batches
+                    SET finished_at = clock_timestamp(),
+                        rows_inserted = %s,
+                        min_review_id = %s,
+                        max_review_id = %s
+                    WHERE batch_id = %s;
+                """, (rows_inserted, min_id, max_id, batch_id))
+            else:
+                logger.info("[NETTOYAGE] Suppression des données existantes...")
+                cursor.execute("TRUNCATE TABLE public.raw_reviews RESTART IDENTITY;")
+                cursor.execute(f"""
+                    INSERT INTO public.raw_reviews
+                        (banque, ville, nom_agence, localisation, note, avis, date_avis)
+                    SELECT banque, ville, nom_agence, localisation, note, avis, date_avis
+                    FROM ({staged_rows}) staged
+                    ORDER BY file_position, staging_id;
+                """)
+                rows_inserted = cursor.rowcount
+            self.rows_loaded = rows_inserted
+            
+            for table in staging_tables:
+                cursor.execute(f"DROP TABLE IF EXISTS {table};")
+            
+            self.connection.commit()
+            cursor.close()
+            
+            if self.incremental:
+                logger.info(f"[INCREMENTAL] Lot {batch_id}: {rows_inserted} nouveaux avis sur {rows_staged} lignes lues "
+                            f"({rows_staged - rows_inserted} déjà connus)")
+                if rows_inserted > 0:
+                    logger.info(f"[INCREMENTAL] Nouveaux ids: {min_id} -> {max_id}")
+            else:
+                logger.info(f"[FUSION] {rows_inserted} lignes fusionnées depuis {len(staging_tables)} table(s) de staging")
+            self.log_throughput('merge', rows_staged, time.perf_counter() - start)
+            return True
+            
+        except Exception as e:
+            logger.error(f"[ERREUR] Erreur lors de la fusion des tables de staging: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def drop_staging_tables(self, staging_tables):
+        """Supprimer des tables de staging laissées par un import interrompu"""
+        cursor = self.connection.cursor()
+        for table in staging_tables:
+            cursor.execute(f"DROP TABLE IF EXISTS {table};")
+        self.connection.commit()
+        cursor.close()
+    
+    def incremental_import(self, csv_file_path):
+        """Ajouter uniquement les avis inconnus sans vider public.raw_reviews
+        
+        Le CSV est chargé dans une table de staging temporaire, puis fusionné
+        avec INSERT ... ON CONFLICT DO NOTHING sur l'empreinte de contenu
+        (banque, agence, avis, date brute). Les ids existants ne changent pas
+        et le lot est enregistré dans import_batches.
+        """
+        try:
+            self.ensure_incremental_schema()
+            self.create_staging_table(STAGING_TABLE)
+            
+            # Chargement du CSV dans la table de staging
+            if not self.load_csv(csv_file_path, target_table=STAGING_TABLE, truncate=False):
+                return False
+            
+            # Fusion dans public.raw_reviews (une seule transaction)
+            return self.merge_staging_tables([STAGING_TABLE], os.path.abspath(csv_file_path))
+            
+        except Exception as e:
+            logger.error(f"[ERREUR] Erreur lors de l'import incrémental: {e}")
+            if self.connection:
+                self.connection.rollback()
+            return False
+    
+    def get_csv_file_paths(self, directory=DATA_RAW_DIR, pattern='*.csv'):
+        """Lister les fichiers CSV à importer dans un répertoire (ordre alphabétique)"""
+        csv_paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        logger.info(f"[CHEMIN] {len(csv_paths)} fichier(s) {pattern} trouvé(s) dans {directory}")
+        return csv_paths
+    
+    def import_directory(self, directory=DATA_RAW_DIR, pattern='*.csv', workers=None):
+        """Importer tous les CSV d'un répertoire en parallèle
+        
+        Chaque fichier est chargé par un processus du pool, avec sa propre
+        connexion, dans sa propre table de staging UNLOGGED. Les tables sont
+        ensuite fusionnées dans public.raw_reviews en une seule transaction:
+        si un fichier échoue, rien n'est fusionné.
+        """
+        csv_paths = self.get_csv_file_paths(directory, pattern)
+        if not csv_paths:
+            logger.error(f"[ERREUR] Aucun fichier {pattern} trouvé dans {directory}")
+            return False
+        
+        staging_tables = []
+        try:
+            self.start_run(directory, csv_paths)
+            
+            if not self.test_connection():
+                return False
+            if self.incremental:
+                self.ensure_incremental_schema()
+            
+            workers = workers or min(len(csv_paths), os.cpu_count() or 1)
+            staging_tables = [f"{STAGING_TABLE}_{os.getpid()}_{i}" for i in range(len(csv_paths))]
+            logger.info(f"[PARALLELE] Import de {len(csv_paths)} fichier(s) avec {workers} processus")
+            
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                reports = list(executor.map(
+                    import_file_worker,
+                    csv_paths,
+                    staging_tables,
+                    [self.load_mode] * len(csv_paths),
+                    [self.use_parquet] * len(csv_paths)
+                ))
+            load_elapsed = time.perf_counter() - start
+            
+            self.write_directory_report(reports)
+            
+            failed = [report['file'] for report in reports if report['status'] != 'ok']
+            if failed:
+                logger.error(f"[ERREUR] {len(failed)} fichier(s) en échec, aucune fusion effectuée: {failed}")
+                return False
             
-            # Compter les valeurs NULL par colonne
-            null_counts_query = """
+            self.log_throughput('parallel load', sum(report['rows'] for report in reports), load_elapsed)
+            
+            if not self.merge_staging_tables(staging_tables, os.path.abspath(directory)):
+                return False
+            
+            if not self.verify_insertion():
+                return False
+            
+            logger.info("[SUCCÈS] Import du répertoire terminé avec succès!")
+            return True
+            
+        except Exception as e:
+            logger.error(f"[ERREUR] Erreur générale: {e}")
+            return False
+        
+        finally:
+            # Tables de staging laissées par un échec, une erreur du pool ou une interruption
+            # (déjà supprimées par une fusion réussie: DROP TABLE IF EXISTS)
+            if self.connection and staging_tables:
+                try:
+                    self.connection.rollback()
+                    self.drop_staging_tables(staging_tables)
+                except Exception as e:
+                    logger.warning(f"[AVERTISSEMENT] Tables de staging non supprimées ({e}): {staging_tables}")
+            if self.connection:
+                database.release_connection(self.connection)
+                self.connection = None
+                logger.info("[CONNEXION] Connexion rendue au pool")
+    
+    def write_directory_report(self, reports):
+        """Journaliser et sauvegarder le rapport par fichier (durée, lignes, débit)"""
+        report_df = pd.DataFrame(reports, columns=['file', 'status', 'rows', 'seconds', 'rows_per_sec', 'staging_table'])
+        report_path = os.path.join(LOGS_DIR, f"import_directory_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        report_df.to_csv(report_path, index=False, encoding='utf-8')
+        
+        logger.info(f"[RAPPORT] *** RAPPORT PAR FICHIER ***")
+        for report in reports:
+            logger.info(f"[RAPPORT]    {os.path.basename(report['file'])}: {report['status']}, "
+                        f"{report['rows']} lignes en {report['seconds']:.2f}s ({report['rows_per_sec']:.0f} lignes/s)")
+        logger.info(f"[RAPPORT] Rapport sauvegardé: {report_path}")
+    
+    def start_run(self, source, csv_paths):
+        """Démarrer le suivi d'un import (durée, octets lus, lignes chargées)"""
+        self.run_source = os.path.abspath(source)
+        self.run_started_at = datetime.now()
+        self.run_start = time.perf_counter()
+        self.bytes_read = sum(os.path.getsize(path) for path in csv_paths if os.path.exists(path))
+        self.rows_loaded = 0
+    
+    def collect_load_statistics(self):
+        """Calculer les statistiques de public.raw_reviews en un seul parcours (GROUPING SETS)
+        
+        Retourne le total, les valeurs NULL par colonne et le nombre d'avis
+        par banque et par ville (triés par nombre décroissant).
+        """
+        null_columns = ',\n'.join(
+            f"                COUNT(*) - COUNT({col}) AS {col}_nulls" for col in DB_COLUMNS
+        )
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
             SELECT 
-                COUNT(*) - COUNT(banque) as banque_nulls,
-                COUNT(*) - COUNT(ville) as ville_nulls,
-                COUNT(*) - COUNT(nom_agence) as nom_agence_nulls,
-                COUNT(*) - COUNT(localisation) as localisation_nulls,
-                COUNT(*) - COUNT(note) as note_nulls,
-                COUNT(*) - COUNT(avis) as avis_nulls,
-                COUNT(*) - COUNT(date_avis) as date_avis_nulls
-            FROM public.raw_reviews;
-            """
-            cursor.execute(null_counts_query)
-            null_counts = cursor.fetchone()
+                GROUPING(banque) AS banque_grouped,
+                GROUPING(ville) AS ville_grouped,
+                banque,
+                ville,
+                COUNT(*) AS count,
+{null_columns}
+            FROM public.raw_reviews
+            GROUP BY GROUPING SETS ((banque), (ville), ())
+            ORDER BY count DESC;
+        """)
+        
+        stats = {'total_rows': 0, 'null_counts': {}, 'bank_counts': {}, 'city_counts': {}}
+        for banque_grouped, ville_grouped, banque, ville, count, *null_counts in cursor.fetchall():
+            if banque_grouped and ville_grouped:
+                stats['total_rows'] = count
+                stats['null_counts'] = dict(zip(DB_COLUMNS, null_counts))
+            elif not banque_grouped and banque is not None:
+                stats['bank_counts'][banque] = count
+            elif not ville_grouped and ville is not None:
+                stats['city_counts'][ville] = count
+        
+        cursor.close()
+        return stats
+    
+    def record_import_run(self, stats, duration):
+        """Enregistrer les métriques de l'import dans public.import_runs"""
+        rows_per_sec = self.rows_loaded / duration if duration and duration > 0 else None
+        mode = self.load_mode + ('+incremental' if self.incremental else '')
+        
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS public.import_runs (
+                run_id SERIAL PRIMARY KEY,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                source TEXT,
+                load_mode TEXT,
+                duration_seconds DOUBLE PRECISION,
+                rows_loaded INTEGER,
+                rows_per_sec DOUBLE PRECISION,
+                bytes_read BIGINT,
+                total_rows INTEGER,
+                null_counts JSONB,
+                bank_counts JSONB,
+                city_counts JSONB
+            );
+        """)
+        cursor.execute("""
+            INSERT INTO public.import_runs 
+            (started_at, source, load_mode, duration_seconds, rows_loaded, rows_per_sec, bytes_read,
+             total_rows, null_counts, bank_counts, city_counts)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING run_id;
+        """, (
+            self.run_started_at, self.run_source, mode, duration, self.rows_loaded, rows_per_sec,
+            self.bytes_read, stats['total_rows'], Json(stats['null_counts']),
+            Json(stats['bank_counts']), Json(stats['city_counts'])
+        ))
+        run_id = cursor.fetchone()[0]
+        self.connection.commit()
+        cursor.close()
+        
+        logger.info(f"[STATS] Import enregistré dans public.import_runs (run_id={run_id})")
+        return run_id
+    
+    def verify_insertion(self):
+        """Vérifier l'insertion avec des statistiques basiques"""
+        try:
+            duration = time.perf_counter() - self.run_start if self.run_start is not None else None
             
-            # Top banques
-            cursor.execute("""
-                SELECT banque, COUNT(*) as count 
-                FROM public.raw_reviews 
-                WHERE banque IS NOT NULL
-                GROUP BY banque 
-                ORDER BY count DESC 
-                LIMIT 5;
-            """)
-            top_banks = cursor.fetchall()
+            stats = self.collect_load_statistics()
             
-            # Top villes
-            cursor.execute("""
-                SELECT ville, COUNT(*) as count 
-                FROM public.raw_reviews 
-                WHERE ville IS NOT NULL
-                GROUP BY ville 
-                ORDER BY count DESC 
-                LIMIT 5;
-            """)
-            top_cities = cursor.fetchall()
+            cursor = self.connection.cursor()
             
             # Échantillon de données
             cursor.execute("SELECT id, banque, ville, LEFT(avis, 50) as avis_extrait FROM public.raw_reviews LIMIT 3;")
@@ -232,19 +748,21 @@ class RawDataImporter:
             
             # Afficher les statistiques
             logger.info(f"[STATS] *** STATISTIQUES D'INSERTION BRUTE ***")
-            logger.info(f"[STATS] Total des lignes insérées: {total_rows}")
+            logger.info(f"[STATS] Total des lignes insérées: {stats['total_rows']}")
+            if duration is not None:
+                logger.info(f"[STATS] Lignes chargées par cet import: {self.rows_loaded} en {duration:.2f}s "
+                            f"({self.bytes_read} octets lus)")
             
             logger.info(f"[STATS] Valeurs NULL par colonne:")
-            columns = ['banque', 'ville', 'nom_agence', 'localisation', 'note', 'avis', 'date_avis']
-            for i, col in enumerate(columns):
-                logger.info(f"[STATS]    {col}: {null_counts[i]} valeurs NULL")
+            for col, null_count in stats['null_counts'].items():
+                logger.info(f"[STATS]    {col}: {null_count} valeurs NULL")
             
             logger.info(f"[STATS] Top 5 Banques:")
-            for bank, count in top_banks:
+            for bank, count in list(stats['bank_counts'].items())[:5]:
                 logger.info(f"[STATS]    {bank}: {count} avis")
                 
             logger.info(f"[STATS] Top 5 Villes:")
-            for city, count in top_cities:
+            for city, count in list(stats['city_counts'].items())[:5]:
                 logger.info(f"[STATS]    {city}: {count} avis")
             
             logger.info(f"[STATS] Échantillon de données (3 premières lignes):")
@@ -252,12 +770,161 @@ class RawDataImporter:
                 logger.info(f"[STATS]    Ligne {i}: ID={row[0]}, Banque={row[1]}, Ville={row[2]}, Avis='{row[3]}...'")
             
             cursor.close()
+            
+            if duration is not None:
+                self.record_import_run(stats, duration)
             return True
             
         except Exception as e:
             logger.error(f"[ERREUR] Erreur lors de la vérification: {e}")
             return False
     
+    def insert_csv_chunks(self, csv_file_path, encoding, target_table=RAW_TABLE, truncate=True):
+        """Insérer le CSV brut par morceaux de CSV_CHUNK_SIZE lignes (chemin execute_values)
+        
+        Chaque morceau est validé puis inséré avant la lecture du suivant: la
+        mémoire reste bornée quelle que soit la taille du fichier. L'ensemble
+        est validé en une seule transaction.
+        """
+        logger.info(f"[LECTURE] Lecture par morceaux du fichier CSV brut: {csv_file_path} (encoding: {encoding})")
+        
+        start = time.perf_counter()
+        total_rows = 0
+        null_counts = {}
+        
+        try:
+            reader = pd.read_csv(csv_file_path, sep=';', encoding=encoding, dtype=str, chunksize=CSV_CHUNK_SIZE)
+            for chunk_number, chunk in enumerate(reader, 1):
+                logger.info(f"[LECTURE] Morceau {chunk_number}: {len(chunk)} lignes")
+                
+                for col in chunk.columns:
+                    null_counts[col] = null_counts.get(col, 0) + int(chunk[col].isnull().sum())
+                
+                if not self.insert_raw_data(chunk, target_table=target_table,
+                                            truncate=truncate and chunk_number == 1, commit=False):
+                    return False
+                total_rows += len(chunk)
+            
+            if total_rows == 0:
+                logger.error("[ERREUR] Aucune donnée à insérer")
+                return False
+            
+            self.connection.commit()
+            self.rows_loaded = total_rows
+            
+        except UnicodeDecodeError:
+            self.connection.rollback()
+            raise
+        except Exception as e:
+            logger.error(f"[ERREUR] Erreur lors de la lecture par morceaux: {e}")
+            self.connection.rollback()
+            return False
+        
+        logger.info(f"[INFO] Nombre de lignes lues: {total_rows}")
+        logger.info(f"[INFO]    Valeurs manquantes par colonne:")
+        for col, null_count in null_counts.items():
+            logger.info(f"[INFO]      {col}: {null_count} valeurs manquantes")
+        self.log_throughput('values (total)', total_rows, time.perf_counter() - start)
+        return True
+    
+    def load_parquet(self, parquet_path, target_table=RAW_TABLE, truncate=True):
+        """Charger un cache Parquet dans target_table, batch par batch
+        
+        Le fichier est ouvert en mémoire mappée et seules les colonnes de
+        CSV_COLUMNS sont lues. En mode copy chaque batch est sérialisé en CSV
+        par Arrow puis envoyé avec COPY; en mode values il passe par
+        insert_raw_data. L'ensemble est validé en une seule transaction.
+        """
+        import pyarrow.csv as pa_csv
+        import parquet_cache
+        
+        logger.info(f"[PARQUET] Lecture de {parquet_path} (colonnes: {CSV_COLUMNS})")
+        start = time.perf_counter()
+        total_rows = 0
+        db_columns = ', '.join(DB_COLUMNS)
+        copy_query = f"""
+        COPY {target_table} ({db_columns})
+        FROM STDIN WITH (FORMAT csv, DELIMITER ';', QUOTE '"', FORCE_NULL ({db_columns}))
+        """
+        
+        try:
+            cursor = self.connection.cursor()
+            if truncate:
+                logger.info("[NETTOYAGE] Suppression des données existantes...")
+                cursor.execute(f"TRUNCATE TABLE {target_table} RESTART IDENTITY;")
+            
+            parquet_file = parquet_cache.open_parquet(parquet_path)
+            for batch in parquet_file.iter_batches(batch_size=CSV_CHUNK_SIZE, columns=CSV_COLUMNS):
+                if self.load_mode == 'copy':
+                    buffer = io.BytesIO()
+                    pa_csv.write_csv(batch, buffer, pa_csv.WriteOptions(include_header=False, delimiter=';'))
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_query, buffer, size=COPY_BUFFER_SIZE)
+                elif not self.insert_raw_data(batch.to_pandas(), target_table=target_table,
+                                              truncate=False, commit=False):
+                    return False
+                total_rows += batch.num_rows
+            
+            if total_rows == 0:
+                logger.error("[ERREUR] Aucune donnée à insérer")
+                self.connection.rollback()
+                return False
+            
+            self.connection.commit()
+            cursor.close()
+            self.rows_loaded = total_rows
+            
+        except Exception as e:
+            logger.error(f"[ERREUR] Erreur lors du chargement Parquet: {e}")
+            self.connection.rollback()
+            return False
+        
+        self.log_throughput(f'{self.load_mode} (parquet)', total_rows, time.perf_counter() - start)
+        return True
+    
+    def load_csv(self, csv_file_path, target_table=RAW_TABLE, truncate=True):
+        """Charger le CSV dans target_table (COPY en flux, execute_values par morceaux en secours)
+        
+        detect_encoding ne lit qu'un échantillon: si un octet invalide apparaît
+        pendant le chargement, celui-ci est annulé et relancé avec l'encodage
+        suivant de CSV_ENCODINGS.
+        """
+        detected = self.detect_encoding(csv_file_path)
+        if detected is None:
+            return False
+        
+        failed = set()
+        for encoding in CSV_ENCODINGS[CSV_ENCODINGS.index(detected):]:
+            decoding = SAME_DECODING.get(encoding, encoding)
+            if decoding in failed:
+                # utf-8 après utf-8-sig: même octet invalide, inutile de relire tout le fichier
+                continue
+            try:
+                return self.load_csv_with_encoding(csv_file_path, encoding, target_table, truncate)
+            except UnicodeError as e:  # UnicodeDecodeError, ou parquet_cache.CsvDecodeError avec --parquet
+                failed.add(decoding)
+                logger.warning(f"[ENCODAGE] Échec du chargement avec {encoding}: {e}")
+        
+        logger.error("[ERREUR] Impossible de lire le fichier CSV avec les encodages testés")
+        return False
+    
+    def load_csv_with_encoding(self, csv_file_path, encoding, target_table=RAW_TABLE, truncate=True):
+        """Charger le CSV avec un encodage donné (UnicodeDecodeError propagée à load_csv)"""
+        # Lecture via le cache Parquet (converti seulement si le CSV a changé)
+        if self.use_parquet:
+            import parquet_cache
+            parquet_path = parquet_cache.convert_csv_to_parquet(
+                csv_file_path, sep=';', encoding='utf-8' if encoding == 'utf-8-sig' else encoding
+            )
+            return self.load_parquet(parquet_path, target_table=target_table, truncate=truncate)
+        
+        if self.load_mode == 'copy':
+            if self.copy_raw_data(csv_file_path, encoding, target_table=target_table, truncate=truncate):
+                return True
+            logger.warning("[FALLBACK] Échec du COPY, bascule vers l'insertion execute_values")
+        
+        return self.insert_csv_chunks(csv_file_path, encoding, target_table=target_table, truncate=truncate)
+    
     def import_csv_raw(self, csv_file_path):
         """Fonction principale pour importer le CSV BRUT dans public.raw_reviews"""
         try:
@@ -281,45 +948,23 @@ class RawDataImporter:
                 
                 return False
             
-            # Lire le CSV exactement comme il est
-            logger.info(f"[LECTURE] Lecture du fichier CSV brut: {csv_file_path}")
-            
-            # Essayer différents encodages
-            encodings = ['utf-8-sig', 'utf-8', 'latin-1', 'cp1252']
-            df = None
-            
-            for encoding in encodings:
-                try:
-                    df = pd.read_csv(csv_file_path, sep=';', encoding=encoding)
-                    logger.info(f"[SUCCÈS] Fichier lu avec succès (encoding: {encoding})")
-                    break
-                except Exception as e:
-                    logger.warning(f"[AVERTISSEMENT] Échec avec encoding {encoding}: {e}")
-                    continue
-            
-            if df is None:
-                logger.error("[ERREUR] Impossible de lire le fichier CSV avec les encodages testés")
-                return False
-            
-            logger.info(f"[INFO] Nombre de lignes lues: {len(df)}")
-            
-            # Afficher les colonnes pour vérification
-            logger.info(f"[INFO] Colonnes trouvées: {list(df.columns)}")
-            
-            # Afficher quelques statistiques du CSV
-            logger.info(f"[INFO] Aperçu des données:")
-            logger.info(f"[INFO]    Premières lignes: {len(df.head())}")
-            logger.info(f"[INFO]    Valeurs manquantes par colonne:")
-            for col in df.columns:
-                null_count = df[col].isnull().sum()
-                logger.info(f"[INFO]      {col}: {null_count} valeurs manquantes")
+            self.start_run(csv_file_path, [csv_file_path])
             
             # Tester la connexion
             if not self.test_connection():
                 return False
             
-            # Insérer les données brutes
-            if not self.insert_raw_data(df):
+            # Mode incrémental: ajouter seulement les avis inconnus
+            if self.incremental:
+                if not self.incremental_import(csv_file_path):
+                    return False
+                if not self.verify_insertion():
+                    return False
+                logger.info("[SUCCÈS] Import incrémental terminé avec succès!")
+                return True
+            
+            # Insérer les données brutes (COPY en flux, execute_values en secours)
+            if not self.load_csv(csv_file_path):
                 return False
             
             # Vérifier l'insertion
@@ -336,28 +981,104 @@ class RawDataImporter:
         finally:
             # Fermer la connexion
             if self.connection:
-                self.connection.close()
-                logger.info("[CONNEXION] Connexion fermée")
+                database.release_connection(self.connection)
+                self.connection = None
+                logger.info("[CONNEXION] Connexion rendue au pool")
 
-def main():
+def import_file_worker(csv_file_path, staging_table, load_mode, use_parquet=False):
+    """Charger un fichier CSV dans sa table de staging (exécuté dans un processus du pool)"""
+    importer = RawDataImporter(load_mode=load_mode, use_parquet=use_parquet)
+    start = time.perf_counter()
+    rows = 0
+    status = 'ok'
+    
+    try:
+        importer.connection = database.get_connection()
+        importer.create_staging_table(staging_table, temporary=False)
+        if importer.load_csv(csv_file_path, target_table=staging_table, truncate=False):
+            cursor = importer.connection.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM {staging_table};")
+            rows = cursor.fetchone()[0]
+            cursor.close()
+        else:
+            status = 'echec'
+    except Exception as e:
+        logger.error(f"[ERREUR] {csv_file_path}: {e}")
+        status = 'echec'
+    finally:
+        if importer.connection:
+            database.release_connection(importer.connection)
+    
+    elapsed = time.perf_counter() - start
+    return {
+        'file': csv_file_path,
+        'status': status,
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_sec': rows / elapsed if elapsed > 0 else float(rows),
+        'staging_table': staging_table,
+    }
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Import des données CSV brutes dans public.raw_reviews")
+    parser.add_argument(
+        '--csv', default=None,
+        help="Chemin du fichier CSV à importer (défaut: DATA/raw/donnees_agences_avis.csv)"
+    )
+    parser.add_argument(
+        '--mode', choices=LOAD_MODES, default='copy',
+        help="copy: COPY FROM STDIN en flux (défaut), values: execute_values (historique)"
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="Ajouter uniquement les nouveaux avis (pas de TRUNCATE, ids conservés)"
+    )
+    parser.add_argument(
+        '--parquet', action='store_true',
+        help="Lire via le cache Parquet DATA/parquet (reconverti seulement si le CSV change)"
+    )
+    parser.add_argument(
+        '--directory', nargs='?', const=DATA_RAW_DIR, default=None,
+        help="Importer en parallèle tous les CSV du répertoire (défaut: DATA/raw)"
+    )
+    parser.add_argument(
+        '--pattern', default='*.csv',
+        help="Motif des fichiers à importer avec --directory (défaut: *.csv)"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=None,
+        help="Nombre de processus pour --directory (défaut: nombre de fichiers, borné au nombre de CPU)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Fonction principale"""
+    args = parse_args(argv)
+    setup_logging()
+    
     print("=" * 80)
     print("IMPORT DONNÉES BRUTES - PROJET DBT morocco_banks_reviews")
     print("=" * 80)
     print(f"Répertoire du script: {SCRIPT_DIR}")
     print(f"Répertoire racine du projet: {PROJECT_ROOT}")
     print(f"Table cible: public.raw_reviews (bank_maroc)")
+    print(f"Mode de chargement: {args.mode}{' (incrémental)' if args.incremental else ''}")
     print("AUCUN nettoyage ne sera effectué - données exactement comme dans le CSV")
     print("=" * 80)
     
     # Créer l'importeur
-    importer = RawDataImporter()
+    importer = RawDataImporter(load_mode=args.mode, incremental=args.incremental, use_parquet=args.parquet)
     
-    # Obtenir le chemin du fichier CSV
-    csv_file_path = importer.get_csv_file_path()
+    # Lancer l'import (répertoire complet en parallèle, ou fichier unique)
+    if args.directory:
+        success = importer.import_directory(args.directory, pattern=args.pattern, workers=args.workers)
+    else:
+        # Obtenir le chemin du fichier CSV
+        csv_file_path = args.csv or importer.get_csv_file_path()
+        success = importer.import_csv_raw(csv_file_path)
     
-    # Lancer l'import
-    if importer.import_csv_raw(csv_file_path):
+    if success:
         print("\n" + "=" * 80)
         print("SUCCÈS: Les données BRUTES ont été importées dans public.raw_reviews!")
         print("Aucun nettoyage effectué - données exactement comme scrapées")
@@ -381,4 +1102,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    exit_code = main()
\ No newline at end of file
+    sys.exit(main())
@@ -12,41 +12,154 @@ import numpy as np
 import re
 import logging
 from datetime import datetime
+from collections import Counter
+import argparse
+import tempfile
+import json
+import time
+import io
 import sys
 import os
 
-# NLP et LDA
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import SnowballStemmer
+# scikit-learn et NLTK sont importés dans les méthodes qui les utilisent (topics --help reste rapide)
+
+# Préprocessing par lots (mots vides figés, regex précompilées, cache de stems)
+from text_preprocessing import TextPreprocessor, DEFAULT_CHUNK_SIZE, MIN_TOKEN_LENGTH
+
+# Configuration et pool de connexions partagés
+import database
+
+# Modèles de topics versionnés (mode infer / retrain)
+from topic_models import TopicModelStore, unseen_vocabulary_share
+
+# Sélection du nombre de topics (mode select)
+import topic_model_selection
+
+# Cache disque des textes préprocessés et matrices TF-IDF
+from feature_cache import FeatureCache, corpus_fingerprint, DEFAULT_MAX_CACHE_MB, DEFAULT_MAX_CACHE_AGE_DAYS
 
-# Configuration de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('../../logs/lda_topics.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(SCRIPT_DIR)), "logs")
+
+# Résultat de la vérification des ressources NLTK (évite nltk.data.find à chaque lancement)
+NLTK_MARKER_FILE = os.path.join(SCRIPT_DIR, "..", "cache", "nltk_resources.json")
+NLTK_RESOURCES = {'stopwords': 'corpora/stopwords'}
+
+
+def setup_logging():
+    """Configurer le logging (fichier logs/lda_topics.log + console), appelé au lancement"""
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(LOGS_DIR, 'lda_topics.log')),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+# Table des topics lue par dbt (remplacée via <table>_shadow et <table>_old)
+TOPICS_TABLE = 'temp_review_topics'
+TOPICS_SWAP_LOCK_TIMEOUT = '30s'
+
+# Distribution complète des topics: les top_k topics de chaque avis (poids float32)
+TOPIC_WEIGHTS_TABLE = 'review_topic_weights'
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_TOPIC_WEIGHT = 0.05
+
+# Tables remplacées ensemble par échange atomique: colonnes et index créés après le chargement
+TOPIC_TABLES = {
+    TOPICS_TABLE: {
+        'columns': """
+            id INTEGER NOT NULL,
+            topic_id INTEGER,
+            topic_name TEXT,
+            topic_probability DECIMAL(4,3),
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        """,
+        'primary_key': ['id'],
+        # updated_at: avis dont le topic a changé, retraités par mart_reviews_enriched (incrémental)
+        'indexes': {'topic_id_idx': ['topic_id'], 'updated_at_idx': ['updated_at']},
+    },
+    TOPIC_WEIGHTS_TABLE: {
+        'columns': """
+            id INTEGER NOT NULL,
+            topic_rank SMALLINT NOT NULL,
+            topic_id SMALLINT NOT NULL,
+            topic_name TEXT,
+            topic_weight REAL NOT NULL
+        """,
+        'primary_key': ['id', 'topic_rank'],
+        'indexes': {'topic_name_idx': ['topic_name']},
+    },
+}
+TOPIC_COLUMNS = ['id', 'topic_id', 'topic_name', 'topic_probability']
+TOPIC_WEIGHT_COLUMNS = ['id', 'topic_rank', 'topic_id', 'topic_name', 'topic_weight']
+
+# Modes d'exécution: full (tout réentraîner), infer (nouveaux avis seulement),
+# retrain (réentraîner si le modèle est trop ancien ou le vocabulaire a dérivé, sinon infer),
+# select (comparer plusieurs nombres de topics / hyperparamètres et garder le meilleur)
+LDA_MODES = ('full', 'infer', 'retrain', 'select')
+LDA_LANGUAGES = ['fr', 'ar']
+MIN_REVIEWS_PER_LANGUAGE = 20
+DEFAULT_MAX_MODEL_AGE_DAYS = 30
+DEFAULT_UNSEEN_THRESHOLD = 0.2
+
+# Paramètres TF-IDF / LDA communs à l'entraînement en mémoire et en flux
+TFIDF_MAX_FEATURES = 1000
+TFIDF_MIN_DF = 2
+TFIDF_MAX_DF = 0.8
+TFIDF_NGRAM_RANGE = (1, 2)
+LDA_MAX_ITER = 10
+MIN_PROCESSED_LENGTH = 5  # Textes préprocessés plus courts ignorés
+
+# Entraînement en flux: taille des lots lus par le curseur serveur, et nombre
+# maximum de n-grammes suivis pendant le comptage du vocabulaire (au-delà, les
+# n-grammes vus dans un seul avis sont oubliés)
+DEFAULT_STREAM_BATCH_SIZE = 5000
+STREAM_MAX_TRACKED_NGRAMS = 1000000
+
+REVIEWS_FILTER_SQL = """
+    should_keep = true 
+    AND avis_cleaned IS NOT NULL 
+    AND trim(avis_cleaned) != ''
+    AND length(avis_cleaned) >= 10
+"""
+
 class LDATopicExtractor:
-    def __init__(self):
-        """Initialiser l'extracteur LDA"""
-        self.db_config = {
-            'host': 'localhost',
-            'database': 'bank_maroc',
-            'user': 'airflow1',
-            'password': 'airflow',
-            'port': 5432
-        }
+    def __init__(self, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, mode='full',
+                 max_model_age_days=DEFAULT_MAX_MODEL_AGE_DAYS, unseen_threshold=DEFAULT_UNSEEN_THRESHOLD,
+                 streaming=False, stream_batch_size=DEFAULT_STREAM_BATCH_SIZE, selection_grid=None,
+                 selection_metric='coherence', use_cache=True, cache_max_mb=DEFAULT_MAX_CACHE_MB,
+                 cache_max_age_days=DEFAULT_MAX_CACHE_AGE_DAYS, top_k=DEFAULT_TOP_K,
+                 min_topic_weight=DEFAULT_MIN_TOPIC_WEIGHT):
+        """Initialiser l'extracteur LDA
+        
+        workers > 1: préprocessing sur un pool de processus.
+        streaming: entraînement par lots via un curseur serveur (mémoire bornée).
+        selection_grid: candidats du mode select (voir topic_model_selection.candidate_grid).
+        use_cache: réutiliser les textes préprocessés et la matrice TF-IDF d'un corpus identique.
+        top_k / min_topic_weight: topics conservés par avis dans review_topic_weights (0 = tous).
+        """
+        self.db_config = database.load_db_config()
         self.connection = None
-        self.stemmer_fr = SnowballStemmer('french')
-        self.stemmer_ar = SnowballStemmer('arabic')
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.max_model_age_days = max_model_age_days
+        self.unseen_threshold = unseen_threshold
+        self.streaming = streaming
+        self.stream_batch_size = stream_batch_size
+        self.selection_grid = selection_grid or topic_model_selection.candidate_grid()
+        self.selection_metric = selection_metric
+        self.feature_cache = FeatureCache(max_mb=cache_max_mb, max_age_days=cache_max_age_days) if use_cache else None
+        self.top_k = top_k
+        self.min_topic_weight = min_topic_weight
+        self.topic_weights_parts = []  # Poids des topics calculés pendant le run (voir assign_topics)
+        self.retrained_languages = []  # Langues réentraînées pendant un run retrain (voir upsert_topics_to_db)
+        self.model_store = TopicModelStore()
         
         # Télécharger les ressources NLTK nécessaires
         self.download_nltk_resources()
@@ -58,48 +171,90 @@ class LDATopicExtractor:
                    'toujours', 'jamais', 'ici', 'là', 'maintenant', 'aujourd', 'hier'],
             'ar': ['بنك', 'وكالة', 'فرع', 'جدا', 'كل', 'هذا', 'ذلك', 'هنا', 'هناك']
         }
+        self.preprocessor = TextPreprocessor(self.custom_stopwords)
     
     def download_nltk_resources(self):
-        """Télécharger les ressources NLTK nécessaires"""
+        """Télécharger les ressources NLTK nécessaires
+        
+        Les chemins trouvés sont mémorisés dans NLTK_MARKER_FILE: les lancements
+        suivants vérifient seulement que ces dossiers existent encore.
+        """
+        start = time.perf_counter()
         try:
-            nltk.data.find('tokenizers/punkt')
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            logger.info("[NLTK] Téléchargement des ressources...")
-            nltk.download('punkt', quiet=True)
-            nltk.download('stopwords', quiet=True)
-            logger.info("[NLTK] Ressources téléchargées")
+            with open(NLTK_MARKER_FILE, encoding='utf-8') as f:
+                marker = json.load(f)
+            if all(os.path.exists(marker.get(name, '')) for name in NLTK_RESOURCES):
+                logger.info(f"[NLTK] Ressources déjà vérifiées ({(time.perf_counter() - start) * 1000:.0f} ms)")
+                return
+        except (OSError, ValueError):
+            pass
+        
+        import nltk
+        
+        marker = {}
+        for name, resource in NLTK_RESOURCES.items():
+            try:
+                pointer = nltk.data.find(resource)
+            except LookupError:
+                logger.info("[NLTK] Téléchargement des ressources...")
+                nltk.download(name, quiet=True)
+                logger.info("[NLTK] Ressources téléchargées")
+                pointer = nltk.data.find(resource)
+            # Dossier décompressé ou archive zip
+            marker[name] = getattr(pointer, 'path', None) or pointer.zipfile.filename
+        
+        os.makedirs(os.path.dirname(NLTK_MARKER_FILE), exist_ok=True)
+        with open(NLTK_MARKER_FILE, 'w', encoding='utf-8') as f:
+            json.dump(marker, f, ensure_ascii=False, indent=2)
+        logger.info(f"[NLTK] Ressources vérifiées ({(time.perf_counter() - start) * 1000:.0f} ms)")
     
     def connect_db(self):
         """Se connecter à la base de données"""
         try:
-            self.connection = psycopg2.connect(**self.db_config)
+            self.connection = database.get_connection()
             logger.info("[DB] Connexion établie")
             return True
         except Exception as e:
             logger.error(f"[DB] Erreur de connexion: {e}")
             return False
     
-    def get_reviews_data(self):
-        """Récupérer les avis depuis la base de données"""
+    def topics_table_exists(self):
+        """Vérifier si la table des topics existe déjà"""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", (TOPICS_TABLE,))
+        exists = cursor.fetchone()[0]
+        cursor.close()
+        return exists
+    
+    def get_reviews_data(self, only_new=False):
+        """Récupérer les avis depuis la base de données
+        
+        La colonne is_new indique les avis encore absents de temp_review_topics
+        (tous les avis si la table n'existe pas encore). only_new: ne lire que
+        ces avis.
+        """
         try:
-            query = """
+            if self.topics_table_exists():
+                is_new = f"NOT EXISTS (SELECT 1 FROM {TOPICS_TABLE} trt WHERE trt.id = r.id)"
+            else:
+                is_new = "true"
+            
+            query = f"""
             SELECT 
                 id,
                 avis_cleaned as avis,
                 langue_detected as langue,
                 banque,
-                ville
-            FROM int_reviews_deduplicated 
-            WHERE should_keep = true 
-                AND avis_cleaned IS NOT NULL 
-                AND trim(avis_cleaned) != ''
-                AND length(avis_cleaned) >= 10
+                ville,
+                {is_new} as is_new
+            FROM int_reviews_deduplicated r
+            WHERE {REVIEWS_FILTER_SQL}
+                {f"AND {is_new}" if only_new else ""}
             ORDER BY id
             """
             
             df = pd.read_sql(query, self.connection)
-            logger.info(f"[DATA] {len(df)} avis récupérés pour l'analyse LDA")
+            logger.info(f"[DATA] {len(df)} avis récupérés pour l'analyse LDA ({int(df['is_new'].sum())} sans topic)")
             return df
             
         except Exception as e:
@@ -108,106 +263,417 @@ class LDATopicExtractor:
     
     def preprocess_text(self, text, language='fr'):
         """Préprocesser le texte pour LDA"""
-        if pd.isna(text) or text.strip() == '':
-            return ""
-        
-        # Nettoyer le texte
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        text = re.sub(r'\d+', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Tokenisation
-        tokens = word_tokenize(text, language='french')
-        
-        # Supprimer les mots vides
-        if language == 'fr':
-            stop_words = set(stopwords.words('french')) | set(self.custom_stopwords['fr'])
-            stemmer = self.stemmer_fr
-        elif language == 'ar':
-            stop_words = set(stopwords.words('arabic')) | set(self.custom_stopwords['ar'])
-            stemmer = self.stemmer_ar
+        return self.preprocessor.preprocess_text(text, language)
+    
+    def preprocess_texts(self, texts, language):
+        """Préprocesser une série de textes (pool de processus si workers > 1)"""
+        if self.workers > 1 and len(texts) > self.chunk_size:
+            return self.preprocessor.preprocess_parallel(
+                texts, language, workers=self.workers, chunk_size=self.chunk_size
+            )
+        return self.preprocessor.preprocess_batch(texts, language)
+    
+    def preprocess_reviews(self, df_lang, language):
+        """Préprocesser les avis d'une langue et écarter les textes trop courts"""
+        logger.info(f"[LDA] Préprocessing de {len(df_lang)} textes...")
+        df_lang = df_lang.copy()
+        start = time.perf_counter()
+        df_lang['processed_text'] = self.preprocess_texts(df_lang['avis'], language)
+        if self.workers > 1 and len(df_lang) > self.chunk_size:
+            logger.info(f"[PREPROCESS] {self.workers} processus, morceaux de {self.chunk_size} textes")
         else:
-            stop_words = set(stopwords.words('french')) | set(self.custom_stopwords['fr'])
-            stemmer = self.stemmer_fr
-        
-        # Filtrer et stemmer
-        processed_tokens = []
-        for token in tokens:
-            if (len(token) > 2 and 
-                token not in stop_words and 
-                token.isalpha()):
-                try:
-                    stemmed = stemmer.stem(token)
-                    processed_tokens.append(stemmed)
-                except:
-                    processed_tokens.append(token)
-        
-        return ' '.join(processed_tokens)
-    
-    def perform_lda_analysis(self, df, n_topics=8, language='fr'):
-        """Effectuer l'analyse LDA"""
-        logger.info(f"[LDA] Début analyse pour {language} avec {n_topics} topics")
+            self.preprocessor.log_cache_stats()
+        logger.info(f"[PREPROCESS] {len(df_lang)} textes en {time.perf_counter() - start:.2f}s")
         
-        # Filtrer par langue
-        df_lang = df[df['langue'] == language].copy()
-        
-        if len(df_lang) < 10:
-            logger.warning(f"[LDA] Pas assez de données pour {language}: {len(df_lang)} avis")
-            return None, None, None
+        # Filtrer les textes vides après preprocessing
+        return df_lang[df_lang['processed_text'].str.len() > MIN_PROCESSED_LENGTH]
+    
+    def assign_topics(self, df_lang, vectorizer, lda_model, topic_names, tfidf_matrix=None):
+        """Topic dominant et probabilité de chaque avis préprocessé (matrice TF-IDF recalculée si absente)
         
-        # Préprocesser les textes
-        logger.info(f"[LDA] Préprocessing de {len(df_lang)} textes...")
-        df_lang['processed_text'] = df_lang['avis'].apply(
-            lambda x: self.preprocess_text(x, language)
+        Les top_k topics de chaque avis et leurs poids sont ajoutés à
+        topic_weights_parts, sauvegardés avec les topics dominants.
+        """
+        if tfidf_matrix is None:
+            tfidf_matrix = vectorizer.transform(df_lang['processed_text'])
+        topic_distributions = lda_model.transform(tfidf_matrix).astype(np.float32)
+        self.topic_weights_parts.append(
+            self.topic_weights(df_lang['id'].to_numpy(), topic_distributions, topic_names)
         )
         
-        # Filtrer les textes vides après preprocessing
-        df_lang = df_lang[df_lang['processed_text'].str.len() > 5]
+        df_lang = df_lang.copy()
+        df_lang['topic_id'] = np.argmax(topic_distributions, axis=1)
+        df_lang['topic_probability'] = np.max(topic_distributions, axis=1)
+        df_lang['topic_name'] = df_lang['topic_id'].map(topic_names)
+        return df_lang[['id', 'topic_id', 'topic_name', 'topic_probability']]
+    
+    def topic_weights(self, ids, topic_distributions, topic_names):
+        """Format long des top_k topics par avis (id, rang, topic, nom, poids)
         
-        if len(df_lang) < 10:
-            logger.warning(f"[LDA] Pas assez de textes valides après preprocessing: {len(df_lang)}")
-            return None, None, None
+        Les poids inférieurs à min_topic_weight sont ignorés, sauf le topic
+        dominant (rang 1) qui est toujours conservé.
+        """
+        n_documents, n_topics = topic_distributions.shape
+        top_k = n_topics if self.top_k <= 0 else min(self.top_k, n_topics)
+        
+        top_topics = np.argsort(-topic_distributions, axis=1, kind='stable')[:, :top_k]
+        top_weights = np.take_along_axis(topic_distributions, top_topics, axis=1)
+        ranks = np.tile(np.arange(1, top_k + 1, dtype=np.int16), n_documents)
+        
+        weights = pd.DataFrame({
+            'id': np.repeat(ids, top_k),
+            'topic_rank': ranks,
+            'topic_id': top_topics.ravel().astype(np.int16),
+            'topic_weight': top_weights.ravel(),
+        })
+        weights = weights[(weights['topic_rank'] == 1) | (weights['topic_weight'] >= self.min_topic_weight)]
+        weights.insert(3, 'topic_name', weights['topic_id'].map(topic_names))
+        return weights
+    
+    def feature_settings(self, language):
+        """Paramètres qui déterminent les textes préprocessés et la matrice TF-IDF (clé du cache)"""
+        import nltk
+        
+        return {
+            'language': language,
+            'stopwords': sorted(self.preprocessor.stopwords_for(language)),
+            'min_token_length': MIN_TOKEN_LENGTH,
+            'min_processed_length': MIN_PROCESSED_LENGTH,
+            'nltk_version': nltk.__version__,
+            'tfidf': {
+                'max_features': TFIDF_MAX_FEATURES,
+                'min_df': TFIDF_MIN_DF,
+                'max_df': TFIDF_MAX_DF,
+                'ngram_range': list(TFIDF_NGRAM_RANGE),
+            },
+        }
+    
+    def vectorize_reviews(self, df_lang, language, min_documents=10):
+        """Textes préprocessés, vectoriseur TF-IDF ajusté et matrice d'une langue
+        
+        Retourne (df_lang filtré avec id et processed_text, vectoriseur,
+        matrice), ou (df_lang, None, None) s'il reste moins de min_documents
+        textes. Le résultat est lu dans le cache disque si le même corpus a
+        déjà été traité avec les mêmes paramètres.
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        cache_key = None
+        if self.feature_cache is not None:
+            start = time.perf_counter()
+            cache_key = corpus_fingerprint(df_lang['id'], df_lang['avis'], self.feature_settings(language))
+            cached = self.feature_cache.load(cache_key)
+            if cached is not None:
+                processed, tfidf_matrix, vectorizer = cached
+                logger.info(f"[CACHE] Préprocessing et vectorisation {language} évités "
+                            f"({time.perf_counter() - start:.2f}s)")
+                return processed, vectorizer, tfidf_matrix
+        
+        df_lang = self.preprocess_reviews(df_lang, language)
+        if len(df_lang) < min_documents:
+            return df_lang, None, None
         
         # Vectorisation
         logger.info("[LDA] Vectorisation TF-IDF...")
         vectorizer = TfidfVectorizer(
-            max_features=1000,
-            min_df=2,
-            max_df=0.8,
-            ngram_range=(1, 2),
+            max_features=TFIDF_MAX_FEATURES,
+            min_df=TFIDF_MIN_DF,
+            max_df=TFIDF_MAX_DF,
+            ngram_range=TFIDF_NGRAM_RANGE,
             stop_words=None  # Déjà traité
         )
-        
         tfidf_matrix = vectorizer.fit_transform(df_lang['processed_text'])
         
+        if cache_key is not None:
+            processed = df_lang[['id', 'processed_text']].reset_index(drop=True)
+            self.feature_cache.save(cache_key, processed, tfidf_matrix, vectorizer,
+                                    description=f"{language}, {len(processed)} avis")
+        return df_lang, vectorizer, tfidf_matrix
+    
+    def perform_lda_analysis(self, df, n_topics=8, language='fr', save_model=True):
+        """Effectuer l'analyse LDA (entraînement complet) et enregistrer le modèle"""
+        from sklearn.decomposition import LatentDirichletAllocation
+        
+        logger.info(f"[LDA] Début analyse pour {language} avec {n_topics} topics")
+        
+        # Filtrer par langue
+        df_lang = df[df['langue'] == language]
+        
+        if len(df_lang) < 10:
+            logger.warning(f"[LDA] Pas assez de données pour {language}: {len(df_lang)} avis")
+            return None, None, None
+        
+        # Préprocesser les textes et vectoriser (ou relire le cache)
+        df_lang, vectorizer, tfidf_matrix = self.vectorize_reviews(df_lang, language)
+        
+        if vectorizer is None:
+            logger.warning(f"[LDA] Pas assez de textes valides après preprocessing: {len(df_lang)}")
+            return None, None, None
+        
         # Modèle LDA
         logger.info(f"[LDA] Entraînement du modèle LDA...")
         lda_model = LatentDirichletAllocation(
             n_components=n_topics,
             random_state=42,
-            max_iter=10,
+            max_iter=LDA_MAX_ITER,
             learning_method='online',
             learning_offset=50.0
         )
         
         lda_model.fit(tfidf_matrix)
         
-        # Prédiction des topics pour chaque document
-        topic_distributions = lda_model.transform(tfidf_matrix)
-        dominant_topics = np.argmax(topic_distributions, axis=1)
-        
-        # Ajouter les topics au DataFrame
-        df_lang['topic_id'] = dominant_topics
-        df_lang['topic_probability'] = np.max(topic_distributions, axis=1)
-        
         # Noms des topics basés sur les mots-clés principaux
         feature_names = vectorizer.get_feature_names_out()
         topic_names = self.get_topic_names(lda_model, feature_names, language)
         
-        df_lang['topic_name'] = df_lang['topic_id'].map(topic_names)
+        # Prédiction des topics pour chaque document
+        topics_df = self.assign_topics(df_lang, vectorizer, lda_model, topic_names, tfidf_matrix)
+        topics_df = self.add_untopiced_reviews(topics_df, df[df['langue'] == language]['id'])
+        
+        if save_model:
+            training_vocabulary = set(df_lang['processed_text'].str.split().explode().dropna())
+            self.model_store.save(language, vectorizer, lda_model, topic_names, training_vocabulary, len(df_lang))
         
         logger.info(f"[LDA] Analyse terminée pour {language}")
-        return df_lang[['id', 'topic_id', 'topic_name', 'topic_probability']], lda_model, topic_names
+        return topics_df, lda_model, topic_names
+    
+    def iter_review_batches(self, language):
+        """Lire les avis d'une langue par lots via un curseur nommé (côté serveur)
+        
+        Retourne des DataFrames (id, avis) de stream_batch_size lignes au plus:
+        seul le lot courant est en mémoire côté client.
+        """
+        query = f"""
+        SELECT id, avis_cleaned as avis
+        FROM int_reviews_deduplicated
+        WHERE {REVIEWS_FILTER_SQL}
+            AND langue_detected = %s
+        ORDER BY id
+        """
+        try:
+            with database.server_side_cursor(self.connection, f"lda_stream_{language}",
+                                             itersize=self.stream_batch_size) as cursor:
+                cursor.execute(query, (language,))
+                while True:
+                    rows = cursor.fetchmany(self.stream_batch_size)
+                    if not rows:
+                        break
+                    yield pd.DataFrame(rows, columns=['id', 'avis'])
+        finally:
+            # Fin de la transaction de lecture (le curseur nommé en dépend)
+            self.connection.rollback()
+    
+    def build_stream_vocabulary(self, batch_files):
+        """Vocabulaire fixe et IDF calculés sur les lots préprocessés (mêmes règles que TfidfVectorizer)
+        
+        Les fréquences des n-grammes sont comptées lot par lot. Si plus de
+        STREAM_MAX_TRACKED_NGRAMS n-grammes sont suivis, ceux présents dans un
+        seul avis sont oubliés: ils ne pourraient de toute façon pas passer
+        le seuil min_df sans réapparaître souvent.
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        analyzer = TfidfVectorizer(ngram_range=TFIDF_NGRAM_RANGE).build_analyzer()
+        term_counts = Counter()
+        doc_counts = Counter()
+        n_documents = 0
+        
+        for batch_file in batch_files:
+            for text in pd.read_pickle(batch_file)['processed_text']:
+                ngrams = analyzer(text)
+                term_counts.update(ngrams)
+                doc_counts.update(set(ngrams))
+                n_documents += 1
+            
+            if len(doc_counts) > STREAM_MAX_TRACKED_NGRAMS:
+                rare = [ngram for ngram, count in doc_counts.items() if count == 1]
+                for ngram in rare:
+                    del doc_counts[ngram]
+                    del term_counts[ngram]
+                logger.info(f"[STREAM] {len(rare)} n-grammes rares oubliés ({len(doc_counts)} suivis)")
+        
+        max_doc_count = TFIDF_MAX_DF * n_documents
+        candidates = [ngram for ngram, count in doc_counts.items() if TFIDF_MIN_DF <= count <= max_doc_count]
+        candidates.sort(key=lambda ngram: (-term_counts[ngram], ngram))
+        vocabulary = sorted(candidates[:TFIDF_MAX_FEATURES])
+        
+        # IDF lissé de scikit-learn: ln((1 + n) / (1 + df)) + 1
+        idf = np.array([np.log((1 + n_documents) / (1 + doc_counts[ngram])) + 1 for ngram in vocabulary])
+        training_vocabulary = {ngram for ngram in doc_counts if ' ' not in ngram}
+        return vocabulary, idf, training_vocabulary, n_documents
+    
+    def stream_lda_analysis(self, language, n_topics=8, save_model=True):
+        """Entraîner le LDA d'une langue en flux (mémoire bornée par la taille des lots)
+        
+        1. lecture par lots via le curseur serveur, préprocessing et écriture
+           des textes préprocessés dans un dossier temporaire;
+        2. vocabulaire fixe et IDF calculés sur ces lots;
+        3. LDA en ligne par partial_fit, LDA_MAX_ITER passes sur les lots;
+        4. attribution des topics lot par lot.
+        """
+        from sklearn.decomposition import LatentDirichletAllocation
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
+        logger.info(f"[STREAM] Début analyse en flux pour {language} avec {n_topics} topics "
+                    f"(lots de {self.stream_batch_size} avis)")
+        start = time.perf_counter()
+        
+        with tempfile.TemporaryDirectory(prefix=f"lda_stream_{language}_") as spool_dir:
+            batch_files = []
+            read_ids = []
+            n_read = 0
+            for batch in self.iter_review_batches(language):
+                n_read += len(batch)
+                read_ids.append(batch['id'])
+                batch['processed_text'] = self.preprocess_texts(batch['avis'], language)
+                batch = batch[batch['processed_text'].str.len() > MIN_PROCESSED_LENGTH][['id', 'processed_text']]
+                if len(batch) == 0:
+                    continue
+                batch_file = os.path.join(spool_dir, f"batch_{len(batch_files):06d}.pkl")
+                batch.to_pickle(batch_file)
+                batch_files.append(batch_file)
+            logger.info(f"[STREAM] {n_read} avis {language} lus et préprocessés en {len(batch_files)} lots "
+                        f"({time.perf_counter() - start:.2f}s)")
+            
+            vocabulary, idf, training_vocabulary, n_documents = self.build_stream_vocabulary(batch_files)
+            if n_documents < MIN_REVIEWS_PER_LANGUAGE or len(vocabulary) == 0:
+                logger.warning(f"[STREAM] Pas assez de textes valides pour {language}: {n_documents}")
+                return None, None, None
+            
+            vectorizer = TfidfVectorizer(vocabulary=vocabulary, ngram_range=TFIDF_NGRAM_RANGE)
+            vectorizer.idf_ = idf
+            logger.info(f"[STREAM] Vocabulaire fixe de {len(vocabulary)} termes sur {n_documents} avis")
+            
+            lda_model = LatentDirichletAllocation(
+                n_components=n_topics,
+                random_state=42,
+                learning_method='online',
+                learning_offset=50.0,
+                total_samples=n_documents
+            )
+            for iteration in range(LDA_MAX_ITER):
+                for batch_file in batch_files:
+                    batch = pd.read_pickle(batch_file)
+                    lda_model.partial_fit(vectorizer.transform(batch['processed_text']))
+            logger.info(f"[STREAM] Modèle LDA entraîné ({LDA_MAX_ITER} passes, "
+                        f"{time.perf_counter() - start:.2f}s)")
+            
+            topic_names = self.get_topic_names(lda_model, vectorizer.get_feature_names_out(), language)
+            topics_df = pd.concat(
+                [self.assign_topics(pd.read_pickle(batch_file), vectorizer, lda_model, topic_names)
+                 for batch_file in batch_files],
+                ignore_index=True
+            )
+            topics_df = self.add_untopiced_reviews(topics_df, pd.concat(read_ids, ignore_index=True))
+        
+        if save_model:
+            self.model_store.save(language, vectorizer, lda_model, topic_names, training_vocabulary, n_documents)
+        
+        logger.info(f"[STREAM] Analyse terminée pour {language} en {time.perf_counter() - start:.2f}s")
+        return topics_df, lda_model, topic_names
+    
+    def select_lda_analysis(self, df, language='fr'):
+        """Choisir le nombre de topics et les hyperparamètres d'une langue, puis enregistrer le meilleur modèle
+        
+        Le corpus est vectorisé une seule fois; les candidats sont évalués en
+        parallèle (workers processus) sur la même matrice, puis le meilleur est
+        réentraîné sur tous les avis.
+        """
+        df_lang = df[df['langue'] == language]
+        if len(df_lang) < MIN_REVIEWS_PER_LANGUAGE:
+            logger.warning(f"[SELECT] Pas assez de données pour {language}: {len(df_lang)} avis")
+            return None, None, None
+        
+        df_lang, vectorizer, tfidf_matrix = self.vectorize_reviews(df_lang, language, MIN_REVIEWS_PER_LANGUAGE)
+        if vectorizer is None:
+            logger.warning(f"[SELECT] Pas assez de textes valides après preprocessing: {len(df_lang)}")
+            return None, None, None
+        
+        results = topic_model_selection.run_sweep(tfidf_matrix, self.selection_grid, workers=self.workers)
+        best = topic_model_selection.best_candidate(results, self.selection_metric)
+        self.write_selection_report(language, results, best)
+        logger.info(f"[SELECT] Meilleur candidat {language} ({self.selection_metric}): "
+                    f"{best['n_topics']} topics, max_iter={best['max_iter']}, decay={best['learning_decay']}")
+        
+        # Réentraînement du meilleur candidat sur tous les avis
+        params = {key: best[key] for key in ('n_topics', 'max_iter', 'learning_decay')}
+        lda_model = topic_model_selection.build_lda(params)
+        lda_model.fit(tfidf_matrix)
+        
+        topic_names = self.get_topic_names(lda_model, vectorizer.get_feature_names_out(), language)
+        topics_df = self.assign_topics(df_lang, vectorizer, lda_model, topic_names, tfidf_matrix)
+        topics_df = self.add_untopiced_reviews(topics_df, df[df['langue'] == language]['id'])
+        
+        training_vocabulary = set(df_lang['processed_text'].str.split().explode().dropna())
+        self.model_store.save(
+            language, vectorizer, lda_model, topic_names, training_vocabulary, len(df_lang),
+            extra_metadata={
+                **params,
+                'selection_metric': self.selection_metric,
+                'perplexity': best['perplexity'],
+                'coherence': best['coherence'],
+            }
+        )
+        return topics_df, lda_model, topic_names
+    
+    def write_selection_report(self, language, results, best):
+        """Sauvegarder les métriques de tous les candidats d'une langue (CSV dans logs/)"""
+        report_df = pd.DataFrame(results)
+        report_df['language'] = language
+        report_df['selected'] = [result is best for result in results]
+        
+        os.makedirs(LOGS_DIR, exist_ok=True)
+        report_path = os.path.join(LOGS_DIR, f"lda_model_selection_{language}_{datetime.now():%Y%m%d_%H%M%S}.csv")
+        report_df.to_csv(report_path, index=False, encoding='utf-8')
+        logger.info(f"[SELECT] Rapport sauvegardé: {report_path}")
+    
+    def infer_topics(self, df_new, language, bundle):
+        """Attribuer les topics des nouveaux avis avec un modèle enregistré (transform seulement)"""
+        processed = self.preprocess_reviews(df_new, language)
+        if len(processed) == 0:
+            return self.add_untopiced_reviews(pd.DataFrame(columns=TOPIC_COLUMNS), df_new['id'])
+        
+        topics_df = self.assign_topics(processed, bundle['vectorizer'], bundle['lda_model'], bundle['topic_names'])
+        logger.info(f"[INFER] {len(topics_df)} avis {language} classés avec le modèle "
+                    f"{bundle['metadata']['version']}")
+        return self.add_untopiced_reviews(topics_df, df_new['id'])
+    
+    def add_untopiced_reviews(self, topics_df, review_ids):
+        """Ajouter une ligne sans topic (topic_id, topic_name et topic_probability NULL) pour chaque avis
+        de review_ids absent de topics_df, c'est-à-dire écarté par le préprocessing
+        
+        Ces avis ont ainsi une ligne dans temp_review_topics: le mode infer ne
+        les relit pas à chaque run, et le mart leur attribue le topic par défaut.
+        """
+        missing = review_ids[~review_ids.isin(topics_df['id'])]
+        if len(missing) == 0:
+            return topics_df
+        logger.info(f"[LDA] {len(missing)} avis sans topic (textes trop courts après preprocessing)")
+        untopiced = pd.DataFrame({
+            'id': missing.to_numpy(),
+            'topic_id': pd.array([pd.NA] * len(missing), dtype='Int64'),
+            'topic_name': None,
+            'topic_probability': np.nan,
+        })
+        return pd.concat([topics_df, untopiced], ignore_index=True)
+    
+    def retrain_reason(self, df_new, language, bundle):
+        """Raison de réentraîner le modèle d'une langue (None si le modèle reste valable)"""
+        if bundle is None:
+            return "aucun modèle enregistré"
+        
+        age_days = self.model_store.model_age_days(language)
+        if age_days is not None and age_days >= self.max_model_age_days:
+            return f"modèle de {age_days:.0f} jours (maximum {self.max_model_age_days})"
+        
+        if len(df_new) > 0:
+            processed = self.preprocess_reviews(df_new, language)['processed_text']
+            share = unseen_vocabulary_share(processed, bundle['training_vocabulary'])
+            logger.info(f"[RETRAIN] Vocabulaire inconnu {language}: {share:.1%} des mots des nouveaux avis")
+            if share > self.unseen_threshold:
+                return f"{share:.1%} de vocabulaire inconnu (seuil {self.unseen_threshold:.0%})"
+        
+        return None
     
     def get_topic_names(self, lda_model, feature_names, language, n_words=5):
         """Générer des noms de topics basés sur les mots-clés principaux"""
@@ -265,50 +731,235 @@ class LDATopicExtractor:
         
         return topic_names
     
-    def save_topics_to_db(self, topics_df):
-        """Sauvegarder les topics dans une table temporaire"""
+    def copy_dataframe(self, cursor, df, table, columns):
+        """Charger les colonnes d'un DataFrame dans une table avec COPY (format CSV)"""
+        buffer = io.StringIO()
+        df[columns].to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    
+    def prepare_topic_rows(self, topics_df, weights_df):
+        """Topics dominants et poids prêts à charger (un id présent plusieurs fois garde sa dernière valeur)"""
+        rows = topics_df[TOPIC_COLUMNS].drop_duplicates('id', keep='last')
+        rows = rows.astype({'id': int, 'topic_id': 'Int64', 'topic_probability': float})
+        
+        if weights_df is None:
+            weights_df = pd.DataFrame(columns=TOPIC_WEIGHT_COLUMNS)
+        weights_df = weights_df.drop_duplicates(['id', 'topic_rank'], keep='last')
+        return rows, weights_df[TOPIC_WEIGHT_COLUMNS]
+    
+    def save_topics_to_db(self, topics_df, weights_df=None):
+        """Sauvegarder les topics dans temp_review_topics et review_topic_weights (COPY puis échange)
+        
+        Les résultats sont chargés par COPY dans des tables fantômes
+        (<table>_shadow), dont la clé primaire et les index sont construits
+        après le chargement. Les tables fantômes remplacent ensuite les tables
+        lues par dbt par renommage dans une seule transaction: les lecteurs
+        (mart_reviews_enriched) voient toujours les anciennes tables complètes
+        ou les nouvelles, jamais une table absente ou à moitié remplie.
+        """
         if topics_df is None or len(topics_df) == 0:
             logger.warning("[SAVE] Aucun topic à sauvegarder")
             return False
         
         try:
+            start = time.perf_counter()
             cursor = self.connection.cursor()
+            rows, weights = self.prepare_topic_rows(topics_df, weights_df)
+            
+            # Tables fantômes chargées sans index, puis indexées
+            for table, (data, columns) in zip(TOPIC_TABLES, [(rows, TOPIC_COLUMNS), (weights, TOPIC_WEIGHT_COLUMNS)]):
+                definition = TOPIC_TABLES[table]
+                shadow = f"{table}_shadow"
+                cursor.execute(f"""
+                    DROP TABLE IF EXISTS {shadow};
+                    CREATE TABLE {shadow} ({definition['columns']});
+                """)
+                self.copy_dataframe(cursor, data, shadow, columns)
+                cursor.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {shadow}_pkey "
+                               f"PRIMARY KEY ({', '.join(definition['primary_key'])});")
+                for suffix, index_columns in definition['indexes'].items():
+                    cursor.execute(f"CREATE INDEX {shadow}_{suffix} ON {shadow} ({', '.join(index_columns)});")
+                cursor.execute(f"ANALYZE {shadow};")
+            self.connection.commit()
+            logger.info(f"[SAVE] {len(rows)} topics et {len(weights)} poids chargés dans les tables fantômes "
+                        f"en {time.perf_counter() - start:.2f}s")
+            
+            # Échange atomique: anciennes tables supprimées, contraintes et index renommés
+            cursor.execute(f"SET LOCAL lock_timeout = '{TOPICS_SWAP_LOCK_TIMEOUT}';")
+            for table, definition in TOPIC_TABLES.items():
+                shadow, old = f"{table}_shadow", f"{table}_old"
+                cursor.execute(f"""
+                    DROP TABLE IF EXISTS {old};
+                    ALTER TABLE IF EXISTS {table} RENAME TO {old};
+                    ALTER TABLE {shadow} RENAME TO {table};
+                    DROP TABLE IF EXISTS {old};
+                    ALTER TABLE {table} RENAME CONSTRAINT {shadow}_pkey TO {table}_pkey;
+                """)
+                for suffix in definition['indexes']:
+                    cursor.execute(f"ALTER INDEX {shadow}_{suffix} RENAME TO {table}_{suffix};")
+            self.connection.commit()
+            cursor.close()
+            
+            logger.info(f"[SAVE] {len(rows)} topics sauvegardés dans {TOPICS_TABLE}, {len(weights)} poids dans "
+                        f"{TOPIC_WEIGHTS_TABLE} (échange atomique, {time.perf_counter() - start:.2f}s)")
+            return True
             
-            # Créer/recréer la table des topics
-            cursor.execute("""
-                DROP TABLE IF EXISTS temp_review_topics;
-                CREATE TABLE temp_review_topics (
-                    id INTEGER PRIMARY KEY,
-                    topic_id INTEGER,
-                    topic_name TEXT,
-                    topic_probability DECIMAL(4,3)
+        except Exception as e:
+            logger.error(f"[SAVE] Erreur lors de la sauvegarde: {e}")
+            self.connection.rollback()
+            return False
+    
+    def upsert_topics_to_db(self, topics_df, weights_df=None, retrained_languages=()):
+        """Ajouter ou mettre à jour des topics dans temp_review_topics et review_topic_weights (modes infer et retrain)
+        
+        Les lignes sont chargées par COPY dans des tables temporaires puis
+        fusionnées dans une seule transaction: les lecteurs voient les tables
+        avant ou après la fusion. Les poids des avis concernés sont remplacés.
+        Sans table de topics existante, on passe par l'échange complet.
+        
+        retrained_languages: langues dont le modèle vient d'être réentraîné sur
+        tous leurs avis. Les lignes absentes de ce réentraînement (avis supprimés,
+        écartés par REVIEWS_FILTER_SQL ou passés dans une langue réentraînée)
+        sont supprimées au lieu de garder leur ancien topic; seules restent
+        celles des avis actuels des autres langues.
+        """
+        if topics_df is None or len(topics_df) == 0:
+            logger.info("[SAVE] Aucun nouveau topic à sauvegarder")
+            return True
+        
+        if not self.topics_table_exists():
+            return self.save_topics_to_db(topics_df, weights_df)
+        
+        try:
+            start = time.perf_counter()
+            cursor = self.connection.cursor()
+            rows, weights = self.prepare_topic_rows(topics_df, weights_df)
+            
+            weights_definition = TOPIC_TABLES[TOPIC_WEIGHTS_TABLE]
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {TOPIC_WEIGHTS_TABLE} (
+                    {weights_definition['columns']},
+                    PRIMARY KEY ({', '.join(weights_definition['primary_key'])})
                 );
+                CREATE INDEX IF NOT EXISTS {TOPIC_WEIGHTS_TABLE}_topic_name_idx ON {TOPIC_WEIGHTS_TABLE} (topic_name);
+                ALTER TABLE {TOPICS_TABLE} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+                CREATE INDEX IF NOT EXISTS {TOPICS_TABLE}_updated_at_idx ON {TOPICS_TABLE} (updated_at);
+                CREATE TEMP TABLE topics_upsert (LIKE {TOPICS_TABLE} INCLUDING DEFAULTS) ON COMMIT DROP;
+                CREATE TEMP TABLE topic_weights_upsert (LIKE {TOPIC_WEIGHTS_TABLE} INCLUDING DEFAULTS) ON COMMIT DROP;
+            """)
+            self.copy_dataframe(cursor, rows, 'topics_upsert', TOPIC_COLUMNS)
+            self.copy_dataframe(cursor, weights, 'topic_weights_upsert', TOPIC_WEIGHT_COLUMNS)
+            cursor.execute(f"""
+                INSERT INTO {TOPICS_TABLE} (id, topic_id, topic_name, topic_probability)
+                SELECT id, topic_id, topic_name, topic_probability FROM topics_upsert
+                ON CONFLICT (id) DO UPDATE SET
+                    topic_id = EXCLUDED.topic_id,
+                    topic_name = EXCLUDED.topic_name,
+                    topic_probability = EXCLUDED.topic_probability,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE ({TOPICS_TABLE}.topic_id, {TOPICS_TABLE}.topic_name, {TOPICS_TABLE}.topic_probability)
+                    IS DISTINCT FROM (EXCLUDED.topic_id, EXCLUDED.topic_name, EXCLUDED.topic_probability);
+                
+                DELETE FROM {TOPIC_WEIGHTS_TABLE} w USING topics_upsert u WHERE w.id = u.id;
+                INSERT INTO {TOPIC_WEIGHTS_TABLE} ({', '.join(TOPIC_WEIGHT_COLUMNS)})
+                SELECT {', '.join(TOPIC_WEIGHT_COLUMNS)} FROM topic_weights_upsert;
             """)
             
-            # Insérer les données
-            for _, row in topics_df.iterrows():
-                cursor.execute("""
-                    INSERT INTO temp_review_topics (id, topic_id, topic_name, topic_probability)
-                    VALUES (%s, %s, %s, %s)
-                    ON CONFLICT (id) DO UPDATE SET
-                        topic_id = EXCLUDED.topic_id,
-                        topic_name = EXCLUDED.topic_name,
-                        topic_probability = EXCLUDED.topic_probability
-                """, (
-                    int(row['id']),
-                    int(row['topic_id']),
-                    str(row['topic_name']),
-                    float(row['topic_probability'])
-                ))
-            
+            stale = 0
+            if retrained_languages:
+                cursor.execute(f"""
+                    DELETE FROM {TOPICS_TABLE} t
+                    WHERE NOT EXISTS (SELECT 1 FROM topics_upsert u WHERE u.id = t.id)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM int_reviews_deduplicated r
+                          WHERE r.id = t.id AND {REVIEWS_FILTER_SQL}
+                            AND r.langue_detected <> ALL(%s)
+                      );
+                """, (list(retrained_languages),))
+                stale = cursor.rowcount
+                cursor.execute(f"""
+                    DELETE FROM {TOPIC_WEIGHTS_TABLE} w
+                    WHERE NOT EXISTS (SELECT 1 FROM {TOPICS_TABLE} t WHERE t.id = w.id);
+                """)
             self.connection.commit()
-            logger.info(f"[SAVE] {len(topics_df)} topics sauvegardés dans temp_review_topics")
+            cursor.close()
+            
+            logger.info(f"[SAVE] {len(rows)} topics et {len(weights)} poids ajoutés ou mis à jour, "
+                        f"{stale} topics obsolètes supprimés en {time.perf_counter() - start:.2f}s")
             return True
             
         except Exception as e:
-            logger.error(f"[SAVE] Erreur lors de la sauvegarde: {e}")
+            logger.error(f"[SAVE] Erreur lors de la fusion des topics: {e}")
+            self.connection.rollback()
             return False
     
+    def combined_topic_weights(self):
+        """Poids des topics de tout le run (None si aucun)"""
+        if not self.topic_weights_parts:
+            return None
+        return pd.concat(self.topic_weights_parts, ignore_index=True)
+    
+    def log_topics(self, language, topics_df, topic_names):
+        """Afficher les topics d'une langue et leur nombre d'avis"""
+        logger.info(f"[TOPICS-{language.upper()}] Topics identifiés:")
+        counts = topics_df['topic_id'].value_counts()
+        for topic_id, name in topic_names.items():
+            logger.info(f"   Topic {topic_id}: {name} ({int(counts.get(topic_id, 0))} avis)")
+    
+    def train_language(self, df, language):
+        """Entraîner le modèle d'une langue (en mémoire ou en flux) et retourner ses topics"""
+        if self.streaming:
+            topics_df, model, topic_names = self.stream_lda_analysis(language)
+        elif len(df[df['langue'] == language]) < MIN_REVIEWS_PER_LANGUAGE:  # Minimum pour LDA
+            return None
+        else:
+            topics_df, model, topic_names = self.perform_lda_analysis(df, language=language)
+        
+        if topics_df is not None:
+            self.log_topics(language, topics_df, topic_names)
+        return topics_df
+    
+    def run_language(self, df, language):
+        """Topics d'une langue selon le mode (None si rien à écrire)"""
+        if self.mode == 'full':
+            logger.info(f"[LANG] Analyse {language}")
+            return self.train_language(df, language)
+        
+        if self.mode == 'select':
+            logger.info(f"[LANG] Sélection du modèle {language}")
+            topics_df, model, topic_names = self.select_lda_analysis(df, language)
+            if topics_df is not None:
+                self.log_topics(language, topics_df, topic_names)
+            return topics_df
+        
+        df_lang = df[df['langue'] == language]
+        df_new = df_lang[df_lang['is_new']]
+        logger.info(f"[LANG] Analyse {language}: {len(df_lang)} avis ({len(df_new)} nouveaux)")
+        
+        bundle = self.model_store.load(language)
+        
+        if self.mode == 'retrain':
+            reason = self.retrain_reason(df_new, language, bundle)
+            if reason is not None:
+                if not self.streaming and len(df_lang) < MIN_REVIEWS_PER_LANGUAGE:
+                    logger.warning(f"[RETRAIN] {language}: {reason}, mais pas assez d'avis pour réentraîner")
+                else:
+                    logger.info(f"[RETRAIN] Réentraînement {language}: {reason}")
+                    topics_df = self.train_language(df, language)
+                    if topics_df is not None:
+                        self.retrained_languages.append(language)
+                    return topics_df
+        
+        if bundle is None:
+            if self.mode == 'infer':
+                logger.warning(f"[INFER] Aucun modèle enregistré pour {language}: lancer le mode full ou retrain")
+            return None
+        if len(df_new) == 0:
+            logger.info(f"[INFER] Aucun nouvel avis {language}")
+            return None
+        return self.infer_topics(df_new, language, bundle)
+    
     def run_lda_analysis(self):
         """Lancer l'analyse LDA complète"""
         try:
@@ -318,36 +969,41 @@ class LDATopicExtractor:
             if not self.connect_db():
                 return False
             
-            # Récupérer les données
-            df = self.get_reviews_data()
-            if df is None or len(df) == 0:
-                logger.error("[ERROR] Aucune donnée récupérée")
-                return False
+            # Récupérer les données (en flux: seuls les nouveaux avis sont chargés en mémoire)
+            if self.streaming and self.mode == 'full':
+                df = None
+            else:
+                df = self.get_reviews_data(only_new=self.streaming)
+                if df is None or (len(df) == 0 and not self.streaming):
+                    logger.error("[ERROR] Aucune donnée récupérée")
+                    return False
             
             # Analyser par langue
+            logger.info(f"[MODE] {self.mode}")
             all_topics = []
+            self.topic_weights_parts = []
+            self.retrained_languages = []
             
-            for language in ['fr', 'ar']:
-                lang_count = len(df[df['langue'] == language])
-                logger.info(f"[LANG] Analyse {language}: {lang_count} avis")
-                
-                if lang_count >= 20:  # Minimum pour LDA
-                    topics_df, model, topic_names = self.perform_lda_analysis(df, language=language)
-                    if topics_df is not None:
-                        all_topics.append(topics_df)
-                        
-                        # Afficher les topics trouvés
-                        logger.info(f"[TOPICS-{language.upper()}] Topics identifiés:")
-                        for topic_id, name in topic_names.items():
-                            count = len(topics_df[topics_df['topic_id'] == topic_id])
-                            logger.info(f"   Topic {topic_id}: {name} ({count} avis)")
+            for language in LDA_LANGUAGES:
+                topics_df = self.run_language(df, language)
+                if topics_df is not None:
+                    all_topics.append(topics_df)
+            
+            # Modes infer / retrain: fusion des seuls avis concernés
+            if self.mode in ('infer', 'retrain'):
+                combined_topics = pd.concat(all_topics, ignore_index=True) if all_topics else None
+                if self.upsert_topics_to_db(combined_topics, self.combined_topic_weights(), self.retrained_languages):
+                    count = 0 if combined_topics is None else len(combined_topics)
+                    logger.info(f"[SUCCESS] {count} topics traités et sauvegardés")
+                    return True
+                return False
             
             # Combiner tous les topics
             if all_topics:
                 combined_topics = pd.concat(all_topics, ignore_index=True)
                 
                 # Sauvegarder en base
-                if self.save_topics_to_db(combined_topics):
+                if self.save_topics_to_db(combined_topics, self.combined_topic_weights()):
                     logger.info(f"[SUCCESS] {len(combined_topics)} topics traités et sauvegardés")
                     return True
             
@@ -360,16 +1016,83 @@ class LDATopicExtractor:
         
         finally:
             if self.connection:
-                self.connection.close()
-                logger.info("[DB] Connexion fermée")
+                database.release_connection(self.connection)
+                self.connection = None
+                logger.info("[DB] Connexion rendue au pool")
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Extraction de topics LDA sur les avis bancaires")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processus de préprocessing (défaut: 1, 0 = tous les cœurs)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f"Textes par morceau envoyé à un processus (défaut: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--mode', choices=LDA_MODES, default='full',
+                        help="full: réentraîner et réécrire tous les topics; infer: classer les nouveaux avis "
+                             "avec les modèles enregistrés; retrain: réentraîner si nécessaire, sinon infer")
+    parser.add_argument('--stream', action='store_true',
+                        help="Entraîner en flux (curseur serveur, vocabulaire fixe, partial_fit): mémoire bornée")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_STREAM_BATCH_SIZE,
+                        help=f"Mode --stream: avis lus par lot (défaut: {DEFAULT_STREAM_BATCH_SIZE})")
+    parser.add_argument('--topics', type=lambda value: [int(v) for v in value.split(',')],
+                        default=topic_model_selection.DEFAULT_TOPIC_COUNTS,
+                        help="Mode select: nombres de topics à comparer (défaut: 4,6,8,10,12)")
+    parser.add_argument('--max-iters', type=lambda value: [int(v) for v in value.split(',')],
+                        default=topic_model_selection.DEFAULT_MAX_ITERS,
+                        help="Mode select: valeurs de max_iter à comparer (défaut: 10)")
+    parser.add_argument('--learning-decays', type=lambda value: [float(v) for v in value.split(',')],
+                        default=topic_model_selection.DEFAULT_LEARNING_DECAYS,
+                        help="Mode select: valeurs de learning_decay à comparer (défaut: 0.7)")
+    parser.add_argument('--select-metric', choices=list(topic_model_selection.SELECTION_METRICS),
+                        default='coherence', help="Mode select: critère de choix du meilleur modèle (défaut: coherence)")
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                        help=f"Topics conservés par avis dans {TOPIC_WEIGHTS_TABLE} (défaut: {DEFAULT_TOP_K}, 0 = tous; "
+                             "avec --min-topic-weight 0: distribution complète)")
+    parser.add_argument('--min-topic-weight', type=float, default=DEFAULT_MIN_TOPIC_WEIGHT,
+                        help="Poids minimum d'un topic secondaire conservé "
+                             f"(défaut: {DEFAULT_MIN_TOPIC_WEIGHT}, le topic dominant est toujours gardé)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ne pas lire ni écrire le cache des textes préprocessés et matrices TF-IDF")
+    parser.add_argument('--cache-max-mb', type=float, default=DEFAULT_MAX_CACHE_MB,
+                        help=f"Taille maximum du cache en Mo (défaut: {DEFAULT_MAX_CACHE_MB})")
+    parser.add_argument('--cache-max-age-days', type=float, default=DEFAULT_MAX_CACHE_AGE_DAYS,
+                        help=f"Âge maximum d'une entrée du cache en jours (défaut: {DEFAULT_MAX_CACHE_AGE_DAYS})")
+    parser.add_argument('--max-model-age-days', type=float, default=DEFAULT_MAX_MODEL_AGE_DAYS,
+                        help=f"Mode retrain: âge maximum d'un modèle en jours (défaut: {DEFAULT_MAX_MODEL_AGE_DAYS})")
+    parser.add_argument('--unseen-threshold', type=float, default=DEFAULT_UNSEEN_THRESHOLD,
+                        help="Mode retrain: part de vocabulaire inconnu qui déclenche un réentraînement "
+                             f"(défaut: {DEFAULT_UNSEEN_THRESHOLD})")
+    args = parser.parse_args(argv)
+    if args.mode == 'select' and args.stream:
+        parser.error("--stream n'est pas disponible en mode select (matrice partagée en mémoire)")
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    return args
 
-def main():
+def main(argv=None):
     """Fonction principale"""
+    args = parse_args(argv)
+    setup_logging()
     print("=" * 80)
     print("EXTRACTION DE TOPICS AVEC LDA - PROJET morocco_banks_reviews")
     print("=" * 80)
     
-    extractor = LDATopicExtractor()
+    extractor = LDATopicExtractor(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        mode=args.mode,
+        max_model_age_days=args.max_model_age_days,
+        unseen_threshold=args.unseen_threshold,
+        streaming=args.stream,
+        stream_batch_size=args.batch_size,
+        selection_grid=topic_model_selection.candidate_grid(args.topics, args.max_iters, args.learning_decays),
+        selection_metric=args.select_metric,
+        use_cache=not args.no_cache,
+        cache_max_mb=args.cache_max_mb,
+        cache_max_age_days=args.cache_max_age_days,
+        top_k=args.top_k,
+        min_topic_weight=args.min_topic_weight
+    )
     
     if extractor.run_lda_analysis():
         print("\n✅ SUCCÈS: Analyse LDA terminée!")
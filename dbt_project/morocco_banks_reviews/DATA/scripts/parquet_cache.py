@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache colonnaire Parquet des jeux de données CSV du projet
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/parquet_cache.py
+
+Chaque CSV est converti une seule fois en Parquet (colonnes Banque, Ville et
+Nom Agence encodées en dictionnaire). La conversion est rejouée uniquement si
+l'empreinte SHA-256 du CSV source ou l'encodage de lecture a changé. Les lecteurs ouvrent ensuite le
+fichier Parquet en mémoire mappée et ne lisent que les colonnes utiles.
+"""
+
+import argparse
+import hashlib
+import logging
+import sys
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+# Configuration des chemins relatifs au projet dbt
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # Remonte à morocco_banks_reviews/
+DATA_RAW_DIR = os.path.join(SCRIPT_DIR, "..", "raw")
+PARQUET_DIR = os.path.join(SCRIPT_DIR, "..", "parquet")
+
+logger = logging.getLogger(__name__)
+
+# Jeux de données connus: CSV source et séparateur
+DATASETS = {
+    'raw': {
+        'path': os.path.join(DATA_RAW_DIR, "donnees_agences_avis.csv"),
+        'sep': ';',
+    },
+    'topics': {
+        'path': os.path.join(PROJECT_ROOT, "topics_exports", "dataset_complet_topics_categorises.csv"),
+        'sep': ',',
+    },
+}
+
+# Colonnes à forte répétition encodées en dictionnaire (noms CSV bruts et exportés)
+DICTIONARY_COLUMNS = ['Banque', 'Ville', 'Nom Agence', 'banque', 'ville', 'nom_agence']
+
+# Clés de métadonnées Parquet utilisées pour l'invalidation du cache
+SOURCE_HASH_KEY = b'source_sha256'
+SOURCE_ENCODING_KEY = b'source_encoding'
+SOURCE_FILE_KEY = b'source_file'
+
+HASH_BLOCK_SIZE = 1024 * 1024
+CSV_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+class CsvDecodeError(UnicodeError):
+    """CSV illisible avec l'encodage demandé (octet invalide signalé par pyarrow)"""
+
+
+def file_sha256(path):
+    """Calculer l'empreinte SHA-256 d'un fichier par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parquet_path_for(csv_path):
+    """Chemin du fichier Parquet associé à un CSV"""
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(PARQUET_DIR, f"{name}.parquet")
+
+
+def cached_source(parquet_path):
+    """(empreinte, encodage) du CSV source enregistrés dans un Parquet existant (None si absents)"""
+    if not os.path.exists(parquet_path):
+        return None, None
+    metadata = pq.read_schema(parquet_path).metadata or {}
+    return tuple(metadata[key].decode() if metadata.get(key) else None
+                 for key in (SOURCE_HASH_KEY, SOURCE_ENCODING_KEY))
+
+
+def write_parquet(csv_path, parquet_path, sep, encoding, metadata):
+    """Lire le CSV en flux et l'écrire en Parquet batch par batch, retourne le nombre de lignes"""
+    read_options = pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE, encoding=encoding)
+    parse_options = pa_csv.ParseOptions(delimiter=sep, newlines_in_values=True)
+
+    # Toutes les colonnes en texte (pas d'inférence de type bloc par bloc)
+    column_names = pa_csv.open_csv(csv_path, read_options=read_options, parse_options=parse_options).schema.names
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=read_options,
+        parse_options=parse_options,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in column_names},
+            strings_can_be_null=True
+        ),
+    )
+
+    # Colonnes répétitives encodées en dictionnaire
+    fields = []
+    for name in column_names:
+        if name in DICTIONARY_COLUMNS:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    schema = pa.schema(fields, metadata=metadata)
+
+    rows = 0
+    with pq.ParquetWriter(parquet_path, schema, compression='zstd') as writer:
+        for batch in reader:
+            columns = [
+                column.dictionary_encode() if field.name in DICTIONARY_COLUMNS else column
+                for column, field in zip(batch.columns, schema)
+            ]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            rows += batch.num_rows
+    return rows
+
+
+def convert_csv_to_parquet(csv_path, parquet_path=None, sep=';', encoding='utf-8', force=False):
+    """Convertir un CSV en Parquet si son empreinte ou l'encodage a changé, retourne le chemin Parquet
+
+    Le CSV est lu en flux par blocs (pyarrow.csv) et écrit batch par batch:
+    la mémoire reste bornée. Toutes les colonnes sont lues comme texte, comme
+    dans l'import brut. Un octet invalide pour `encoding` lève CsvDecodeError
+    (UnicodeDecodeError si pyarrow décode via Python), sans toucher au cache.
+    """
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+    source_hash = file_sha256(csv_path)
+
+    if not force and cached_source(parquet_path) == (source_hash, encoding):
+        logger.info(f"[PARQUET] Cache à jour: {parquet_path}")
+        return parquet_path
+
+    logger.info(f"[PARQUET] Conversion de {csv_path} -> {parquet_path}")
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+
+    # Écriture dans un fichier temporaire puis remplacement atomique
+    tmp_path = parquet_path + '.tmp'
+    metadata = {
+        SOURCE_HASH_KEY: source_hash.encode(),
+        SOURCE_ENCODING_KEY: encoding.encode(),
+        SOURCE_FILE_KEY: os.path.abspath(csv_path).encode(),
+    }
+    try:
+        rows = write_parquet(csv_path, tmp_path, sep, encoding, metadata)
+    except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if isinstance(e, pa.ArrowInvalid) and 'invalid UTF8' in str(e):
+            raise CsvDecodeError(f"{csv_path} illisible en {encoding}: {e}") from e
+        raise
+    os.replace(tmp_path, parquet_path)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"[PARQUET] {rows} lignes converties en {elapsed:.2f}s "
+                f"({os.path.getsize(csv_path)} -> {os.path.getsize(parquet_path)} octets)")
+    return parquet_path
+
+
+def open_parquet(parquet_path):
+    """Ouvrir un fichier Parquet en mémoire mappée"""
+    return pq.ParquetFile(parquet_path, memory_map=True)
+
+
+def read_columns(parquet_path, columns=None):
+    """Lire uniquement les colonnes demandées d'un Parquet en DataFrame pandas"""
+    table = pq.read_table(parquet_path, columns=columns, memory_map=True)
+    return table.to_pandas()
+
+
+def load_dataset(name, columns=None):
+    """Lire un jeu de données connu (raw, topics) via son cache Parquet"""
+    dataset = DATASETS[name]
+    parquet_path = convert_csv_to_parquet(dataset['path'], sep=dataset['sep'])
+    return read_columns(parquet_path, columns)
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Conversion des CSV du projet en cache Parquet")
+    parser.add_argument(
+        'datasets', nargs='*', default=list(DATASETS),
+        help=f"Jeux de données à convertir parmi {', '.join(DATASETS)} ou chemins CSV (défaut: tous)"
+    )
+    parser.add_argument('--sep', default=';', help="Séparateur pour les chemins CSV explicites (défaut: ;)")
+    parser.add_argument('--force', action='store_true', help="Reconvertir même si le CSV n'a pas changé")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fonction principale"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    for name in args.datasets:
+        if name in DATASETS:
+            csv_path, sep = DATASETS[name]['path'], DATASETS[name]['sep']
+        else:
+            csv_path, sep = name, args.sep
+
+        if not os.path.exists(csv_path):
+            logger.error(f"[ERREUR] Fichier CSV non trouvé: {csv_path}")
+            return 1
+        convert_csv_to_parquet(csv_path, sep=sep, force=args.force)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Point d'entrée unique du pipeline morocco_banks_reviews
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/pipeline.py
+
+Sous-commandes:
+    import   -> import_raw_data.py (options transmises telles quelles)
+    features -> text_features.py
+    topics   -> lda_topic_modeling.py
+    export   -> export_results.py
+    status   -> état de la base, des modèles et des ressources NLTK
+
+Chaque module n'est importé que par la sous-commande qui l'utilise: status
+ne charge ni pandas, ni scikit-learn, ni NLTK. Le détail du temps de
+démarrage (interpréteur, imports, commande) est affiché à la fin sur stderr.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+import time
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Sous-commande -> (module chargé à la demande, description)
+COMMANDS = {
+    'import': ('import_raw_data', "Importer les CSV bruts dans public.raw_reviews"),
+    'features': ('text_features', "Calculer les features textuelles des avis (review_text_features)"),
+    'topics': ('lda_topic_modeling', "Extraire les topics LDA (modes full, infer, retrain, select)"),
+    'export': ('export_results', "Exporter les marts et topics en CSV"),
+    'status': (None, "Afficher l'état de la base, des modèles et des ressources NLTK"),
+}
+
+
+def process_elapsed():
+    """Secondes écoulées depuis le démarrage du processus (Linux), None si indisponible"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Champ 22 (starttime), compté après "pid (commande)"
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    def __init__(self):
+        """Démarrer le chronométrage (le temps de l'interpréteur est mesuré via /proc si possible)"""
+        self.phases = []
+        self.start = time.perf_counter()
+        interpreter = process_elapsed()
+        if interpreter is not None:
+            self.phases.append(('interpréteur + imports de base', interpreter))
+
+    def phase(self, name, function, *args):
+        """Exécuter une étape chronométrée, retourne son résultat"""
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        """Afficher le détail des temps sur stderr"""
+        total = sum(seconds for _, seconds in self.phases)
+        print("\n[STARTUP] Détail des temps:", file=sys.stderr)
+        for name, seconds in self.phases:
+            share = seconds / total if total else 0.0
+            print(f"[STARTUP]    {name:<40} {seconds * 1000:>10.0f} ms  {share:>6.1%}", file=sys.stderr)
+        print(f"[STARTUP]    {'total':<40} {total * 1000:>10.0f} ms", file=sys.stderr)
+
+
+def print_status():
+    """État du pipeline: base (avis, imports, topics), modèles enregistrés, ressources NLTK"""
+    import database
+    import topic_models
+
+    print("=" * 80)
+    print("ÉTAT DU PIPELINE morocco_banks_reviews")
+    print("=" * 80)
+
+    try:
+        with database.connection() as connection:
+            cursor = connection.cursor()
+            for table in ['public.raw_reviews', 'review_text_features', 'temp_review_topics', 'review_topic_weights']:
+                cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", (table,))
+                if cursor.fetchone()[0]:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table};")
+                    print(f"{table:<28} {cursor.fetchone()[0]:>10} lignes")
+                else:
+                    print(f"{table:<28} {'absente':>10}")
+
+            cursor.execute("SELECT to_regclass('public.import_runs') IS NOT NULL;")
+            if cursor.fetchone()[0]:
+                cursor.execute("""
+                    SELECT finished_at, load_mode, rows_loaded, duration_seconds, source
+                    FROM public.import_runs ORDER BY run_id DESC LIMIT 1;
+                """)
+                last_run = cursor.fetchone()
+                if last_run:
+                    finished_at, load_mode, rows_loaded, duration, source = last_run
+                    print(f"Dernier import: {finished_at:%Y-%m-%d %H:%M:%S} ({load_mode}, {rows_loaded} lignes "
+                          f"en {duration:.1f}s) depuis {source}")
+            cursor.close()
+            connection.rollback()
+    except Exception as e:
+        print(f"Base de données inaccessible: {e}")
+    finally:
+        database.close_pool()
+
+    store = topic_models.TopicModelStore()
+    for language in ['fr', 'ar']:
+        metadata = store.latest_metadata(language)
+        if metadata is None:
+            print(f"Modèle {language}: aucun")
+        else:
+            print(f"Modèle {language}: version {metadata['version']} ({metadata['n_topics']} topics, "
+                  f"{metadata['n_documents']} avis, entraîné le {metadata['trained_at']})")
+
+    # Résultat mémorisé par lda_topic_modeling.py (pas d'import de NLTK ici)
+    nltk_marker = os.path.join(SCRIPT_DIR, "..", "cache", "nltk_resources.json")
+    if os.path.exists(nltk_marker):
+        with open(nltk_marker, encoding='utf-8') as f:
+            resources = json.load(f)
+        for name, path in resources.items():
+            print(f"NLTK {name}: {path} ({'présent' if os.path.exists(path) else 'introuvable'})")
+    else:
+        print("NLTK: ressources pas encore vérifiées (lancées au premier 'topics')")
+    return 0
+
+
+def parse_args(argv=None):
+    """Lire la sous-commande; les options suivantes sont transmises au script concerné"""
+    parser = argparse.ArgumentParser(
+        description="Pipeline morocco_banks_reviews",
+        epilog="Options d'une sous-commande: pipeline.py <commande> --help"
+    )
+    parser.add_argument('--no-timings', action='store_true', help="Ne pas afficher le détail des temps de démarrage")
+    parser.add_argument('command', choices=list(COMMANDS),
+                        help="; ".join(f"{name}: {description}" for name, (_, description) in COMMANDS.items()))
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Options transmises à la sous-commande")
+    args = parser.parse_args(argv)
+
+    if COMMANDS[args.command][0] is None and args.args:
+        parser.error(f"{args.command} n'accepte pas d'options: {' '.join(args.args)}")
+    return args
+
+
+def main(argv=None):
+    """Fonction principale"""
+    timer = StartupTimer()
+    args = timer.phase('lecture des arguments', parse_args, argv)
+    module_name = COMMANDS[args.command][0]
+
+    try:
+        if module_name is None:
+            return timer.phase(f"commande {args.command}", print_status)
+
+        module = timer.phase(f"import {module_name}", importlib.import_module, module_name)
+        return timer.phase(f"commande {args.command}", module.main, args.args)
+    finally:
+        if not args.no_timings:
+            timer.report()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
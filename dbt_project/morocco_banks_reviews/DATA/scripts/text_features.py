@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Features textuelles des avis calculées en une passe, lues par les modèles dbt
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/text_features.py
+
+Pour chaque avis de public.raw_reviews: texte nettoyé, longueurs, nombre de
+caractères arabes et latins, langue, empreinte du texte nettoyé et sentiment,
+calculés par lots avec les méthodes .str de pandas (mêmes règles que les
+macros clean_text, detect_language et analyze_sentiment). Les résultats vont
+dans review_text_features, que int_reviews_cleaned joint par (id, created_at)
+au lieu de réévaluer les expressions régulières; les avis sans features y
+sont encore calculés en SQL.
+
+Par défaut seuls les avis nouveaux (id ou created_at au-delà du maximum déjà
+calculé) sont traités, comme les modèles dbt incrémentaux; --full recalcule
+toute la table.
+"""
+
+from functools import lru_cache
+import argparse
+import hashlib
+import io
+import logging
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Configuration et pool de connexions partagés
+import database
+
+logger = logging.getLogger(__name__)
+
+FEATURES_TABLE = 'review_text_features'
+FEATURE_COLUMNS = [
+    'id', 'created_at', 'avis_cleaned', 'avis_length_original', 'avis_length_cleaned',
+    'arabic_char_count', 'latin_char_count', 'langue_detected', 'text_hash', 'sentiment'
+]
+DEFAULT_BATCH_SIZE = 20000
+
+# Mêmes classes de caractères que les macros dbt
+ARABIC_CHARS = '\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDCF\uFDF0-\uFDFF\uFE70-\uFEFF'
+FRENCH_ACCENTS = 'àâäéèêëïîôöùûüÿçÀÂÄÉÈÊËÏÎÔÖÙÛÜŸÇ'
+
+# clean_text: URLs supprimées, caractères hors lettres / espaces / arabe / accents remplacés, espaces regroupés
+URL_RE = re.compile(r'https?://[^\s]+')
+SPACES_RE = re.compile(r'\s+')
+
+# detect_language
+ARABIC_RE = re.compile(f"[{ARABIC_CHARS}]")
+LATIN_RE = re.compile(f"[a-zA-Z{FRENCH_ACCENTS}]")
+ARABIC_SHARE = 0.3
+LATIN_SHARE = 0.5
+
+# analyze_sentiment: règles évaluées dans l'ordre, la première qui correspond l'emporte
+POSITIVE_RE = re.compile(
+    '(?:excellent|formidable|parfait|superbe|magnifique|fantastique|merveilleux|génial|top|très bien|bien|bon|bonne'
+    '|rapide|efficace|professionnel|aimable|courtois|satisfait|content|recommande|رائع|ممتاز|جيد|سريع|مهني|راض|أنصح)'
+)
+NEGATIVE_RE = re.compile(
+    '(?:mauvais|horrible|nul|catastrophique|décevant|lent|inefficace|impoli|malpoli|pas bien|très mal|mal|problème'
+    '|souci|attente|queue|retard|fermé|indisponible|غير جيد|سيء|بطيء|مشكلة|انتظار|مغلق)'
+)
+RATING_RULES = [
+    (re.compile(r'[5].*étoiles?|5/5'), 'Positif'),
+    (re.compile(r'[4].*étoiles?|4/5'), 'Positif'),
+    (re.compile(r'[1-2].*étoiles?|[1-2]/5'), 'Negatif'),
+]
+
+
+@lru_cache(maxsize=None)
+def noise_re():
+    """Caractères remplacés par clean_text, regex construite au premier appel
+
+    Les caractères numériques autres que les chiffres (², ½, ①...) sont
+    ajoutés: \\w de Python les garde, celui de Postgres non. Les trouver
+    demande de parcourir tous les points de code, d'où la construction
+    différée plutôt qu'à l'import.
+    """
+    numeric_other = ''.join(c for c in map(chr, range(sys.maxunicode + 1)) if unicodedata.category(c) == 'No')
+    return re.compile(f"[^\\w\\s{ARABIC_CHARS}{FRENCH_ACCENTS}']|[{re.escape(numeric_other)}]")
+
+
+def clean_texts(texts):
+    """Texte nettoyé (macro clean_text) d'une série d'avis"""
+    return (texts.str.lower()
+            .str.replace(URL_RE, '', regex=True)
+            .str.replace(noise_re(), ' ', regex=True)
+            .str.replace(SPACES_RE, ' ', regex=True)
+            .str.strip(' '))
+
+
+def detect_languages(lengths, arabic_counts, latin_counts):
+    """Langue (macro detect_language) à partir des comptes de caractères du texte brut"""
+    return np.select(
+        [arabic_counts > lengths * ARABIC_SHARE, latin_counts > lengths * LATIN_SHARE],
+        ['ar', 'fr'],
+        default='mixed'
+    )
+
+
+def analyze_sentiments(cleaned):
+    """Sentiment (macro analyze_sentiment) du texte nettoyé"""
+    lowered = cleaned.str.lower()
+    conditions = [lowered.str.contains(POSITIVE_RE), lowered.str.contains(NEGATIVE_RE)]
+    choices = ['Positif', 'Negatif']
+    for pattern, sentiment in RATING_RULES:
+        conditions.append(cleaned.str.contains(pattern))
+        choices.append(sentiment)
+    return np.select(conditions, choices, default='Neutre')
+
+
+def compute_features(reviews):
+    """Features d'un lot d'avis (colonnes id, created_at, avis), une ligne par avis"""
+    # Texte brut tel que le voit stg_raw_reviews (trim des espaces)
+    texts = reviews['avis'].fillna('').str.strip(' ')
+    cleaned = clean_texts(texts)
+    lengths = texts.str.len()
+    arabic_counts = texts.str.count(ARABIC_RE)
+    latin_counts = texts.str.count(LATIN_RE)
+
+    return pd.DataFrame({
+        'id': reviews['id'],
+        'created_at': reviews['created_at'],
+        'avis_cleaned': cleaned,
+        'avis_length_original': lengths,
+        'avis_length_cleaned': cleaned.str.len(),
+        'arabic_char_count': arabic_counts,
+        'latin_char_count': latin_counts,
+        'langue_detected': detect_languages(lengths, arabic_counts, latin_counts),
+        'text_hash': [hashlib.md5(text.encode('utf-8')).hexdigest() for text in cleaned],
+        'sentiment': analyze_sentiments(cleaned),
+    })
+
+
+def ensure_features_table(cursor):
+    """Créer review_text_features et ses index (idempotent)"""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS public.{FEATURES_TABLE} (
+            id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP NOT NULL,
+            avis_cleaned TEXT NOT NULL,
+            avis_length_original INTEGER NOT NULL,
+            avis_length_cleaned INTEGER NOT NULL,
+            arabic_char_count INTEGER NOT NULL,
+            latin_char_count INTEGER NOT NULL,
+            langue_detected VARCHAR(5) NOT NULL,
+            text_hash CHAR(32) NOT NULL,
+            sentiment VARCHAR(7) NOT NULL,
+            computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS {FEATURES_TABLE}_created_at_idx ON public.{FEATURES_TABLE} (created_at);
+        CREATE INDEX IF NOT EXISTS {FEATURES_TABLE}_text_hash_idx ON public.{FEATURES_TABLE} (text_hash);
+    """)
+
+
+def save_features(cursor, features):
+    """Charger un lot par COPY dans une table temporaire puis fusionner (un id recalculé est remplacé)"""
+    buffer = io.StringIO()
+    features[FEATURE_COLUMNS].to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cursor.execute(f"""
+        CREATE TEMP TABLE IF NOT EXISTS features_upsert (LIKE public.{FEATURES_TABLE} INCLUDING DEFAULTS) ON COMMIT DROP;
+        TRUNCATE features_upsert;
+    """)
+    cursor.copy_expert(
+        f"COPY features_upsert ({', '.join(FEATURE_COLUMNS)}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (avis_cleaned))",
+        buffer
+    )
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in FEATURE_COLUMNS[1:])
+    cursor.execute(f"""
+        INSERT INTO public.{FEATURES_TABLE} ({', '.join(FEATURE_COLUMNS)})
+        SELECT {', '.join(FEATURE_COLUMNS)} FROM features_upsert
+        ON CONFLICT (id) DO UPDATE SET {updates}, computed_at = CURRENT_TIMESTAMP;
+    """)
+
+
+def build_features(full=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Calculer les features des avis à traiter dans une seule transaction, retourne le nombre d'avis"""
+    start = time.perf_counter()
+    total = 0
+
+    with database.connection() as connection:
+        cursor = connection.cursor()
+        ensure_features_table(cursor)
+        if full:
+            cursor.execute(f"TRUNCATE public.{FEATURES_TABLE};")
+            condition = "true"
+        else:
+            # Même condition que la macro dbt incremental_new_rows
+            condition = f"""(
+                r.id > (SELECT coalesce(max(id), 0) FROM public.{FEATURES_TABLE})
+                OR r.created_at > (SELECT coalesce(max(created_at), '-infinity'::timestamp) FROM public.{FEATURES_TABLE})
+            )"""
+
+        with database.server_side_cursor(connection, 'text_features_reviews', itersize=batch_size) as reader:
+            reader.execute(f"SELECT r.id, r.created_at, r.avis FROM public.raw_reviews r WHERE {condition} ORDER BY r.id;")
+            while True:
+                rows = reader.fetchmany(batch_size)
+                if not rows:
+                    break
+                batch_start = time.perf_counter()
+                features = compute_features(pd.DataFrame(rows, columns=['id', 'created_at', 'avis']))
+                save_features(cursor, features)
+                total += len(features)
+                logger.info(f"[FEATURES] {len(features)} avis calculés en {time.perf_counter() - batch_start:.2f}s "
+                            f"({total} au total)")
+
+        cursor.execute(f"ANALYZE public.{FEATURES_TABLE};")
+        connection.commit()
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"[FEATURES] {total} avis {'(recalcul complet) ' if full else ''}dans {FEATURES_TABLE} "
+                f"en {elapsed:.2f}s ({total / elapsed if elapsed > 0 else 0:.0f} avis/s)")
+    return total
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Calcul des features textuelles des avis (review_text_features)")
+    parser.add_argument('--full', action='store_true', help="Recalculer les features de tous les avis")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Avis lus et calculés par lot (défaut: {DEFAULT_BATCH_SIZE})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fonction principale"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    try:
+        total = build_features(args.full, args.batch_size)
+    except Exception as e:
+        logger.error(f"[FEATURES] Erreur lors du calcul des features: {e}")
+        return 1
+    finally:
+        database.close_pool()
+
+    print(f"{total} avis traités dans {FEATURES_TABLE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
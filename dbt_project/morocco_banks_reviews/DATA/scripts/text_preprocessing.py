@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Moteur de préprocessing de texte par lots pour l'analyse LDA
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/text_preprocessing.py
+
+Les ensembles de mots vides sont construits une seule fois par langue, les
+expressions régulières sont précompilées et le nettoyage est vectorisé sur
+tout le corpus (méthodes .str de pandas). La racinisation passe par un cache
+LRU borné partagé entre les documents: le vocabulaire des avis se répète
+beaucoup, chaque mot distinct n'est racinisé qu'une fois.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import logging
+import re
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Expressions régulières précompilées (mêmes règles que l'ancien preprocess_text)
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+DIGITS_RE = re.compile(r'\d+')
+
+# Langue de l'avis -> langue NLTK (mots vides et stemmer)
+NLTK_LANGUAGES = {'fr': 'french', 'ar': 'arabic'}
+DEFAULT_NLTK_LANGUAGE = 'french'
+
+MIN_TOKEN_LENGTH = 3
+DEFAULT_STEM_CACHE_SIZE = 100000
+DEFAULT_CHUNK_SIZE = 2000
+
+# Moteur propre à chaque processus du pool (créé une seule fois par _init_worker)
+_worker_preprocessor = None
+
+
+@lru_cache(maxsize=None)
+def nltk_stopwords(nltk_language):
+    """Mots vides NLTK d'une langue, chargés une seule fois par processus"""
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words(nltk_language))
+
+
+class TextPreprocessor:
+    def __init__(self, custom_stopwords=None, stem_cache_size=DEFAULT_STEM_CACHE_SIZE):
+        """Initialiser le moteur (mots vides personnalisés par langue: {'fr': [...], 'ar': [...]})"""
+        self.custom_stopwords = custom_stopwords or {}
+        self.stem_cache_size = stem_cache_size
+        self._stopwords = {}
+        self._stemmers = {}
+
+    def nltk_language(self, language):
+        """Langue NLTK utilisée pour une langue d'avis (français par défaut, ex: 'mixed')"""
+        return NLTK_LANGUAGES.get(language, DEFAULT_NLTK_LANGUAGE)
+
+    def stopwords_for(self, language):
+        """Ensemble figé des mots vides (NLTK + personnalisés) d'une langue"""
+        nltk_language = self.nltk_language(language)
+        if nltk_language not in self._stopwords:
+            custom_language = 'ar' if nltk_language == 'arabic' else 'fr'
+            self._stopwords[nltk_language] = nltk_stopwords(nltk_language) | frozenset(
+                self.custom_stopwords.get(custom_language, [])
+            )
+        return self._stopwords[nltk_language]
+
+    def stem_function(self, language):
+        """Fonction de racinisation avec cache LRU borné, partagée par langue"""
+        nltk_language = self.nltk_language(language)
+        if nltk_language not in self._stemmers:
+            from nltk.stem import SnowballStemmer
+
+            stemmer = SnowballStemmer(nltk_language)
+
+            @lru_cache(maxsize=self.stem_cache_size)
+            def stem(token):
+                try:
+                    return stemmer.stem(token)
+                except Exception:
+                    return token
+
+            self._stemmers[nltk_language] = stem
+        return self._stemmers[nltk_language]
+
+    def clean_texts(self, texts):
+        """Nettoyage vectorisé: minuscules, ponctuation -> espace, suppression des chiffres"""
+        texts = pd.Series(list(texts), dtype=object)
+        valid = texts.notna()
+        cleaned = pd.Series('', index=texts.index, dtype=object)
+        cleaned[valid] = (
+            texts[valid].astype(str).str.lower()
+            .str.replace(PUNCTUATION_RE, ' ', regex=True)
+            .str.replace(DIGITS_RE, '', regex=True)
+        )
+        return cleaned
+
+    def preprocess_batch(self, texts, language='fr'):
+        """Préprocesser un corpus entier, retourne une Series de textes (même index que texts)
+
+        Après nettoyage il ne reste que des caractères de mot et des espaces:
+        la tokenisation se fait en une seule passe (découpage sur les espaces)
+        sur l'ensemble du corpus, puis les mots courts, non alphabétiques ou
+        vides sont filtrés et les autres racinisés via le cache.
+        """
+        index = texts.index if isinstance(texts, pd.Series) else None
+        cleaned = self.clean_texts(texts)
+        stop_words = self.stopwords_for(language)
+        stem = self.stem_function(language)
+
+        tokens = cleaned.str.split().explode().dropna()
+        keep = (tokens.str.len() >= MIN_TOKEN_LENGTH) & tokens.str.isalpha() & ~tokens.isin(stop_words)
+        stemmed = tokens[keep].map(stem)
+
+        processed = stemmed.groupby(level=0, sort=False).agg(' '.join)
+        processed = processed.reindex(cleaned.index, fill_value='')
+        if index is not None:
+            processed.index = index
+        return processed
+
+    def preprocess_parallel(self, texts, language='fr', workers=2, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Préprocesser un corpus par morceaux sur un pool de processus
+
+        Chaque processus construit son moteur (stemmer, mots vides) une seule
+        fois à son démarrage. executor.map rend les morceaux dans l'ordre: le
+        résultat est identique à preprocess_batch, document par document.
+        """
+        index = texts.index if isinstance(texts, pd.Series) else None
+        texts = list(texts)
+        chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.custom_stopwords, self.stem_cache_size)
+        ) as executor:
+            results = executor.map(_preprocess_chunk, chunks, [language] * len(chunks))
+            processed = [text for chunk_result in results for text in chunk_result]
+
+        return pd.Series(processed, index=index, dtype=object)
+
+    def preprocess_text(self, text, language='fr'):
+        """Préprocesser un seul texte (utilise le même moteur que preprocess_batch)"""
+        return self.preprocess_batch([text], language).iloc[0]
+
+    def cache_stats(self):
+        """Statistiques du cache de racinisation par langue (hits, misses, taux)"""
+        stats = {}
+        for nltk_language, stem in self._stemmers.items():
+            info = stem.cache_info()
+            lookups = info.hits + info.misses
+            stats[nltk_language] = {
+                'hits': info.hits,
+                'misses': info.misses,
+                'size': info.currsize,
+                'maxsize': info.maxsize,
+                'hit_rate': info.hits / lookups if lookups else 0.0,
+            }
+        return stats
+
+    def log_cache_stats(self):
+        """Journaliser le taux de succès du cache de racinisation"""
+        for nltk_language, stats in self.cache_stats().items():
+            logger.info(f"[PREPROCESS] Cache stems {nltk_language}: {stats['hit_rate']:.1%} de succès "
+                        f"({stats['hits']} hits, {stats['misses']} misses, {stats['size']}/{stats['maxsize']} entrées)")
+
+
+def _init_worker(custom_stopwords, stem_cache_size):
+    """Initialiser le moteur de préprocessing d'un processus du pool"""
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(custom_stopwords, stem_cache_size)
+
+
+def _preprocess_chunk(texts, language):
+    """Préprocesser un morceau du corpus dans un processus du pool"""
+    return _worker_preprocessor.preprocess_batch(texts, language).tolist()
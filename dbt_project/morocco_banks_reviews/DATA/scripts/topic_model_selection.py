@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sélection du nombre de topics et des hyperparamètres LDA
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/topic_model_selection.py
+
+La matrice document-terme est calculée une seule fois par le processus
+principal puis transmise à chaque processus du pool à son démarrage
+(initializer): les candidats ne renvoient que leurs métriques.
+Chaque candidat est entraîné sur la partie apprentissage et évalué par la
+perplexité sur les avis mis de côté et par la cohérence UMass de ses topics.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOPIC_COUNTS = [4, 6, 8, 10, 12]
+DEFAULT_MAX_ITERS = [10]
+DEFAULT_LEARNING_DECAYS = [0.7]
+DEFAULT_HOLDOUT_SHARE = 0.1
+COHERENCE_TOP_WORDS = 10
+
+# Métrique de sélection -> True si une valeur plus grande est meilleure
+SELECTION_METRICS = {'coherence': True, 'perplexity': False}
+
+# Matrices partagées par les candidats d'un même processus (voir _init_sweep_worker)
+_train_matrix = None
+_holdout_matrix = None
+_binary_matrix = None
+
+
+def candidate_grid(topic_counts=None, max_iters=None, learning_decays=None):
+    """Liste des combinaisons d'hyperparamètres à évaluer"""
+    return [
+        {'n_topics': n_topics, 'max_iter': max_iter, 'learning_decay': learning_decay}
+        for n_topics, max_iter, learning_decay in product(
+            topic_counts or DEFAULT_TOPIC_COUNTS,
+            max_iters or DEFAULT_MAX_ITERS,
+            learning_decays or DEFAULT_LEARNING_DECAYS
+        )
+    ]
+
+
+def build_lda(params, random_state=42):
+    """Modèle LDA en ligne pour une combinaison d'hyperparamètres"""
+    from sklearn.decomposition import LatentDirichletAllocation
+
+    return LatentDirichletAllocation(
+        n_components=params['n_topics'],
+        max_iter=params['max_iter'],
+        learning_decay=params['learning_decay'],
+        random_state=random_state,
+        learning_method='online',
+        learning_offset=50.0
+    )
+
+
+def split_holdout(matrix, holdout_share=DEFAULT_HOLDOUT_SHARE, random_state=42):
+    """Séparer les lignes de la matrice en apprentissage / évaluation (tirage reproductible)"""
+    n_documents = matrix.shape[0]
+    order = np.random.RandomState(random_state).permutation(n_documents)
+    n_holdout = max(1, int(n_documents * holdout_share))
+    return matrix[np.sort(order[n_holdout:])], matrix[np.sort(order[:n_holdout])]
+
+
+def umass_coherence(lda_model, binary_matrix, n_words=COHERENCE_TOP_WORDS):
+    """Cohérence UMass moyenne des topics (plus proche de 0 = meilleure)
+
+    Pour chaque topic, moyenne sur les paires de mots de tête (w_i, w_j), j
+    classé avant i, de log((D(w_i, w_j) + 1) / D(w_j)), avec D le nombre
+    d'avis contenant le ou les mots.
+    """
+    scores = []
+    for topic in lda_model.components_:
+        top_words = topic.argsort()[::-1][:n_words]
+        columns = binary_matrix[:, top_words]
+        co_occurrences = (columns.T @ columns).toarray()
+        doc_counts = np.diag(co_occurrences)
+
+        pair_scores = [
+            np.log((co_occurrences[i, j] + 1) / doc_counts[j])
+            for i in range(1, len(top_words)) for j in range(i) if doc_counts[j] > 0
+        ]
+        scores.append(np.mean(pair_scores) if pair_scores else 0.0)
+    return float(np.mean(scores))
+
+
+def _init_sweep_worker(train_matrix, holdout_matrix):
+    """Recevoir les matrices une seule fois par processus du pool"""
+    global _train_matrix, _holdout_matrix, _binary_matrix
+    _train_matrix = train_matrix
+    _holdout_matrix = holdout_matrix
+    _binary_matrix = (train_matrix > 0).astype(np.float64).tocsc()
+
+
+def _fit_candidate(params):
+    """Entraîner et évaluer un candidat dans un processus du pool"""
+    start = time.perf_counter()
+    lda_model = build_lda(params)
+    lda_model.fit(_train_matrix)
+    fit_seconds = time.perf_counter() - start
+
+    return {
+        **params,
+        'perplexity': float(lda_model.perplexity(_holdout_matrix)),
+        'coherence': umass_coherence(lda_model, _binary_matrix),
+        'fit_seconds': round(fit_seconds, 3),
+    }
+
+
+def run_sweep(matrix, candidates, workers=1, holdout_share=DEFAULT_HOLDOUT_SHARE):
+    """Évaluer tous les candidats sur la même matrice, retourne une liste de résultats"""
+    train_matrix, holdout_matrix = split_holdout(matrix, holdout_share)
+    logger.info(f"[SELECT] {len(candidates)} candidats sur {train_matrix.shape[0]} avis "
+                f"(+{holdout_matrix.shape[0]} pour la perplexité), {workers} processus")
+
+    if workers <= 1:
+        _init_sweep_worker(train_matrix, holdout_matrix)
+        results = [_fit_candidate(params) for params in candidates]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_sweep_worker,
+            initargs=(train_matrix, holdout_matrix)
+        ) as executor:
+            results = list(executor.map(_fit_candidate, candidates))
+
+    for result in results:
+        logger.info(f"[SELECT]    topics={result['n_topics']:<3} max_iter={result['max_iter']:<3} "
+                    f"decay={result['learning_decay']:<4} perplexité={result['perplexity']:.1f} "
+                    f"cohérence={result['coherence']:.3f} ({result['fit_seconds']:.2f}s)")
+    return results
+
+
+def best_candidate(results, metric='coherence'):
+    """Meilleur résultat selon la métrique (égalité: perplexité la plus basse)"""
+    higher_is_better = SELECTION_METRICS[metric]
+    sign = -1 if higher_is_better else 1
+    return min(results, key=lambda result: (sign * result[metric], result['perplexity']))
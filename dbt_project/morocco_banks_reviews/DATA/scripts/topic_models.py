@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stockage versionné des modèles de topics LDA
+Projet: morocco_banks_reviews
+Chemin: DATA/scripts/topic_models.py
+
+Pour chaque langue, le vectoriseur TF-IDF, le modèle LDA, les noms de topics
+et le vocabulaire vu à l'entraînement sont enregistrés ensemble (joblib) dans
+DATA/models/<langue>/<version>.joblib. Le fichier latest.json de la langue
+désigne la version courante; il est remplacé de façon atomique après
+l'écriture complète du modèle.
+
+joblib et scikit-learn ne sont importés qu'à l'enregistrement ou au chargement
+d'un modèle: lire les métadonnées (pipeline.py status) reste instantané.
+"""
+
+from datetime import datetime
+import argparse
+import json
+import logging
+import sys
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(SCRIPT_DIR, "..", "models")
+LATEST_FILE = "latest.json"
+
+logger = logging.getLogger(__name__)
+
+
+class TopicModelStore:
+    def __init__(self, models_dir=MODELS_DIR):
+        """Initialiser le stockage (un sous-dossier par langue)"""
+        self.models_dir = models_dir
+
+    def language_dir(self, language):
+        """Dossier des versions d'une langue"""
+        return os.path.join(self.models_dir, language)
+
+    def save(self, language, vectorizer, lda_model, topic_names, training_vocabulary, n_documents,
+             extra_metadata=None):
+        """Enregistrer un modèle entraîné, retourne sa version (horodatage)
+
+        extra_metadata: informations ajoutées aux métadonnées (ex: hyperparamètres choisis).
+        """
+        import joblib
+        import sklearn
+
+        version = datetime.now().strftime('%Y%m%d_%H%M%S')
+        language_dir = self.language_dir(language)
+        os.makedirs(language_dir, exist_ok=True)
+
+        metadata = {
+            'version': version,
+            'language': language,
+            'trained_at': datetime.now().isoformat(timespec='seconds'),
+            'n_documents': int(n_documents),
+            'n_topics': int(lda_model.n_components),
+            'n_features': len(vectorizer.vocabulary_),
+            'n_training_tokens': len(training_vocabulary),
+            'sklearn_version': sklearn.__version__,
+        }
+        metadata.update(extra_metadata or {})
+        bundle = {
+            'metadata': metadata,
+            'vectorizer': vectorizer,
+            'lda_model': lda_model,
+            'topic_names': dict(topic_names),
+            'training_vocabulary': frozenset(training_vocabulary),
+        }
+
+        model_path = os.path.join(language_dir, f"{version}.joblib")
+        joblib.dump(bundle, model_path + '.tmp', compress=3)
+        os.replace(model_path + '.tmp', model_path)
+
+        # Pointeur vers la version courante, remplacé en dernier
+        latest_path = os.path.join(language_dir, LATEST_FILE)
+        with open(latest_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        os.replace(latest_path + '.tmp', latest_path)
+
+        logger.info(f"[MODEL] Modèle {language} version {version} enregistré ({model_path})")
+        return version
+
+    def latest_metadata(self, language):
+        """Métadonnées de la version courante d'une langue (None si aucun modèle)"""
+        latest_path = os.path.join(self.language_dir(language), LATEST_FILE)
+        if not os.path.exists(latest_path):
+            return None
+        with open(latest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, language, version=None):
+        """Charger un modèle (version courante par défaut), None si absent"""
+        import joblib
+        import sklearn
+
+        if version is None:
+            metadata = self.latest_metadata(language)
+            if metadata is None:
+                return None
+            version = metadata['version']
+
+        model_path = os.path.join(self.language_dir(language), f"{version}.joblib")
+        if not os.path.exists(model_path):
+            logger.warning(f"[MODEL] Version {version} introuvable pour {language}")
+            return None
+
+        bundle = joblib.load(model_path)
+        if bundle['metadata'].get('sklearn_version') != sklearn.__version__:
+            logger.warning(f"[MODEL] Modèle {language} {version} entraîné avec scikit-learn "
+                           f"{bundle['metadata'].get('sklearn_version')} (installé: {sklearn.__version__})")
+        logger.info(f"[MODEL] Modèle {language} version {version} chargé")
+        return bundle
+
+    def list_versions(self, language):
+        """Versions disponibles d'une langue, de la plus ancienne à la plus récente"""
+        language_dir = self.language_dir(language)
+        if not os.path.isdir(language_dir):
+            return []
+        return sorted(name[:-len('.joblib')] for name in os.listdir(language_dir) if name.endswith('.joblib'))
+
+    def model_age_days(self, language):
+        """Âge en jours de la version courante (None si aucun modèle)"""
+        metadata = self.latest_metadata(language)
+        if metadata is None:
+            return None
+        trained_at = datetime.fromisoformat(metadata['trained_at'])
+        return (datetime.now() - trained_at).total_seconds() / 86400
+
+
+def unseen_vocabulary_share(processed_texts, training_vocabulary):
+    """Part des mots (après préprocessing) absents du vocabulaire d'entraînement"""
+    tokens = processed_texts.str.split().explode().dropna()
+    if len(tokens) == 0:
+        return 0.0
+    return float((~tokens.isin(training_vocabulary)).mean())
+
+
+def parse_args(argv=None):
+    """Lire les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(description="Versions des modèles de topics enregistrées")
+    parser.add_argument('languages', nargs='*', default=['fr', 'ar'], help="Langues à afficher (défaut: fr ar)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Fonction principale: afficher les versions disponibles"""
+    args = parse_args(argv)
+    store = TopicModelStore()
+
+    for language in args.languages:
+        metadata = store.latest_metadata(language)
+        if metadata is None:
+            print(f"{language}: aucun modèle")
+            continue
+        print(f"{language}: version courante {metadata['version']} ({metadata['n_documents']} avis, "
+              f"{metadata['n_topics']} topics, entraîné le {metadata['trained_at']})")
+        for version in store.list_versions(language):
+            print(f"   - {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
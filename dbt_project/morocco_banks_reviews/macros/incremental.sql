@@ -0,0 +1,25 @@
+{%- macro incremental_new_rows(id_column='id', timestamp_column='created_at') -%}
+    {#- Condition des lignes de l'amont à traiter: en incrémental, id ou created_at au-delà
+        du maximum déjà chargé dans le modèle; sinon toutes les lignes -#}
+    {%- if is_incremental() -%}
+    ({{ id_column }} > (select coalesce(max({{ id_column }}), 0) from {{ this }})
+        or {{ timestamp_column }} > (select coalesce(max({{ timestamp_column }}), '-infinity'::timestamp) from {{ this }}))
+    {%- else -%}
+    true
+    {%- endif -%}
+{%- endmacro -%}
+
+
+{%- macro delete_reloaded_rows(upstream, timestamp_column='created_at', upstream_timestamp_column=none) -%}
+    {#- Pre-hook des modèles incrémentaux. Après un rechargement complet de l'amont
+        (TRUNCATE ... RESTART IDENTITY puis import), toutes ses lignes sont plus récentes
+        que celles du modèle: les anciennes lignes sont supprimées et les lignes rechargées
+        repassent toutes par le modèle, comme avec --full-refresh.
+        Après un import incrémental, le minimum de l'amont ne bouge pas: rien n'est supprimé. -#}
+    {%- if is_incremental() -%}
+    delete from {{ this }}
+    where {{ timestamp_column }} < (
+        select min({{ upstream_timestamp_column or timestamp_column }}) from {{ upstream }}
+    )
+    {%- endif -%}
+{%- endmacro -%}
@@ -1,42 +1,104 @@
-{{ config(materialized='view') }}
+{{ config(
+    materialized='incremental',
+    unique_key='id',
+    incremental_strategy='delete+insert',
+    indexes=[
+        {'columns': ['id'], 'unique': True},
+        {'columns': ['created_at']}
+    ],
+    pre_hook="{{ delete_reloaded_rows(ref('stg_raw_reviews')) }}"
+) }}
 
-with cleaned_reviews as (
-    select 
+-- Incrémental: seuls les avis nouveaux (id ou created_at au-delà du maximum chargé) sont traités
+
+{#- Features calculées par DATA/scripts/text_features.py (absentes tant que le script n'a pas tourné) -#}
+{%- set features_relation = adapter.get_relation(database=target.database, schema=target.schema, identifier='review_text_features') %}
+
+with source_reviews as (
+    select *
+    from {{ ref('stg_raw_reviews') }}
+    where {{ incremental_new_rows() }}
+),
+
+-- Texte nettoyé, langue, empreinte et sentiment lus dans review_text_features
+{%- if features_relation is not none %}
+computed_features as (
+    select
+        s.id,
+        f.avis_cleaned,
+        f.avis_length_cleaned,
+        f.langue_detected,
+        f.text_hash,
+        f.sentiment
+    from source_reviews s
+    join {{ features_relation }} f
+        on f.id = s.id
+        and f.created_at = s.created_at  -- id réutilisé après un rechargement complet: features périmées
+),
+{%- endif %}
+
+-- Avis sans features: calcul en SQL (texte nettoyé une seule fois)
+missing_features as (
+    select
         id,
-        banque,
-        ville,
-        nom_agence,
-        localisation,
+        avis_cleaned,
+        length(avis_cleaned) as avis_length_cleaned,
+        {{ detect_language('avis_raw') }} as langue_detected,
+        md5(avis_cleaned) as text_hash,
+        {{ analyze_sentiment('avis_cleaned') }} as sentiment
+    from (
+        select s.id, s.avis_raw, {{ clean_text('s.avis_raw') }} as avis_cleaned
+        from source_reviews s
+        {%- if features_relation is not none %}
+        where not exists (select 1 from computed_features c where c.id = s.id)
+        {%- endif %}
+    ) to_compute
+),
+
+text_features as (
+    {%- if features_relation is not none %}
+    select * from computed_features
+    union all
+    {%- endif %}
+    select * from missing_features
+),
+
+cleaned_reviews as (
+    select 
+        s.id,
+        s.banque,
+        s.ville,
+        s.nom_agence,
+        s.localisation,
         
         -- Conversion de la note en numérique
         case 
-            when note_raw ~ '^[0-5](\.[0-9])?$' then cast(note_raw as decimal(2,1))
-            when note_raw ~ '^[0-5]$' then cast(note_raw as decimal(2,1))
+            when s.note_raw ~ '^[0-5](\.[0-9])?$' then cast(s.note_raw as decimal(2,1))
+            when s.note_raw ~ '^[0-5]$' then cast(s.note_raw as decimal(2,1))
             else 0.0
         end as note_numeric,
         
         -- Nettoyage du texte de l'avis
-        avis_raw as avis_original,
-        {{ clean_text('avis_raw') }} as avis_cleaned,
+        s.avis_raw as avis_original,
+        t.avis_cleaned,
         
         -- Métadonnées du texte
-        length(avis_raw) as avis_length_original,
-        length({{ clean_text('avis_raw') }}) as avis_length_cleaned,
+        length(s.avis_raw) as avis_length_original,
+        t.avis_length_cleaned,
         
         -- Détection basique de langue
-        case 
-            when regexp_count(avis_raw, '[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDCF\uFDF0-\uFDFF\uFE70-\uFEFF]') > length(avis_raw) * 0.3 
-            then 'ar'
-            when regexp_count(avis_raw, '[a-zA-ZàâäéèêëïîôöùûüÿçÀÂÄÉÈÊËÏÎÔÖÙÛÜŸÇ]') > length(avis_raw) * 0.5 
-            then 'fr'
-            else 'mixed'
-        end as langue_detected,
+        t.langue_detected,
+        
+        -- Empreinte du texte nettoyé et sentiment
+        t.text_hash,
+        t.sentiment,
         
         -- Nettoyage de la date
-        date_avis_raw,
-        created_at
+        s.date_avis_raw,
+        s.created_at
         
-    from {{ ref('stg_raw_reviews') }}
+    from source_reviews s
+    join text_features t on t.id = s.id
 ),
 
 -- Ajout de métriques de qualité
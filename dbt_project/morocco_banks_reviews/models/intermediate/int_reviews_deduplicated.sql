@@ -1,23 +1,76 @@
-{{ config(materialized='view') }}
+{{ config(
+    materialized='incremental',
+    unique_key='id',
+    incremental_strategy='delete+insert',
+    indexes=[
+        {'columns': ['id'], 'unique': True},
+        {'columns': ['created_at']},
+        {'columns': ['content_hash']},
+        {'columns': ['similar_hash']}
+    ],
+    pre_hook="{{ delete_reloaded_rows(ref('int_reviews_cleaned')) }}"
+) }}
 
-with reviews_with_similarity as (
+-- Incrémental: les avis arrivent par created_at croissant, un avis déjà chargé passe donc
+-- avant les nouveaux de sa partition et garde son rang. Le rang d'un nouvel avis est son
+-- rang dans le lot plus le nombre d'avis déjà chargés de la même partition.
+
+with new_reviews as (
     select *,
         -- Créer une clé de déduplication basée sur le contenu
         md5(banque || ville || nom_agence || avis_cleaned) as content_hash,
-        
+        -- Clé des avis similaires, pour retrouver par index les avis déjà chargés
+        md5(banque || ville || left(avis_cleaned, 100)) as similar_hash
+    from {{ ref('int_reviews_cleaned') }}
+    where {{ incremental_new_rows() }}
+),
+{% if is_incremental() %}
+-- Avis déjà chargés des partitions touchées par le lot (hors lignes retraitées)
+loaded_reviews as (
+    select banque, ville, nom_agence, text_hash, avis_cleaned
+    from {{ this }} loaded
+    where loaded.similar_hash in (select similar_hash from new_reviews)
+      and not exists (select 1 from new_reviews n where n.id = loaded.id)
+),
+
+loaded_duplicates as (
+    select banque, ville, nom_agence, text_hash, count(*) as loaded_count
+    from loaded_reviews
+    group by banque, ville, nom_agence, text_hash
+),
+
+loaded_similar as (
+    select banque, ville, left(avis_cleaned, 100) as avis_prefix, count(*) as loaded_count
+    from loaded_reviews
+    group by banque, ville, left(avis_cleaned, 100)
+),
+{% endif %}
+reviews_with_similarity as (
+    select n.*,
         -- Fenêtre pour identifier les doublons potentiels
         row_number() over (
-            partition by banque, ville, nom_agence, avis_cleaned 
-            order by created_at asc
-        ) as duplicate_rank,
+            partition by n.banque, n.ville, n.nom_agence, n.text_hash  -- empreinte de avis_cleaned
+            order by n.created_at asc, n.id asc
+        ){% if is_incremental() %} + coalesce(loaded_duplicates.loaded_count, 0){% endif %} as duplicate_rank,
         
         -- Identifier les avis très similaires (même banque, même ville, texte similaire)
         row_number() over (
-            partition by banque, ville, left(avis_cleaned, 100)
-            order by created_at asc
-        ) as similar_rank
+            partition by n.banque, n.ville, left(n.avis_cleaned, 100)
+            order by n.created_at asc, n.id asc
+        ){% if is_incremental() %} + coalesce(loaded_similar.loaded_count, 0){% endif %} as similar_rank
         
-    from {{ ref('int_reviews_cleaned') }}
+    from new_reviews n
+    {%- if is_incremental() %}
+    left join loaded_duplicates
+        on loaded_duplicates.banque = n.banque
+        and loaded_duplicates.ville = n.ville
+        and loaded_duplicates.nom_agence = n.nom_agence
+        and loaded_duplicates.text_hash = n.text_hash
+    left join loaded_similar
+        on loaded_similar.banque = n.banque
+        and loaded_similar.ville = n.ville
+        and loaded_similar.avis_prefix = left(n.avis_cleaned, 100)
+    {%- endif %}
 ),
 
 -- Marquage des doublons
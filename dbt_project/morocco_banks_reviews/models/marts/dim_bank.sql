@@ -1,15 +1,24 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy='append'
+) }}
 
+-- Incrémental: seuls les nouveaux membres sont ajoutés, à la suite des clés existantes
+-- (les clés déjà référencées par fact_reviews ne changent pas)
 with bank_data as (
     select distinct
         banque as bank_name
-    from {{ ref('mart_reviews_enriched') }}
+    from {{ ref('mart_reviews_enriched') }} r
     where banque is not null
+    {%- if is_incremental() %}
+      and not exists (select 1 from {{ this }} d where d.bank_name = r.banque)
+    {%- endif %}
 ),
 
 enriched_banks as (
     select 
-        row_number() over (order by bank_name) as bank_key,
+        row_number() over (order by bank_name){% if is_incremental() %}
+            + (select coalesce(max(bank_key), 0) from {{ this }}){% endif %} as bank_key,
         bank_name,
         
         -- Classification des banques
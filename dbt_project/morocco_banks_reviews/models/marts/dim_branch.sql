@@ -1,17 +1,31 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy='append'
+) }}
 
+-- Incrémental: seuls les nouveaux membres sont ajoutés, à la suite des clés existantes
+-- (les clés déjà référencées par fact_reviews ne changent pas)
 with branch_data as (
     select distinct
         nom_agence as branch_name,
         banque as bank_name,
         ville as city
-    from {{ ref('mart_reviews_enriched') }}
+    from {{ ref('mart_reviews_enriched') }} r
     where nom_agence is not null
+    {%- if is_incremental() %}
+      and not exists (
+          select 1 from {{ this }} d
+          where d.branch_name = r.nom_agence
+            and d.bank_name is not distinct from r.banque
+            and d.city is not distinct from r.ville
+      )
+    {%- endif %}
 ),
 
 enriched_branches as (
     select 
-        row_number() over (order by bank_name, city, branch_name) as branch_key,
+        row_number() over (order by bank_name, city, branch_name){% if is_incremental() %}
+            + (select coalesce(max(branch_key), 0) from {{ this }}){% endif %} as branch_key,
         branch_name,
         bank_name,
         city,
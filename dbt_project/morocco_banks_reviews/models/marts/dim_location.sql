@@ -1,17 +1,31 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy='append'
+) }}
 
+-- Incrémental: seuls les nouveaux membres sont ajoutés, à la suite des clés existantes
+-- (les clés déjà référencées par fact_reviews ne changent pas)
 with location_data as (
     select distinct
         ville as city,
         localisation as address
-    from {{ ref('mart_reviews_enriched') }}
+    from {{ ref('mart_reviews_enriched') }} r
     where ville is not null
+    {%- if is_incremental() %}
+      and not exists (
+          select 1 from {{ this }} d
+          where d.city = r.ville
+            and d.address is not distinct from r.localisation
+      )
+    {%- endif %}
 ),
 
 enriched_locations as (
     select 
-        row_number() over (order by city) as location_key,
+        row_number() over (order by city, address){% if is_incremental() %}
+            + (select coalesce(max(location_key), 0) from {{ this }}){% endif %} as location_key,
         city,
+        address,
         
         -- Région basée sur la ville
         case 
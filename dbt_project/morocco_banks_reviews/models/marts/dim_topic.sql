@@ -1,15 +1,24 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    incremental_strategy='append'
+) }}
 
+-- Incrémental: seuls les nouveaux membres sont ajoutés, à la suite des clés existantes
+-- (les clés déjà référencées par fact_reviews ne changent pas)
 with topic_data as (
     select distinct
         topic as topic_name
-    from {{ ref('mart_reviews_enriched') }}
+    from {{ ref('mart_reviews_enriched') }} r
     where topic is not null
+    {%- if is_incremental() %}
+      and not exists (select 1 from {{ this }} d where d.topic_name = r.topic)
+    {%- endif %}
 ),
 
 enriched_topics as (
     select 
-        row_number() over (order by topic_name) as topic_key,
+        row_number() over (order by topic_name){% if is_incremental() %}
+            + (select coalesce(max(topic_key), 0) from {{ this }}){% endif %} as topic_key,
         topic_name,
         
         -- Catégorisation des topics
@@ -1,5 +1,11 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='review_id',
+    incremental_strategy='delete+insert',
+    pre_hook="{{ delete_reloaded_rows(ref('mart_reviews_enriched'), 'created_at', 'loaded_at') }}"
+) }}
 
+-- Incrémental: avis ajoutés ou rechargés dans mart_reviews_enriched depuis le dernier chargement
 with enriched_reviews as (
     select 
         r.id as review_id,
@@ -11,8 +17,12 @@ with enriched_reviews as (
         r.topic,
         r.banque as bank_name,
         r.nom_agence as branch_name,
-        r.ville as city
+        r.ville as city,
+        r.localisation as address
     from {{ ref('mart_reviews_enriched') }} r
+    {%- if is_incremental() %}
+    where r.loaded_at > (select coalesce(max(created_at), '-infinity'::timestamp) from {{ this }})
+    {%- endif %}
 ),
 
 -- Jointures avec les dimensions pour récupérer les clés
@@ -71,9 +81,11 @@ fact_table as (
     left join {{ ref('dim_branch') }} dbr 
         on er.branch_name = dbr.branch_name 
         and er.bank_name = dbr.bank_name
+        and er.city = dbr.city
         
     left join {{ ref('dim_location') }} dl 
         on er.city = dl.city
+        and er.address = dl.address
         
     left join {{ ref('dim_sentiment') }} ds 
         on er.sentiment = ds.sentiment
@@ -0,0 +1,62 @@
+{{ config(materialized='table') }}
+
+{#- Poids écrits par DATA/scripts/lda_topic_modeling.py (absents tant que le script n'a pas tourné) -#}
+{%- set weights_relation = adapter.get_relation(database=target.database, schema=target.schema, identifier='review_topic_weights') %}
+
+-- Répartition pondérée des topics LDA par banque et par ville:
+-- chaque avis compte pour le poids de chacun de ses topics (review_topic_weights)
+-- au lieu d'un seul topic dominant.
+with reviews as (
+    select
+        id,
+        banque,
+        ville,
+        sentiment
+    from {{ ref('mart_reviews_enriched') }}
+),
+
+weighted_topics as (
+    {%- if weights_relation is not none %}
+    select
+        r.banque,
+        r.ville,
+        r.sentiment,
+        w.topic_name,
+        w.topic_rank,
+        w.topic_weight
+    from reviews r
+    join {{ weights_relation }} w on r.id = w.id
+    {%- else %}
+    -- Pas encore de poids: table vide, mêmes colonnes
+    select
+        r.banque,
+        r.ville,
+        r.sentiment,
+        null::text as topic_name,
+        null::smallint as topic_rank,
+        null::real as topic_weight
+    from reviews r
+    where false
+    {%- endif %}
+)
+
+select
+    banque,
+    ville,
+    topic_name,
+    
+    -- Nombre d'avis "équivalents" du topic (somme des poids)
+    round(sum(topic_weight)::numeric, 2) as weighted_reviews,
+    
+    -- Avis où le topic apparaît, et où il est dominant
+    count(*) as reviews_with_topic,
+    count(*) filter (where topic_rank = 1) as reviews_dominant,
+    round(avg(topic_weight)::numeric, 3) as avg_topic_weight,
+    
+    -- Sentiment pondéré par le poids du topic
+    round((sum(topic_weight) filter (where sentiment = 'Positif') / nullif(sum(topic_weight), 0))::numeric, 3) as positive_share,
+    round((sum(topic_weight) filter (where sentiment = 'Negatif') / nullif(sum(topic_weight), 0))::numeric, 3) as negative_share
+
+from weighted_topics
+group by banque, ville, topic_name
+order by banque, ville, weighted_reviews desc
@@ -1,5 +1,25 @@
-{{ config(materialized='table') }}
+{{ config(
+    materialized='incremental',
+    unique_key='id',
+    incremental_strategy='delete+insert',
+    indexes=[
+        {'columns': ['id'], 'unique': True},
+        {'columns': ['created_at']},
+        {'columns': ['loaded_at']}
+    ],
+    pre_hook="{{ delete_reloaded_rows(ref('int_reviews_deduplicated')) }}"
+) }}
 
+{#- Colonnes de temp_review_topics: updated_at est ajoutée par lda_topic_modeling.py -#}
+{%- set topic_columns = [] -%}
+{%- if is_incremental() -%}
+    {%- set topics_relation = adapter.get_relation(database=target.database, schema=target.schema, identifier='temp_review_topics') -%}
+    {%- if topics_relation is not none -%}
+        {%- set topic_columns = adapter.get_columns_in_relation(topics_relation) | map(attribute='name') | list -%}
+    {%- endif -%}
+{%- endif %}
+
+-- Incrémental: nouveaux avis dédupliqués et avis dont le topic LDA a changé depuis le dernier chargement
 with base_reviews as (
     select 
         id,
@@ -11,9 +31,17 @@ with base_reviews as (
         avis_cleaned as avis,
         langue_detected as langue,
         date_avis_raw,
+        sentiment,
         created_at
     from {{ ref('int_reviews_deduplicated') }}
     where should_keep = true  -- Ne garder que les avis valides
+      and ({{ incremental_new_rows() }}
+        {%- if 'updated_at' in topic_columns %}
+        or id in (
+            select id from temp_review_topics
+            where updated_at > (select coalesce(max(loaded_at), '-infinity'::timestamp) from {{ this }})
+        )
+        {%- endif %})
 ),
 
 -- Jointure avec les topics LDA
@@ -69,11 +97,13 @@ enriched_reviews as (
         -- Date formatée en DD/MM/YYYY
         {{ format_date_dmy('date_avis_raw') }} as date_avis,
         
-        -- ANALYSE DE SENTIMENT
-        {{ analyze_sentiment('avis') }} as sentiment,
+        -- ANALYSE DE SENTIMENT (review_text_features, via int_reviews_cleaned)
+        sentiment,
         
         -- TOPIC LDA (plus sophistiqué que les mots-clés)
-        lda_topic as topic
+        lda_topic as topic,
+        
+        created_at
         
     from reviews_with_lda
 ),
@@ -91,7 +121,9 @@ final_reviews as (
         langue,
         coalesce(date_avis, 'Date inconnue') as date_avis,
         sentiment,
-        topic
+        topic,
+        created_at,
+        current_timestamp as loaded_at
         
     from enriched_reviews
     where 
@@ -1,4 +1,15 @@
-{{ config(materialized='view') }}
+{{ config(
+    materialized='incremental',
+    unique_key='id',
+    incremental_strategy='delete+insert',
+    indexes=[
+        {'columns': ['id'], 'unique': True},
+        {'columns': ['created_at']}
+    ],
+    pre_hook="{{ delete_reloaded_rows(source('raw_data', 'raw_reviews')) }}"
+) }}
+
+-- Incrémental: seuls les avis nouveaux (id ou created_at au-delà du maximum chargé) sont traités
 
 with source_data as (
     select 
@@ -12,6 +23,7 @@ with source_data as (
         date_avis,
         created_at
     from {{ source('raw_data', 'raw_reviews') }}
+    where {{ incremental_new_rows() }}
 ),
 
 -- Nettoyage basique et validation
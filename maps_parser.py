@@ -0,0 +1,167 @@
+"""Extraction des informations d'agence et des avis depuis le HTML d'une page Google Maps
+
+Le HTML (driver.page_source ou une page enregistrée) est lu en une seule passe
+par html.parser, sans navigateur ni dépendance: les fonctions s'utilisent
+telles quelles sur des pages de test.
+
+    python maps_parser.py page_agence.html --repetitions 20
+"""
+from html.parser import HTMLParser
+import argparse
+import re
+import sys
+import time
+
+# Classes CSS des champs extraits (première occurrence dans la page ou dans l'avis)
+CHAMPS_AGENCE = {"DUwDvf": "nom", "Io6YTe": "localisation", "fontDisplayLarge": "note"}
+CHAMPS_AVIS = {"wiI7pd": "texte", "rsqaWe": "date"}
+CLASSE_AVIS = "jftiEf"
+# Identifiant Maps d'un avis, attribut de l'élément CLASSE_AVIS (stable d'un crawl à l'autre)
+ATTRIBUT_ID_AVIS = "data-review-id"
+
+VALEURS_PAR_DEFAUT = {"nom": "Nom inconnu", "localisation": "Localisation inconnue", "note": "0"}
+
+ELEMENTS_VIDES = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+                  "meta", "param", "source", "track", "wbr"}
+
+ARABE = re.compile("[\u0600-\u06FF]")
+
+
+def detecter_langue(texte):
+    return "Arabe" if ARABE.search(texte) else "Français"
+
+
+def normaliser_texte(morceaux):
+    """Texte affiché d'un élément: espaces regroupés, retours à la ligne des <br> conservés"""
+    lignes = "".join(morceaux).split("\n")
+    return "\n".join(" ".join(ligne.split()) for ligne in lignes).strip()
+
+
+class ExtracteurMaps(HTMLParser):
+    """Parcours unique du HTML: champs de l'agence et liste des avis (texte, date, langue, identifiant)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.agence = {}
+        self.avis = []
+        self.avis_courant = None
+        # Une entrée par élément ouvert: (balise, actions à faire à sa fermeture)
+        self.pile = []
+        self.captures = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "br":
+            for _, morceaux in self.captures:
+                morceaux.append("\n")
+        if tag in ELEMENTS_VIDES:
+            return
+
+        classes = set()
+        for nom, valeur in attrs:
+            if nom == "class" and valeur:
+                classes.update(valeur.split())
+
+        actions = []
+        if classes:
+            if CLASSE_AVIS in classes and self.avis_courant is None:
+                self.avis_courant = {"id": dict(attrs).get(ATTRIBUT_ID_AVIS) or None}
+                actions.append(("avis", None))
+            for classe in classes:
+                if classe in CHAMPS_AGENCE and CHAMPS_AGENCE[classe] not in self.agence:
+                    actions.append(self.ouvrir_capture(self.agence, CHAMPS_AGENCE[classe]))
+                elif classe in CHAMPS_AVIS and self.avis_courant is not None \
+                        and CHAMPS_AVIS[classe] not in self.avis_courant:
+                    actions.append(self.ouvrir_capture(self.avis_courant, CHAMPS_AVIS[classe]))
+        self.pile.append((tag, actions))
+
+    def ouvrir_capture(self, cible, champ):
+        capture = ((cible, champ), [])
+        self.captures.append(capture)
+        # Réservé dès l'ouverture: une occurrence imbriquée ne relance pas la capture
+        cible[champ] = None
+        return ("capture", capture)
+
+    def handle_endtag(self, tag):
+        if tag in ELEMENTS_VIDES:
+            return
+        # HTML mal fermé: on ferme jusqu'à la balise correspondante, si elle est ouverte
+        if not any(ouvert == tag for ouvert, _ in self.pile):
+            return
+        while self.pile:
+            ouvert, actions = self.pile.pop()
+            for action, valeur in actions:
+                self.fermer(action, valeur)
+            if ouvert == tag:
+                break
+
+    def fermer(self, action, valeur):
+        if action == "capture":
+            (cible, champ), morceaux = valeur
+            self.captures.remove(valeur)
+            cible[champ] = normaliser_texte(morceaux)
+        elif action == "avis":
+            avis = self.avis_courant
+            self.avis_courant = None
+            if avis.get("texte") and avis.get("date"):
+                self.avis.append((avis["texte"], avis["date"], detecter_langue(avis["texte"]), avis["id"]))
+
+    def handle_data(self, data):
+        for _, morceaux in self.captures:
+            morceaux.append(data)
+
+    def close(self):
+        super().close()
+        # Éléments jamais fermés (page tronquée)
+        while self.pile:
+            _, actions = self.pile.pop()
+            for action, valeur in actions:
+                self.fermer(action, valeur)
+
+
+def parser_page(html):
+    """Retourne (infos de l'agence, liste des avis (texte, date, langue, identifiant)) d'une page Maps
+
+    L'identifiant est l'attribut data-review-id de l'avis, None s'il est absent.
+    """
+    extracteur = ExtracteurMaps()
+    extracteur.feed(html)
+    extracteur.close()
+
+    infos = {champ: extracteur.agence.get(champ) or defaut for champ, defaut in VALEURS_PAR_DEFAUT.items()}
+    return infos, extracteur.avis
+
+
+def extraire_infos_agence(html):
+    """Retourne (nom, localisation, note), avec les valeurs par défaut pour les champs absents"""
+    infos, _ = parser_page(html)
+    return infos["nom"], infos["localisation"], infos["note"]
+
+
+def extraire_avis(html):
+    """Retourne la liste des avis (texte, date, langue, identifiant) présents dans le HTML"""
+    _, avis = parser_page(html)
+    return avis
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extraction (et mesure du temps) sur des pages Maps enregistrées")
+    parser.add_argument("fichiers", nargs="+", help="Pages HTML enregistrées")
+    parser.add_argument("--repetitions", type=int, default=1, help="Nombre de passes pour la mesure (défaut: 1)")
+    args = parser.parse_args(argv)
+
+    for chemin in args.fichiers:
+        with open(chemin, encoding="utf-8") as f:
+            html = f.read()
+
+        debut = time.perf_counter()
+        for _ in range(max(1, args.repetitions)):
+            infos, avis = parser_page(html)
+        duree = (time.perf_counter() - debut) / max(1, args.repetitions)
+
+        print(f"{chemin}: {infos['nom']} | {infos['localisation']} | note {infos['note']} | "
+              f"{len(avis)} avis | {len(html) / 1024:.0f} Ko en {duree * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
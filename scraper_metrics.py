@@ -0,0 +1,174 @@
+"""Mesures du scraping: spans de temps par phase écrits en JSONL et rapport de synthèse
+
+Chaque span est une ligne JSON: phase, début, durée, worker, contexte hérité
+des spans englobants (banque, ville, lien) et attributs ajoutés par la phase
+(rounds de scroll ou de clics, avis extraits, délais expirés, tentatives...).
+Le rapport se recalcule à tout moment depuis le fichier, y compris pendant
+un crawl ou après plusieurs reprises:
+
+    python scraper_metrics.py scraping_output/spans.jsonl --top 10
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Phases qui englobent les autres: exclues du classement des phases
+PHASES_ENGLOBANTES = {"paire", "agence"}
+CONTEXTE = ("banque", "ville", "lien")
+
+
+class MesuresScraping:
+    """Écriture des spans, partagée par tous les workers"""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.fichier = open(chemin, "a", encoding="utf-8")
+
+    def contexte(self):
+        if not hasattr(self.local, "pile"):
+            self.local.pile = [{}]
+        return self.local.pile
+
+    @contextmanager
+    def span(self, phase, **contexte):
+        """Mesure un bloc; le dict retourné reçoit les attributs de la phase"""
+        pile = self.contexte()
+        courant = {**pile[-1], **contexte}
+        pile.append(courant)
+        attributs = {}
+        debut = datetime.now()
+        chrono = time.perf_counter()
+        try:
+            yield attributs
+        except Exception as e:
+            attributs["erreur"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            pile.pop()
+            self.ecrire({
+                "phase": phase,
+                "debut": debut.isoformat(timespec="milliseconds"),
+                "duree": round(time.perf_counter() - chrono, 4),
+                "worker": threading.current_thread().name,
+                **courant,
+                **attributs,
+            })
+
+    def ecrire(self, span):
+        with self.lock:
+            self.fichier.write(json.dumps(span, ensure_ascii=False) + "\n")
+            self.fichier.flush()
+
+    def fermer(self):
+        self.fichier.close()
+
+
+def lire_spans(chemin):
+    with open(chemin, encoding="utf-8") as f:
+        for ligne in f:
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
+
+
+def agreger(spans):
+    """Totaux par phase, banque et ville, agences les plus lentes et compteurs du crawl"""
+    phases = defaultdict(lambda: {"nombre": 0, "duree": 0.0, "max": 0.0, "expires": 0, "erreurs": 0})
+    banques = defaultdict(lambda: {"duree": 0.0, "avis": 0, "paires": 0})
+    villes = defaultdict(lambda: {"duree": 0.0, "avis": 0, "paires": 0})
+    agences = []
+    compteurs = defaultdict(int)
+
+    for span in spans:
+        phase = phases[span["phase"]]
+        phase["nombre"] += 1
+        phase["duree"] += span["duree"]
+        phase["max"] = max(phase["max"], span["duree"])
+        phase["expires"] += 1 if span.get("delai_expire") else 0
+        phase["erreurs"] += 1 if span.get("erreur") else 0
+
+        compteurs["rounds_scroll"] += span.get("rounds_scroll", 0)
+        compteurs["rounds_clics"] += span.get("rounds_clics", 0)
+        compteurs["delais_expires"] += 1 if span.get("delai_expire") else 0
+        compteurs["relances"] += max(span.get("tentatives", 1) - 1, 0)
+
+        if span["phase"] == "paire":
+            for groupe, cle in ((banques, span.get("banque")), (villes, span.get("ville"))):
+                groupe[cle]["duree"] += span["duree"]
+                groupe[cle]["avis"] += span.get("avis", 0)
+                groupe[cle]["paires"] += 1
+        elif span["phase"] == "agence":
+            agences.append(span)
+            compteurs["agences"] += 1
+            compteurs["avis"] += span.get("avis", 0)
+            compteurs["duree_agences"] += span["duree"]
+
+    return phases, banques, villes, agences, compteurs
+
+
+def debit(avis, duree):
+    return avis / duree if duree else 0.0
+
+
+def rapport(spans, top=10, sortie=sys.stdout):
+    """Affiche la synthèse: débit global, phases, banques et villes les plus lentes"""
+    phases, banques, villes, agences, compteurs = agreger(spans)
+    if not phases:
+        print("Aucun span enregistré.", file=sortie)
+        return
+
+    print("=" * 80, file=sortie)
+    print("RAPPORT DU SCRAPING", file=sortie)
+    print("=" * 80, file=sortie)
+    print(f"Agences: {compteurs['agences']}, avis: {compteurs['avis']}, "
+          f"{debit(compteurs['avis'], compteurs['duree_agences']):.2f} avis/s (temps passé dans les agences)",
+          file=sortie)
+    print(f"Rounds de scroll: {compteurs['rounds_scroll']}, rounds de clics: {compteurs['rounds_clics']}, "
+          f"délais expirés: {compteurs['delais_expires']}, relances: {compteurs['relances']}", file=sortie)
+
+    total_phases = sum(valeurs["duree"] for nom, valeurs in phases.items() if nom not in PHASES_ENGLOBANTES)
+    print("\nPhases (temps total):", file=sortie)
+    for nom, valeurs in sorted(phases.items(), key=lambda item: -item[1]["duree"]):
+        if nom in PHASES_ENGLOBANTES:
+            continue
+        part = valeurs["duree"] / total_phases if total_phases else 0.0
+        print(f"   {nom:<18} {valeurs['duree']:>10.1f}s {part:>6.1%}  {valeurs['nombre']:>6} fois  "
+              f"moy {valeurs['duree'] / valeurs['nombre']:>6.2f}s  max {valeurs['max']:>6.1f}s  "
+              f"expirés {valeurs['expires']:>4}  erreurs {valeurs['erreurs']:>4}", file=sortie)
+
+    for titre, groupe in (("Banques", banques), ("Villes", villes)):
+        print(f"\n{titre} les plus lentes:", file=sortie)
+        for cle, valeurs in sorted(groupe.items(), key=lambda item: -item[1]["duree"])[:top]:
+            print(f"   {str(cle):<28} {valeurs['duree']:>10.1f}s  {valeurs['paires']:>4} paires  "
+                  f"{valeurs['avis']:>7} avis  {debit(valeurs['avis'], valeurs['duree']):>6.2f} avis/s", file=sortie)
+
+    print("\nAgences les plus lentes:", file=sortie)
+    for span in sorted(agences, key=lambda span: -span["duree"])[:top]:
+        print(f"   {span['duree']:>8.1f}s  {span.get('avis', 0):>5} avis  {span.get('banque')} / {span.get('ville')}  "
+              f"{span.get('lien', '')[:60]}", file=sortie)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rapport de synthèse d'un fichier de spans du scraping")
+    parser.add_argument("spans", help="Fichier JSONL des spans (ex: scraping_output/spans.jsonl)")
+    parser.add_argument("--top", type=int, default=10, help="Nombre de banques, villes et agences listées (défaut: 10)")
+    args = parser.parse_args(argv)
+
+    rapport(lire_spans(args.spans), args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
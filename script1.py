@@ -1,16 +1,80 @@
-import time
+from datetime import datetime
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import queue
 import random
-import pandas as pd
+import shutil
+import sys
+import threading
+import time
+
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 
+import maps_parser
+import scraper_metrics
+
 # Chemin vers ChromeDriver
 CHROMEDRIVER_PATH = "chromedriver.exe"
 
+# Page de recherche (remplaçable par un serveur HTTP local servant des pages Maps enregistrées)
+MAPS_URL = "https://www.google.com/maps"
+
+OUTPUT_CSV = "donnees_agences_avis.csv"
+
+# Sortie en continu: une ligne JSON par agence dans parts/, paires terminées dans checkpoint.jsonl
+OUTPUT_DIR = "scraping_output"
+PARTS_DIR = "parts"
+CHECKPOINT_FILE = "checkpoint.jsonl"
+SPANS_FILE = "spans.jsonl"
+
+# Mode incrémental: un dossier (checkpoint compris) et un CSV par crawl, sans toucher au crawl complet
+OUTPUT_DIR_INCREMENTAL = "scraping_incremental"
+OUTPUT_CSV_INCREMENTAL = "avis_incremental_{horodatage}.csv"
+
+# Nombre de chargements d'une page d'agence avant abandon
+TENTATIVES_PAGE = 2
+
+# Nouvelles sessions Chrome qu'un worker peut ouvrir après la perte de la sienne
+REDEMARRAGES_CHROME = 3
+
+# Mode incrémental: clés des avis les plus récents de chaque agence, conservées d'un crawl à l'autre
+WATERMARKS_FILE = "watermarks_avis.jsonl"
+WATERMARK_TAILLE = 5
+# Avis sans identifiant Maps: avis consécutifs du watermark à retrouver dans le même ordre pour s'arrêter
+# (un texte générique seul, "Très bien", peut être celui d'un nouvel avis)
+WATERMARK_CONFIRMATIONS = 2
+
+# Tri des avis "Les plus récents" (menu du bouton Trier de l'onglet Avis)
+SELECTEUR_BOUTON_TRI = ("button[aria-label*='Trier'], button[aria-label*='Sort'], "
+                        "button[data-value='Trier'], button[data-value='Sort']")
+SELECTEUR_TRI_RECENTS = "[role='menuitemradio'][data-index='1']"
+COLONNES = ["Banque", "Ville", "Nom Agence", "Localisation", "Note", "Avis", "Date Avis"]
+
+# Sélecteurs des listes chargées au scroll
+SELECTEUR_AGENCES = ".hfpxzc"
+SELECTEUR_AVIS = ".jftiEf"
+
+# Scripts de scroll: le panneau de résultats, puis le dernier avis affiché
+SCRIPT_SCROLL_AGENCES = """
+const feed = document.querySelector('.m6QErb');
+if (feed) { feed.scrollTo(0, feed.scrollHeight); }
+"""
+SCRIPT_SCROLL_AVIS = """
+const avis = document.querySelectorAll('.jftiEf');
+if (avis.length) { avis[avis.length - 1].scrollIntoView(); }
+window.scrollTo(0, document.body.scrollHeight);
+"""
+
 # Liste des banques et villes à scraper
 BANQUES = [
     "CIH Bank", "Attijariwafa Bank", "BMCE Bank", "Banque Populaire",
@@ -29,167 +93,657 @@ VILLES = [
 ]
 
 
+def creer_driver(headless=False, chromedriver_path=CHROMEDRIVER_PATH):
+    """Démarre une session Chrome (une par worker)"""
+    options = webdriver.ChromeOptions()
+    options.add_argument("--start-maximized")
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
 
-options = webdriver.ChromeOptions()
-options.add_argument("--start-maximized")
+    service = Service(chromedriver_path)
+    return webdriver.Chrome(service=service, options=options)
 
-service = Service(CHROMEDRIVER_PATH)
-driver = webdriver.Chrome(service=service, options=options)
 
-# Stockage des résultats
-resultats = []
-agences_scrapees = set()
+def empreinte_avis(texte):
+    """Empreinte d'un avis: son texte seul (la date affichée est relative et change d'un crawl à l'autre)"""
+    return hashlib.sha1(texte.encode('utf-8')).hexdigest()[:16]
 
-def scroll_to_load_all_agences():
-    try:
-        last_height = driver.execute_script("return document.querySelector('.m6QErb').scrollHeight")
-        while True:
-            driver.execute_script("document.querySelector('.m6QErb').scrollTo(0, document.querySelector('.m6QErb').scrollHeight);")
-            time.sleep(random.uniform(2, 4))
-            new_height = driver.execute_script("return document.querySelector('.m6QErb').scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
-    except:
-        print("Fin du scrolling des agences.")
 
-def chercher_agences(nom_banque, ville):
-    print(f"\n Recherche de toutes les agences de {nom_banque} à {ville}...")
-    
-    driver.get("https://www.google.com/maps")
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "q")))
+def cle_avis(avis):
+    """Clé d'un avis (texte, date, langue, identifiant) dans le watermark: identifiant Maps, sinon empreinte du texte"""
+    texte, _, _, id_avis = avis
+    return f"id:{id_avis}" if id_avis else empreinte_avis(texte)
 
-    search_box = driver.find_element(By.NAME, "q")
-    search_box.send_keys(f"{nom_banque} {ville}")
-    search_box.send_keys(Keys.RETURN)
 
-    try:
-        WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, "hfpxzc")))
+def position_avis_connu(avis, watermark):
+    """Position du premier avis déjà connu dans une liste triée du plus récent (None si aucun)
 
-    except:
-        print(f"⚠️ Aucune agence trouvée pour {nom_banque} à {ville}")
-        return []
+    Un identifiant Maps du watermark suffit. Une empreinte de texte doit être
+    suivie, dans les avis affichés, des WATERMARK_CONFIRMATIONS - 1 clés
+    suivantes du watermark: un texte générique identique à celui d'un ancien
+    avis n'arrête pas le chargement (watermark plus court: tout est rechargé).
+    """
+    rangs = {}
+    for rang, cle in enumerate(watermark):
+        rangs.setdefault(cle, rang)
 
-    scroll_to_load_all_agences()
+    cles = [cle_avis(un_avis) for un_avis in avis]
+    for position, cle in enumerate(cles):
+        rang = rangs.get(cle)
+        if rang is None:
+            continue
+        if cle.startswith("id:"):
+            return position
+        suite = watermark[rang:rang + WATERMARK_CONFIRMATIONS]
+        if len(suite) == WATERMARK_CONFIRMATIONS and cles[position:position + WATERMARK_CONFIRMATIONS] == suite:
+            return position
+    return None
 
-    agences = driver.find_elements(By.CLASS_NAME, "hfpxzc")
-    liens_agences = [agence.get_attribute("href") for agence in agences if agence.get_attribute("href")]
 
-    print(f" {len(liens_agences)} agences trouvées pour {nom_banque} à {ville}.")
-    return liens_agences
+def lire_jsonl(chemin):
+    """Lignes JSON d'un fichier; une dernière ligne tronquée (arrêt brutal) est ignorée"""
+    with open(chemin, encoding='utf-8') as f:
+        for ligne in f:
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
 
-def cliquer_plus_davis():
-    """Clique sur 'Plus d'avis' si disponible"""
-    try:
-        while True:
-            bouton = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "w8nwRe"))
-            )
-            bouton.click()
-            time.sleep(2)
-    except:
-        print(" Tous les avis visibles ont été chargés.")
-
-def charger_tous_les_avis():
-    try:
-        cliquer_plus_davis()
-        last_height = driver.execute_script("return document.body.scrollHeight")
+
+class EtatScraping:
+    """Agences déjà traitées et paires terminées, partagés par tous les workers et écrits au fil de l'eau
+
+    Chaque agence scrapée est ajoutée (avec ses avis) sur une ligne du fichier
+    part de l'exécution, puis synchronisée sur disque: les fichiers part
+    servent aussi de checkpoint des agences. Une exécution relancée sur le
+    même dossier recharge les liens et paires déjà traités et ne refait que
+    le reste.
+
+    Les watermarks (clés des avis les plus récents par agence, voir cle_avis) sont
+    dans un fichier à part, conservé quand le dossier de sortie est vidé.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, watermarks_path=WATERMARKS_FILE):
+        self.lock = threading.Lock()
+        self.output_dir = output_dir
+        self.parts_dir = os.path.join(output_dir, PARTS_DIR)
+        self.checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.agences_scrapees = set()
+        self.paires_terminees = set()
+        self.nb_agences = 0
+        self.nb_avis = 0
+
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self.charger_checkpoint()
+
+        # Nouveau fichier part à chaque exécution: jamais d'ajout derrière une ligne tronquée
+        nom_part = f"avis_{datetime.now():%Y%m%d_%H%M%S}_{os.getpid()}.jsonl"
+        self.part = open(os.path.join(self.parts_dir, nom_part), 'a', encoding='utf-8')
+        self.checkpoint = open(self.checkpoint_path, 'a', encoding='utf-8')
+
+        self.watermarks = {}
+        self.charger_watermarks(watermarks_path)
+        self.fichier_watermarks = open(watermarks_path, 'a', encoding='utf-8')
+
+        # Spans de temps par phase (voir scraper_metrics.py), ajoutés à chaque reprise
+        self.mesures = scraper_metrics.MesuresScraping(os.path.join(output_dir, SPANS_FILE))
+
+    def fichiers_parts(self):
+        return sorted(glob.glob(os.path.join(self.parts_dir, "*.jsonl")))
+
+    def charger_checkpoint(self):
+        """Recharge les agences déjà écrites et les paires terminées par les exécutions précédentes"""
+        for chemin in self.fichiers_parts():
+            for agence in lire_jsonl(chemin):
+                self.agences_scrapees.add(agence['lien'])
+        if os.path.exists(self.checkpoint_path):
+            paires = [(paire['banque'], paire['ville']) for paire in lire_jsonl(self.checkpoint_path)]
+            self.paires_terminees.update(paires)
+
+            # Réécrit sans une dernière ligne tronquée: la prochaine paire ne s'y colle pas
+            with open(self.checkpoint_path + '.tmp', 'w', encoding='utf-8') as f:
+                for banque, ville in dict.fromkeys(paires):
+                    f.write(json.dumps({'banque': banque, 'ville': ville}, ensure_ascii=False) + "\n")
+            os.replace(self.checkpoint_path + '.tmp', self.checkpoint_path)
+
+        if self.agences_scrapees or self.paires_terminees:
+            print(f"Reprise: {len(self.paires_terminees)} paires terminées, "
+                  f"{len(self.agences_scrapees)} agences déjà scrapées ({self.output_dir})")
+
+    def charger_watermarks(self, chemin):
+        """Recharge les watermarks (dernière ligne par agence) et réécrit le fichier compacté"""
+        if not os.path.exists(chemin):
+            return
+        for ligne in lire_jsonl(chemin):
+            self.watermarks[ligne['lien']] = ligne['empreintes']
+
+        with open(chemin + '.tmp', 'w', encoding='utf-8') as f:
+            for lien, empreintes in self.watermarks.items():
+                f.write(json.dumps({'lien': lien, 'empreintes': empreintes}, ensure_ascii=False) + "\n")
+        os.replace(chemin + '.tmp', chemin)
+        print(f"Watermarks: {len(self.watermarks)} agences ({chemin})")
+
+    def watermark(self, lien):
+        """Clés des avis les plus récents connus d'une agence, du plus récent au plus ancien"""
+        with self.lock:
+            return list(self.watermarks.get(lien, []))
+
+    @staticmethod
+    def ajouter_ligne(fichier, donnees):
+        fichier.write(json.dumps(donnees, ensure_ascii=False) + "\n")
+        fichier.flush()
+        os.fsync(fichier.fileno())
+
+    def reserver_agence(self, lien):
+        """Réserve une agence: False si un worker l'a déjà prise (test et ajout atomiques)"""
+        with self.lock:
+            if lien in self.agences_scrapees:
+                return False
+            self.agences_scrapees.add(lien)
+            return True
+
+    def enregistrer_agence(self, agence, empreintes=None):
+        """Écrit une agence et ses avis sur disque dès qu'elle est scrapée, puis son nouveau watermark"""
+        with self.lock:
+            self.ajouter_ligne(self.part, agence)
+            self.nb_agences += 1
+            self.nb_avis += len(agence['avis'])
+
+            # Après les avis: un arrêt entre les deux fait au pire rescraper les nouveaux avis
+            if empreintes:
+                self.ajouter_ligne(self.fichier_watermarks, {'lien': agence['lien'], 'empreintes': empreintes})
+                self.watermarks[agence['lien']] = empreintes
+
+    def terminer_paire(self, banque, ville):
+        with self.lock:
+            self.ajouter_ligne(self.checkpoint, {'banque': banque, 'ville': ville})
+            self.paires_terminees.add((banque, ville))
+
+    def fermer(self):
+        self.part.close()
+        self.checkpoint.close()
+        self.fichier_watermarks.close()
+        self.mesures.fermer()
+
+    def exporter_csv(self, output_csv=OUTPUT_CSV):
+        """Fusionne tous les fichiers part en un CSV (une ligne par avis), sans tout charger en mémoire"""
+        liens_exportes = set()
+        nb_avis = 0
+        with open(output_csv + '.tmp', 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f, delimiter=';', lineterminator='\n')
+            writer.writerow(COLONNES)
+            for chemin in self.fichiers_parts():
+                for agence in lire_jsonl(chemin):
+                    # Agence réécrite après un arrêt entre deux exécutions: gardée une seule fois
+                    if agence['lien'] in liens_exportes:
+                        continue
+                    liens_exportes.add(agence['lien'])
+                    for texte, date, *_ in agence['avis']:
+                        writer.writerow([agence['banque'], agence['ville'], agence['nom'],
+                                         agence['localisation'], agence['note'], texte, date])
+                        nb_avis += 1
+        os.replace(output_csv + '.tmp', output_csv)
+        return nb_avis, len(liens_exportes)
+
+
+class AttenteAdaptative:
+    """Délai d'attente de nouveaux éléments, ajusté sur les temps de chargement observés"""
+
+    def __init__(self, initial=5.0, minimum=1.5, maximum=15.0, facteur=3.0, lissage=0.3):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.facteur = facteur
+        self.lissage = lissage
+        self.estimation = None
+
+    def timeout(self):
+        """Délai du prochain round: plusieurs fois le temps de chargement moyen, borné"""
+        if self.estimation is None:
+            return self.initial
+        return min(self.maximum, max(self.minimum, self.facteur * self.estimation))
+
+    def observer(self, secondes):
+        """Enregistre le temps mis par la page pour afficher de nouveaux éléments"""
+        if self.estimation is None:
+            self.estimation = secondes
+        else:
+            self.estimation = self.lissage * secondes + (1 - self.lissage) * self.estimation
+
+
+class ScraperAgences:
+    """Scraping des agences et avis Google Maps avec une session Chrome"""
+
+    def __init__(self, driver, etat, maps_url=MAPS_URL, nom="main", pause_min=2, pause_max=5, incremental=False):
+        self.driver = driver
+        self.etat = etat
+        self.maps_url = maps_url
+        self.nom = nom
+        self.incremental = incremental
+        self.mesures = etat.mesures
+        self.pause_min = pause_min
+        self.pause_max = pause_max
+
+        # Temps de chargement appris séparément pour la liste des agences et les avis
+        self.attente_agences = AttenteAdaptative()
+        self.attente_avis = AttenteAdaptative()
+
+    def log(self, message):
+        print(f"[{self.nom}] {message}")
+
+    def compter(self, selecteur):
+        return self.driver.execute_script("return document.querySelectorAll(arguments[0]).length;", selecteur)
+
+    def attendre_nouveaux_elements(self, selecteur, avant, attente):
+        """Attend que le nombre d'éléments dépasse `avant`, retourne (nombre, secondes attendues)
+
+        Le délai vient de `attente`; s'il expire, le nombre retourné reste `avant`.
+        """
+        def nouveaux_elements(driver):
+            nombre = self.compter(selecteur)
+            return nombre if nombre > avant else False
+
+        debut = time.perf_counter()
+        try:
+            nombre = WebDriverWait(self.driver, attente.timeout(), poll_frequency=0.2).until(nouveaux_elements)
+        except TimeoutException:
+            return avant, time.perf_counter() - debut
+
+        secondes = time.perf_counter() - debut
+        attente.observer(secondes)
+        return nombre, secondes
+
+    def scroller_jusqu_a_la_fin(self, script_scroll, selecteur, attente, arret=None):
+        """Scroll tant que la page ajoute des éléments, retourne (nombre, rounds, secondes attendues)
+
+        arret: fonction appelée après chaque round qui a ajouté des éléments; True arrête le scroll.
+        """
+        nombre = self.compter(selecteur)
+        rounds = 0
+        attente_totale = 0.0
         while True:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                print("🔄 Aucun nouvel avis chargé, arrêt du scrolling.")
-                break
-            last_height = new_height
-    except Exception as e:
-        print(" Erreur lors du scrolling :", e)
+            self.driver.execute_script(script_scroll)
+            rounds += 1
+            nouveau, secondes = self.attendre_nouveaux_elements(selecteur, nombre, attente)
+            attente_totale += secondes
+            if nouveau <= nombre:
+                return nombre, rounds, attente_totale
+            nombre = nouveau
+            if arret is not None and arret():
+                return nombre, rounds, attente_totale
+
+    def scroll_to_load_all_agences(self):
+        with self.mesures.span("scroll_agences") as span:
+            try:
+                nombre, rounds, attente_totale = self.scroller_jusqu_a_la_fin(
+                    SCRIPT_SCROLL_AGENCES, SELECTEUR_AGENCES, self.attente_agences
+                )
+                span.update(elements=nombre, rounds_scroll=rounds, attente=round(attente_totale, 3))
+                self.log(f"Fin du scrolling des agences: {nombre} résultats, {rounds} rounds, "
+                         f"{attente_totale:.1f}s d'attente")
+            except Exception as e:
+                span["erreur"] = str(e)
+                self.log(f"Fin du scrolling des agences : {e}")
+
+    def chercher_agences(self, nom_banque, ville):
+        self.log(f"Recherche de toutes les agences de {nom_banque} à {ville}...")
+        driver = self.driver
+
+        with self.mesures.span("recherche") as span:
+            driver.get(self.maps_url)
+            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.NAME, "q")))
+
+            search_box = driver.find_element(By.NAME, "q")
+            search_box.send_keys(f"{nom_banque} {ville}")
+            search_box.send_keys(Keys.RETURN)
 
-def extraire_infos_agence():
-    """Extrait les informations d'une agence"""
-    try:
-        wait = WebDriverWait(driver, 15)
+            try:
+                WebDriverWait(driver, 10).until(EC.presence_of_all_elements_located((By.CLASS_NAME, "hfpxzc")))
+            except Exception:
+                span["delai_expire"] = True
+                self.log(f"⚠️ Aucune agence trouvée pour {nom_banque} à {ville}")
+                return []
 
-        # Extraction du nom de l'agence
-        try:
-            nom = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "DUwDvf"))).text
-        except:
-            nom = "Nom inconnu"
+        self.scroll_to_load_all_agences()
 
-        # Extraction de l'adresse/localisation
-        try:
-            localisation = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "Io6YTe"))).text
-        except:
-            localisation = "Localisation inconnue"
+        agences = driver.find_elements(By.CLASS_NAME, "hfpxzc")
+        liens_agences = [agence.get_attribute("href") for agence in agences if agence.get_attribute("href")]
 
-        # Extraction de la note
-        try:
-            note = wait.until(EC.presence_of_element_located((By.CLASS_NAME, "fontDisplayLarge"))).text
-        except:
-            note = "0"
+        self.log(f"{len(liens_agences)} agences trouvées pour {nom_banque} à {ville}.")
+        return liens_agences
 
-        print(f" Nom : {nom},  Localisation : {localisation},  Note : {note}")
-        return nom, localisation, note
-    except Exception as e:
-        print(f"⚠️ Erreur lors de l'extraction des informations de l'agence : {e}")
-        return "Inconnu", "Inconnu", "0"
-
-def extraire_avis():
-    """Extrait les avis visibles"""
-    charger_tous_les_avis()
-    avis_data = []
-    try:
-        avis_elements = driver.find_elements(By.CLASS_NAME, "jftiEf")
-        for avis in avis_elements:
+    def cliquer_plus_davis(self):
+        """Clique sur 'Plus d'avis' tant qu'il est disponible et ajoute des avis, retourne (rounds, secondes)"""
+        rounds = 0
+        attente_totale = 0.0
+        with self.mesures.span("clics_plus_davis") as span:
+            try:
+                WebDriverWait(self.driver, self.attente_avis.timeout()).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "w8nwRe"))
+                )
+            except TimeoutException:
+                span["bouton"] = False
+                return rounds, attente_totale
+
+            while True:
+                boutons = self.driver.find_elements(By.CLASS_NAME, "w8nwRe")
+                if not boutons:
+                    break
+                nombre = self.compter(SELECTEUR_AVIS)
+                try:
+                    boutons[0].click()
+                except Exception:
+                    break
+                rounds += 1
+                nouveau, secondes = self.attendre_nouveaux_elements(SELECTEUR_AVIS, nombre, self.attente_avis)
+                attente_totale += secondes
+                if nouveau <= nombre:
+                    break
+            span.update(rounds_clics=rounds, attente=round(attente_totale, 3))
+        return rounds, attente_totale
+
+    def trier_par_plus_recents(self):
+        """Trie les avis du plus récent au plus ancien, retourne False si le menu de tri est introuvable"""
+        with self.mesures.span("tri") as span:
             try:
-                texte = avis.find_element(By.CLASS_NAME, "wiI7pd").text
-                date = avis.find_element(By.CLASS_NAME, "rsqaWe").text
+                avis_affiches = self.driver.find_elements(By.CSS_SELECTOR, SELECTEUR_AVIS)
+                bouton = WebDriverWait(self.driver, self.attente_avis.timeout()).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, SELECTEUR_BOUTON_TRI))
+                )
+                bouton.click()
+                option = WebDriverWait(self.driver, self.attente_avis.timeout()).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, SELECTEUR_TRI_RECENTS))
+                )
+                option.click()
+
+                # La liste est rechargée: attendre que les anciens avis soient remplacés
+                if avis_affiches:
+                    WebDriverWait(self.driver, self.attente_avis.timeout()).until(EC.staleness_of(avis_affiches[0]))
+                span["trie"] = True
+                return True
+            except Exception:
+                span.update(trie=False, delai_expire=True)
+                return False
+
+    def avis_connu_affiche(self, watermark):
+        return position_avis_connu(maps_parser.extraire_avis(self.driver.page_source), watermark) is not None
+
+    def charger_tous_les_avis(self, watermark=None):
+        """Charge les avis (jusqu'au premier avis du watermark), retourne True si triés du plus récent"""
+        trie = False
+        try:
+            rounds_clics, attente_clics = self.cliquer_plus_davis()
+            trie = self.trier_par_plus_recents()
 
-                # Vérifier si l'avis est en arabe
-                if any("\u0600" <= char <= "\u06FF" for char in texte):
-                    langue = "Arabe"
+            arret = None
+            if watermark:
+                if trie:
+                    arret = lambda: self.avis_connu_affiche(watermark)
                 else:
-                    langue = "Français"
-
-                avis_data.append((texte, date, langue))
-                print(f" Date : {date}\n Avis ({langue}) : {texte}\n" + "-"*50)
-            except:
-                continue
-    except Exception as e:
-        print("⚠️ Erreur lors de l'extraction des avis :", e)
-    return avis_data
-
-# Lancer le scraping
-for banque in BANQUES:
-    for ville in VILLES:
-        liens = chercher_agences(banque, ville)
-        for lien in liens:
-            if lien in agences_scrapees:
-                continue
-            agences_scrapees.add(lien)
-
-            driver.get(lien)
+                    self.log("⚠️ Tri par date indisponible: chargement complet des avis")
+
+            with self.mesures.span("scroll_avis") as span:
+                if arret is not None and arret():
+                    span.update(rounds_scroll=0, arret_avis_connu=True)
+                    self.log(f"🔄 Avis connu déjà affiché: aucun scroll ({rounds_clics} clics, "
+                             f"{attente_clics:.1f}s d'attente)")
+                    return trie
+
+                nombre, rounds, attente_totale = self.scroller_jusqu_a_la_fin(
+                    SCRIPT_SCROLL_AVIS, SELECTEUR_AVIS, self.attente_avis, arret
+                )
+                span.update(elements=nombre, rounds_scroll=rounds, attente=round(attente_totale, 3))
+            self.log(f"🔄 {nombre} avis chargés: {rounds_clics} clics et {rounds} rounds de scroll, "
+                     f"{attente_clics + attente_totale:.1f}s d'attente")
+        except Exception as e:
+            self.log(f"Erreur lors du scrolling : {e}")
+        return trie
+
+    def extraire_infos_agence(self):
+        """Extrait les informations d'une agence depuis le HTML de la page (un seul aller-retour)"""
+        with self.mesures.span("infos") as span:
+            # Le titre est déjà affiché; l'adresse peut arriver juste après
             try:
-                WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CLASS_NAME, "DUwDvf")))
-
-            except:
-                print(f"⚠️ Impossible de charger la page de l'agence {lien}")
-                continue
-
-            nom, localisation, note = extraire_infos_agence()
-            avis = extraire_avis()
+                WebDriverWait(self.driver, 3).until(EC.presence_of_element_located((By.CLASS_NAME, "Io6YTe")))
+            except TimeoutException:
+                span["delai_expire"] = True
+            nom, localisation, note = maps_parser.extraire_infos_agence(self.driver.page_source)
+        self.log(f"Nom : {nom},  Localisation : {localisation},  Note : {note}")
+        return nom, localisation, note
 
-            # Enregistrement dans la liste des résultats
-            for texte, date, langue in avis:
-                resultats.append([banque, ville, nom, localisation, note, texte, date])
+    def extraire_avis(self, watermark=None):
+        """Charge les avis puis les extrait du HTML de la page en une passe, retourne (avis, triés par date)
+
+        Avec un watermark (clés des avis connus) et des avis triés du plus récent,
+        seuls les avis plus récents que le premier avis connu sont retournés.
+        """
+        trie = self.charger_tous_les_avis(watermark)
+        with self.mesures.span("extraction") as span:
+            html = self.driver.page_source
+            avis_data = maps_parser.extraire_avis(html)
+            span.update(octets=len(html), avis_page=len(avis_data))
+            if watermark and trie:
+                position = position_avis_connu(avis_data, watermark)
+                if position is not None:
+                    avis_data = avis_data[:position]
+
+        for texte, date, langue, _ in avis_data:
+            self.log(f"Date : {date}\n Avis ({langue}) : {texte}\n" + "-"*50)
+        return avis_data, trie
+
+    def charger_page_agence(self, lien):
+        """Ouvre la page d'une agence (nouvelle tentative si le titre n'apparaît pas), retourne False en cas d'échec"""
+        with self.mesures.span("chargement_page") as span:
+            for tentative in range(1, TENTATIVES_PAGE + 1):
+                span["tentatives"] = tentative
+                self.driver.get(lien)
+                try:
+                    WebDriverWait(self.driver, 15).until(EC.presence_of_element_located((By.CLASS_NAME, "DUwDvf")))
+                    return True
+                except Exception:
+                    continue
+            span["delai_expire"] = True
+            return False
+
+    def scraper_agence(self, banque, ville, lien):
+        """Scrape une agence, retourne (informations et avis, nouveau watermark) ou None si la page ne charge pas"""
+        with self.mesures.span("agence", lien=lien) as span:
+            if not self.charger_page_agence(lien):
+                span["avis"] = 0
+                self.log(f"⚠️ Impossible de charger la page de l'agence {lien}")
+                return None
+
+            nom, localisation, note = self.extraire_infos_agence()
+            watermark = self.etat.watermark(lien)
+            avis, trie = self.extraire_avis(watermark if self.incremental else None)
+            span["avis"] = len(avis)
+
+        # Nouveau watermark seulement si l'ordre des avis est fiable (du plus récent au plus ancien)
+        empreintes = None
+        if trie and avis:
+            empreintes = [cle_avis(un_avis) for un_avis in avis]
+            if self.incremental:
+                # Ordre conservé (sans dédoublonnage): position_avis_connu compare des suites de clés
+                empreintes += watermark
+            empreintes = empreintes[:WATERMARK_TAILLE]
+
+        self.log(f"✅ {nom} - {len(avis)} {'nouveaux ' if self.incremental and watermark else ''}avis enregistrés.")
+        agence = {
+            'lien': lien, 'banque': banque, 'ville': ville, 'nom': nom,
+            'localisation': localisation, 'note': note, 'avis': avis,
+        }
+        return agence, empreintes
+
+    def scraper_paire(self, banque, ville):
+        """Scrape toutes les agences d'une banque dans une ville non encore prises par un autre worker"""
+        with self.mesures.span("paire", banque=banque, ville=ville) as span:
+            span.update(agences=0, avis=0)
+            for lien in self.chercher_agences(banque, ville):
+                if not self.etat.reserver_agence(lien):
+                    continue
+
+                resultat = self.scraper_agence(banque, ville, lien)
+                if resultat is None:
+                    continue
+                with self.mesures.span("ecriture"):
+                    self.etat.enregistrer_agence(*resultat)
+                span["agences"] += 1
+                span["avis"] += len(resultat[0]['avis'])
+
+                with self.mesures.span("pause"):
+                    time.sleep(random.uniform(self.pause_min, self.pause_max))
+
+            # Paire marquée terminée seulement si toutes ses agences ont été parcourues
+            self.etat.terminer_paire(banque, ville)
+
+
+def quitter_driver(driver):
+    """Ferme une session Chrome, même déjà perdue"""
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def worker(numero, jobs, etat, headless, chromedriver_path, maps_url, incremental=False):
+    """Boucle d'un worker: une session Chrome, des paires (banque, ville) prises dans la file partagée
+
+    Si la session Chrome est perdue (WebDriverException hors délai expiré),
+    la paire en cours retourne dans la file et le worker ouvre une nouvelle
+    session (au plus REDEMARRAGES_CHROME fois): une session morte ferait
+    échouer aussitôt, sans checkpoint, toutes les paires qu'il prendrait.
+    """
+    nom = f"W{numero}"
+    scraper = None
+    redemarrages = 0
+    try:
+        while True:
+            if scraper is None:
+                try:
+                    driver = creer_driver(headless, chromedriver_path)
+                except Exception as e:
+                    print(f"[{nom}] ⚠️ Impossible de démarrer Chrome : {e}")
+                    return
+                scraper = ScraperAgences(driver, etat, maps_url, nom=nom, incremental=incremental)
 
-            print(f"✅ {nom} - {len(avis)} avis enregistrés.\n")
-            time.sleep(random.uniform(2, 5))
+            try:
+                banque, ville = jobs.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                scraper.scraper_paire(banque, ville)
+            except TimeoutException as e:
+                scraper.log(f"⚠️ Délai expiré pour {banque} à {ville} : {e}")
+            except WebDriverException as e:
+                jobs.put((banque, ville))
+                scraper.log(f"⚠️ Session Chrome perdue pendant {banque} à {ville}, paire remise dans la file : {e}")
+                quitter_driver(scraper.driver)
+                scraper = None
+                redemarrages += 1
+                if redemarrages > REDEMARRAGES_CHROME:
+                    print(f"[{nom}] ⚠️ {REDEMARRAGES_CHROME} redémarrages de Chrome atteints: arrêt du worker")
+                    return
+            except Exception as e:
+                scraper.log(f"⚠️ Erreur pour {banque} à {ville} : {e}")
+            finally:
+                jobs.task_done()
+    finally:
+        if scraper is not None:
+            quitter_driver(scraper.driver)
+
+
+def lancer_scraping(etat, banques=BANQUES, villes=VILLES, workers=1, headless=False,
+                    chromedriver_path=CHROMEDRIVER_PATH, maps_url=MAPS_URL, incremental=False):
+    """Répartit les paires (banque, ville) non terminées entre N sessions Chrome"""
+    jobs = queue.Queue()
+    for banque in banques:
+        for ville in villes:
+            if (banque, ville) not in etat.paires_terminees:
+                jobs.put((banque, ville))
+    print(f"{jobs.qsize()} paires (banque, ville) à scraper avec {workers} worker(s)")
+
+    threads = [
+        threading.Thread(
+            target=worker, name=f"W{numero}",
+            args=(numero, jobs, etat, headless, chromedriver_path, maps_url, incremental)
+        )
+        for numero in range(1, min(workers, jobs.qsize()) + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if not jobs.empty():
+        print(f"⚠️ {jobs.qsize()} paires (banque, ville) non traitées (aucun worker disponible)")
+
+
+def chemins_sortie(output_dir=None, output=None, incremental=False, horodatage=None):
+    """Dossier d'état et CSV d'une exécution (output_dir, output), valeurs par défaut selon le mode
+
+    Le crawl complet reprend toujours OUTPUT_DIR et réécrit OUTPUT_CSV. Un crawl
+    incrémental a son propre dossier horodaté: le checkpoint du crawl complet
+    (toutes les paires terminées) ne lui fait rien sauter, et son CSV ne
+    contient que les nouveaux avis, à importer avec import_raw_data.py --incremental.
+    """
+    if not incremental:
+        return output_dir or OUTPUT_DIR, output or OUTPUT_CSV
+    horodatage = horodatage or f"{datetime.now():%Y%m%d_%H%M%S}"
+    return (output_dir or os.path.join(OUTPUT_DIR_INCREMENTAL, horodatage),
+            output or OUTPUT_CSV_INCREMENTAL.format(horodatage=horodatage))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scraping des agences bancaires et de leurs avis sur Google Maps")
+    parser.add_argument('--workers', type=int, default=1, help="Nombre de sessions Chrome en parallèle (défaut: 1)")
+    parser.add_argument('--headless', action=argparse.BooleanOptionalAction, default=None,
+                        help="Chrome sans fenêtre (défaut: activé dès 2 workers)")
+    parser.add_argument('--banques', nargs='+', default=BANQUES, help="Banques à scraper (défaut: toutes)")
+    parser.add_argument('--villes', nargs='+', default=VILLES, help="Villes à scraper (défaut: toutes)")
+    parser.add_argument('--maps-url', default=MAPS_URL, help="Page de recherche (ex: serveur local de test)")
+    parser.add_argument('--chromedriver', default=CHROMEDRIVER_PATH, help="Chemin vers ChromeDriver")
+    parser.add_argument('--output', default=None,
+                        help=f"Fichier CSV de sortie (défaut: {OUTPUT_CSV}, "
+                             f"{OUTPUT_CSV_INCREMENTAL.format(horodatage='<horodatage>')} avec --incremental)")
+    parser.add_argument('--output-dir', default=None,
+                        help=f"Dossier des fichiers part et du checkpoint (défaut: {OUTPUT_DIR}, "
+                             f"{OUTPUT_DIR_INCREMENTAL}/<horodatage> avec --incremental)")
+    parser.add_argument('--recommencer', action='store_true',
+                        help="Ignorer le checkpoint et repartir de zéro (supprime le dossier de sortie)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Ne charger que les avis plus récents que le watermark de chaque agence "
+                             "(dossier et CSV propres au crawl)")
+    parser.add_argument('--watermarks', default=WATERMARKS_FILE,
+                        help=f"Fichier des watermarks par agence (défaut: {WATERMARKS_FILE})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    headless = args.headless if args.headless is not None else args.workers > 1
+
+    output_dir, output = chemins_sortie(args.output_dir, args.output, args.incremental)
+    if args.recommencer:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    etat = EtatScraping(output_dir, args.watermarks)
+    if args.incremental and args.output_dir is None:
+        print(f"Crawl incrémental dans {output_dir} (reprise après arrêt: --output-dir {output_dir})")
+
+    # Lancer le scraping (interrompu: relancer la même commande pour reprendre)
+    try:
+        lancer_scraping(etat, args.banques, args.villes, max(1, args.workers), headless,
+                        args.chromedriver, args.maps_url, args.incremental)
+    finally:
+        etat.fermer()
+    print(f"Cette exécution: {etat.nb_agences} agences, {etat.nb_avis} avis écrits dans {etat.parts_dir}")
 
+    nb_avis, nb_agences = etat.exporter_csv(output)
+    print(f"\nDonnées enregistrées: {nb_avis} avis, {nb_agences} agences -> {output}")
 
-df = pd.DataFrame(resultats, columns=["Banque", "Ville", "Nom Agence", "Localisation", "Note", "Avis", "Date Avis"])
-df.to_csv("donnees_agences_avis.csv", index=False, encoding="utf-8-sig", sep=";")
+    scraper_metrics.rapport(scraper_metrics.lire_spans(etat.mesures.chemin))
+    return 0
 
-print("\nDonnées enregistrées ")
 
-driver.quit()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""Configuration commune des tests: modules du dépôt importables et pages enregistrées de tests/fixtures"""
+import os
+import sys
+
+import pytest
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(RACINE, "tests", "fixtures")
+
+sys.path.insert(0, RACINE)
+
+
+@pytest.fixture
+def page_agence():
+    """HTML d'une page d'agence Maps enregistrée (4 avis dont un sans texte)"""
+    with open(os.path.join(FIXTURES_DIR, "page_agence_maps.html"), encoding="utf-8") as f:
+        return f.read()
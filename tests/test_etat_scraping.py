@@ -0,0 +1,115 @@
+"""Reprise et dédoublonnage de EtatScraping sur une sortie de scraping enregistrée (sans Chrome)"""
+import csv
+import json
+import os
+import shutil
+
+import pytest
+
+import script1
+from conftest import FIXTURES_DIR
+
+MAARIF = "https://www.google.com/maps/place/agence-maarif"
+GAUTHIER = "https://www.google.com/maps/place/agence-gauthier"
+AGDAL = "https://www.google.com/maps/place/agence-agdal"
+HASSAN = "https://www.google.com/maps/place/agence-hassan"
+
+
+@pytest.fixture
+def etat(tmp_path):
+    """EtatScraping relancé sur une copie de la sortie enregistrée (part et checkpoint tronqués par un arrêt)"""
+    output_dir = tmp_path / "scraping_output"
+    shutil.copytree(os.path.join(FIXTURES_DIR, "scraping_output"), output_dir)
+    watermarks = tmp_path / "watermarks_avis.jsonl"
+    shutil.copy(os.path.join(FIXTURES_DIR, "watermarks_avis.jsonl"), watermarks)
+
+    etat = script1.EtatScraping(str(output_dir), str(watermarks))
+    yield etat
+    etat.fermer()
+
+
+def test_reprise_checkpoint(etat):
+    # Dernières lignes tronquées ignorées: agence-hassan et la paire CIH Bank / Rabat sont à refaire
+    assert etat.agences_scrapees == {MAARIF, GAUTHIER, AGDAL}
+    assert etat.paires_terminees == {("Attijariwafa bank", "Casablanca")}
+
+
+def test_reserver_agence(etat):
+    assert not etat.reserver_agence(MAARIF)
+    assert etat.reserver_agence(HASSAN)
+    assert not etat.reserver_agence(HASSAN)
+
+
+def test_watermarks_compactes(etat, tmp_path):
+    assert etat.watermark(MAARIF) == ["id:ChdDSUhNMG9nS0VJQ0FnSURyMVpmZ0RBEAE", "b1c2d3e4f5a6b7c8"]
+    assert etat.watermark(HASSAN) == []
+    with open(tmp_path / "watermarks_avis.jsonl", encoding="utf-8") as f:
+        assert [json.loads(ligne)["lien"] for ligne in f] == [MAARIF, AGDAL]
+
+
+def test_enregistrer_puis_reprendre(etat, tmp_path):
+    agence = {
+        "lien": HASSAN, "banque": "CIH Bank", "ville": "Rabat", "nom": "CIH Bank - Agence Hassan",
+        "localisation": "3 Av. Hassan II, Rabat", "note": "4,0",
+        "avis": [("Conseiller à l'écoute", "il y a 5 jours", "Français", "ChdDSUhNMG9nS0VJQ0FnSUR3")],
+    }
+    assert etat.reserver_agence(HASSAN)
+    etat.enregistrer_agence(agence, ["id:ChdDSUhNMG9nS0VJQ0FnSUR3"])
+    etat.terminer_paire("CIH Bank", "Rabat")
+    etat.fermer()
+
+    reprise = script1.EtatScraping(str(tmp_path / "scraping_output"), str(tmp_path / "watermarks_avis.jsonl"))
+    try:
+        assert HASSAN in reprise.agences_scrapees
+        assert ("CIH Bank", "Rabat") in reprise.paires_terminees
+        assert reprise.watermark(HASSAN) == ["id:ChdDSUhNMG9nS0VJQ0FnSUR3"]
+    finally:
+        reprise.fermer()
+
+
+def test_exporter_csv_dedoublonne(etat, tmp_path):
+    output_csv = tmp_path / "avis.csv"
+    nb_avis, nb_agences = etat.exporter_csv(str(output_csv))
+
+    # agence-maarif réécrite par la deuxième exécution: seule sa première version est exportée
+    assert (nb_avis, nb_agences) == (4, 3)
+    with open(output_csv, encoding="utf-8-sig", newline="") as f:
+        lignes = list(csv.reader(f, delimiter=";"))
+    assert lignes[0] == script1.COLONNES
+    assert [(ligne[2], ligne[5]) for ligne in lignes[1:]] == [
+        ("Attijariwafa bank - Agence Maârif", "Accueil très professionnel"),
+        ("Attijariwafa bank - Agence Maârif", "انتظار طويل جدا"),
+        ("Attijariwafa bank - Agence Gauthier", "Très bien"),
+        ("CIH Bank - Agence Agdal", "Service rapide"),
+    ]
+
+
+def test_position_avis_connu():
+    nouveau = ("Très bien", "il y a 1 jour", "Français", None)
+    ancien = ("Très bien", "il y a un an", "Français", None)
+    suivant = ("Attente trop longue", "il y a 2 ans", "Français", None)
+    watermark = [script1.cle_avis(ancien), script1.cle_avis(suivant)]
+
+    # Texte générique seul: pas d'arrêt tant que l'avis suivant du watermark n'est pas affiché
+    assert script1.position_avis_connu([nouveau], watermark) is None
+    assert script1.position_avis_connu([nouveau, ancien, suivant], watermark) == 1
+    # Identifiant Maps: arrêt immédiat
+    avis_id = ("Très bien", "il y a un an", "Français", "ChdDSUhN")
+    assert script1.position_avis_connu([nouveau, avis_id], ["id:ChdDSUhN"]) == 1
+
+
+def test_crawl_incremental_separe_du_crawl_complet(etat, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert script1.chemins_sortie() == (script1.OUTPUT_DIR, script1.OUTPUT_CSV)
+
+    output_dir, output = script1.chemins_sortie(incremental=True, horodatage="20261018_120000")
+    assert output_dir == os.path.join(script1.OUTPUT_DIR_INCREMENTAL, "20261018_120000")
+    assert output == "avis_incremental_20261018_120000.csv"
+
+    # Checkpoint propre au crawl incrémental: les paires du crawl complet ne sont pas sautées
+    incremental = script1.EtatScraping(output_dir, str(tmp_path / "watermarks_avis.jsonl"))
+    try:
+        assert etat.paires_terminees and not incremental.paires_terminees
+        assert incremental.watermarks == etat.watermarks
+    finally:
+        incremental.fermer()
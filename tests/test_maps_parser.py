@@ -0,0 +1,51 @@
+"""Extraction d'une page Maps enregistrée par maps_parser (sans navigateur)"""
+import maps_parser
+
+
+def test_infos_agence(page_agence):
+    infos, _ = maps_parser.parser_page(page_agence)
+    assert infos == {
+        "nom": "Attijariwafa bank - Agence Maârif",
+        "localisation": "123 Bd Al Massira Al Khadra, Casablanca 20330",
+        "note": "3,8",
+    }
+
+
+def test_avis_sans_texte_ignore(page_agence):
+    _, avis = maps_parser.parser_page(page_agence)
+    assert [date for _, date, _, _ in avis] == ["il y a 2 jours", "il y a un mois", "il y a un an"]
+
+
+def test_texte_avec_br(page_agence):
+    _, avis = maps_parser.parser_page(page_agence)
+    texte, _, _, _ = avis[0]
+    assert texte == "Accueil très professionnel,\nconseillère disponible & souriante.\nJe recommande."
+
+
+def test_detection_arabe(page_agence):
+    _, avis = maps_parser.parser_page(page_agence)
+    assert [langue for _, _, langue, _ in avis] == ["Français", "Arabe", "Français"]
+    assert avis[1][0] == "انتظار طويل جدا في الوكالة"
+
+
+def test_identifiant_avis(page_agence):
+    _, avis = maps_parser.parser_page(page_agence)
+    assert [id_avis for _, _, _, id_avis in avis] == [
+        "ChdDSUhNMG9nS0VJQ0FnSURyMVpmZ0RBEAE",
+        "ChdDSUhNMG9nS0VJQ0FnSUNkNk5TYnF3RRAB",
+        None,
+    ]
+
+
+def test_page_sans_infos():
+    infos, avis = maps_parser.parser_page("<html><body><div class='jftiEf'><span class='wiI7pd'>Bien</span>")
+    assert infos == maps_parser.VALEURS_PAR_DEFAUT
+    assert avis == []
+
+
+def test_page_tronquee(page_agence):
+    # Page coupée au milieu du dernier avis: les avis complets sont extraits
+    coupure = page_agence.index("Très bien") + len("Très bien")
+    _, avis = maps_parser.parser_page(page_agence[:coupure])
+    assert [texte for texte, _, _, _ in avis][-1] == "Très bien"
+    assert len(avis) == 3
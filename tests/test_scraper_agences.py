@@ -0,0 +1,281 @@
+"""ScraperAgences et workers du scraper Maps, sans Chrome
+
+Les pages Maps enregistrées de tests/fixtures/maps_local sont servies par un
+http.server local et lues par DriverLocal: sélecteurs CSS simples sur le HTML
+(html.parser), clics et touche Entrée qui suivent l'attribut data-href.
+"""
+from html.parser import HTMLParser
+from urllib.parse import quote, urljoin
+from urllib.request import urlopen
+import functools
+import http.server
+import json
+import os
+import queue
+import re
+import threading
+
+import pytest
+from selenium.common.exceptions import (InvalidSessionIdException, NoSuchElementException,
+                                        StaleElementReferenceException)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+import script1
+from conftest import FIXTURES_DIR
+
+PARTIE_SELECTEUR = re.compile(r"\.([\w-]+)|\[([\w-]+)(\*?=)'([^']*)'\]")
+
+
+class DriverFactice:
+    """Session Chrome minimale: seul quit() est appelé par le worker"""
+
+    def __init__(self):
+        self.ferme = False
+
+    def quit(self):
+        self.ferme = True
+
+
+class EtatFactice:
+    mesures = None
+
+
+def test_worker_redemarre_chrome_apres_session_perdue(monkeypatch):
+    drivers = []
+
+    def creer_driver(headless, chromedriver_path):
+        drivers.append(DriverFactice())
+        return drivers[-1]
+
+    traitees = []
+
+    def scraper_paire(self, banque, ville):
+        # La première session meurt pendant la première paire
+        if self.driver is drivers[0]:
+            raise InvalidSessionIdException("invalid session id")
+        traitees.append((banque, ville))
+
+    monkeypatch.setattr(script1, "creer_driver", creer_driver)
+    monkeypatch.setattr(script1.ScraperAgences, "scraper_paire", scraper_paire)
+
+    jobs = queue.Queue()
+    for paire in [("CIH Bank", "Rabat"), ("BMCI", "Fès")]:
+        jobs.put(paire)
+    script1.worker(1, jobs, EtatFactice(), True, "chromedriver", script1.MAPS_URL)
+
+    # La paire interrompue est remise dans la file et faite avec la nouvelle session
+    assert sorted(traitees) == [("BMCI", "Fès"), ("CIH Bank", "Rabat")]
+    assert len(drivers) == 2 and all(driver.ferme for driver in drivers)
+    assert jobs.empty()
+
+
+def test_worker_rend_les_paires_si_chrome_ne_redemarre_pas(monkeypatch):
+    drivers = []
+
+    def creer_driver(headless, chromedriver_path):
+        if drivers:
+            raise RuntimeError("chromedriver introuvable")
+        drivers.append(DriverFactice())
+        return drivers[-1]
+
+    def scraper_paire(self, banque, ville):
+        raise InvalidSessionIdException("invalid session id")
+
+    monkeypatch.setattr(script1, "creer_driver", creer_driver)
+    monkeypatch.setattr(script1.ScraperAgences, "scraper_paire", scraper_paire)
+
+    jobs = queue.Queue()
+    for paire in [("CIH Bank", "Rabat"), ("BMCI", "Fès")]:
+        jobs.put(paire)
+    script1.worker(1, jobs, EtatFactice(), True, "chromedriver", script1.MAPS_URL)
+
+    # Aucune paire perdue: les workers restants (ou la prochaine exécution) les reprennent
+    assert sorted(jobs.get_nowait() for _ in range(jobs.qsize())) == [("BMCI", "Fès"), ("CIH Bank", "Rabat")]
+
+
+class PageLocale(HTMLParser):
+    """Éléments (balise, attributs) d'une page, dans l'ordre du document"""
+
+    def __init__(self, html):
+        super().__init__()
+        self.elements = []
+        self.feed(html)
+
+    def handle_starttag(self, tag, attrs):
+        self.elements.append((tag, {nom: valeur or "" for nom, valeur in attrs}))
+
+
+def correspond(selecteur, tag, attrs):
+    """Sélecteurs utilisés par script1: balise, .classe, [attr='v'], [attr*='v'], séparés par des virgules"""
+    for alternative in selecteur.split(","):
+        alternative = alternative.strip()
+        balise = re.match(r"[a-z]*", alternative).group()
+        if balise and balise != tag:
+            continue
+        conditions = PARTIE_SELECTEUR.findall(alternative[len(balise):])
+        if all(
+            classe in attrs.get("class", "").split() if classe
+            else nom in attrs and (valeur in attrs[nom] if operateur == "*=" else attrs[nom] == valeur)
+            for classe, nom, operateur, valeur in conditions
+        ):
+            return True
+    return False
+
+
+class ElementLocal:
+    """Élément d'une page de DriverLocal, périmé dès que le driver change de page"""
+
+    def __init__(self, driver, tag, attrs):
+        self.driver = driver
+        self.page = driver.page
+        self.tag = tag
+        self.attrs = attrs
+        self.saisie = ""
+
+    def verifier(self):
+        if self.page != self.driver.page:
+            raise StaleElementReferenceException("page rechargée")
+
+    def get_attribute(self, nom):
+        self.verifier()
+        valeur = self.attrs.get(nom)
+        return urljoin(self.driver.current_url, valeur) if nom == "href" and valeur else valeur
+
+    def is_displayed(self):
+        self.verifier()
+        return True
+
+    def is_enabled(self):
+        self.verifier()
+        return True
+
+    def click(self):
+        self.verifier()
+        if "data-href" in self.attrs:
+            self.driver.get(urljoin(self.driver.current_url, self.attrs["data-href"]))
+
+    def send_keys(self, *valeurs):
+        for valeur in valeurs:
+            if valeur == Keys.RETURN:
+                self.driver.get(urljoin(self.driver.current_url, self.attrs["data-href"]) + "?q=" + quote(self.saisie))
+            else:
+                self.saisie += valeur
+
+
+class DriverLocal:
+    """Session Chrome factice sur des pages statiques: tout est affiché au chargement, le scroll n'ajoute rien"""
+
+    def __init__(self):
+        self.page = 0
+        self.current_url = None
+        self.page_source = ""
+        self.elements = []
+        self.ferme = False
+
+    def get(self, url):
+        with urlopen(url) as reponse:
+            self.page_source = reponse.read().decode("utf-8")
+        self.current_url = url
+        self.page += 1
+        self.elements = PageLocale(self.page_source).elements
+
+    def find_elements(self, by, valeur):
+        selecteur = {By.CLASS_NAME: f".{valeur}", By.NAME: f"[name='{valeur}']", By.CSS_SELECTOR: valeur}[by]
+        return [ElementLocal(self, tag, attrs) for tag, attrs in self.elements if correspond(selecteur, tag, attrs)]
+
+    def find_element(self, by, valeur):
+        elements = self.find_elements(by, valeur)
+        if not elements:
+            raise NoSuchElementException(valeur)
+        return elements[0]
+
+    def execute_script(self, script, *args):
+        if script.startswith("return document.querySelectorAll"):
+            return len(self.find_elements(By.CSS_SELECTOR, args[0]))
+        return None
+
+    def quit(self):
+        self.ferme = True
+
+
+class GestionnaireSilencieux(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def serveur_maps():
+    """URL d'un serveur HTTP local servant tests/fixtures/maps_local (la requête ?q= est ignorée)"""
+    gestionnaire = functools.partial(GestionnaireSilencieux, directory=os.path.join(FIXTURES_DIR, "maps_local"))
+    serveur = http.server.ThreadingHTTPServer(("127.0.0.1", 0), gestionnaire)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{serveur.server_port}/"
+    serveur.shutdown()
+    serveur.server_close()
+
+
+@pytest.fixture
+def etat_vide(tmp_path):
+    etat = script1.EtatScraping(str(tmp_path / "scraping_output"), str(tmp_path / "watermarks_avis.jsonl"))
+    yield etat
+    etat.fermer()
+
+
+def scraper_local(etat, serveur_maps, incremental=False):
+    scraper = script1.ScraperAgences(DriverLocal(), etat, serveur_maps + "recherche.html",
+                                     pause_min=0, pause_max=0, incremental=incremental)
+    # Rien ne se charge au scroll: délais courts plutôt que 5s puis 1,5s minimum à chaque round
+    scraper.attente_agences = script1.AttenteAdaptative(initial=0.2, minimum=0.1)
+    scraper.attente_avis = script1.AttenteAdaptative(initial=0.2, minimum=0.1)
+    return scraper
+
+
+def agences_ecrites(etat):
+    return {agence["lien"].rsplit("/", 1)[-1]: agence
+            for chemin in etat.fichiers_parts() for agence in script1.lire_jsonl(chemin)}
+
+
+def test_scraper_paire_sur_serveur_local(serveur_maps, etat_vide, tmp_path):
+    scraper_local(etat_vide, serveur_maps).scraper_paire("CIH Bank", "Rabat")
+
+    assert etat_vide.paires_terminees == {("CIH Bank", "Rabat")}
+    agences = agences_ecrites(etat_vide)
+    assert sorted(agences) == ["agence_agdal.html", "agence_hassan.html"]
+
+    # Avis triés du plus récent (menu de tri), identifiants Maps conservés
+    hassan = agences["agence_hassan.html"]
+    assert (hassan["nom"], hassan["localisation"], hassan["note"]) == (
+        "CIH Bank - Agence Hassan", "12 Av. Hassan II, Rabat", "4,1")
+    assert [(texte, date) for texte, date, *_ in hassan["avis"]] == [
+        ("خدمة ممتازة", "il y a 2 jours"),
+        ("Accueil très professionnel, je recommande.", "il y a un mois"),
+        ("Attente trop longue au guichet.", "il y a un an"),
+    ]
+    assert etat_vide.watermark(hassan["lien"]) == [script1.cle_avis(avis) for avis in hassan["avis"]]
+
+    # Agdal: "Plus d'avis" cliqué, pas de menu de tri donc pas de watermark
+    agdal = agences["agence_agdal.html"]
+    assert [texte for texte, *_ in agdal["avis"]] == ["Très bien", "Guichet automatique souvent en panne."]
+    assert etat_vide.watermark(agdal["lien"]) == []
+
+    assert etat_vide.exporter_csv(str(tmp_path / "avis.csv")) == (5, 2)
+
+
+def test_scraper_paire_incremental_sur_serveur_local(serveur_maps, tmp_path):
+    hassan = serveur_maps + "agence_hassan.html"
+    watermark = ["id:ChdDSUhNMG9nS0VJQ0FnSURyMVpmZ0RBEAE", "id:ChZDSUhNMG9nS0VJQ0FnSUQ2ZzlUaxAB"]
+    watermarks = tmp_path / "watermarks_avis.jsonl"
+    watermarks.write_text(json.dumps({"lien": hassan, "empreintes": watermark}) + "\n", encoding="utf-8")
+
+    etat = script1.EtatScraping(str(tmp_path / "scraping_incremental"), str(watermarks))
+    try:
+        scraper_local(etat, serveur_maps, incremental=True).scraper_paire("CIH Bank", "Rabat")
+        agences = agences_ecrites(etat)
+    finally:
+        etat.fermer()
+
+    # Seul l'avis plus récent que le watermark est écrit; le watermark avance
+    assert [texte for texte, *_ in agences["agence_hassan.html"]["avis"]] == ["خدمة ممتازة"]
+    assert etat.watermark(hassan) == ["id:ChdDSUhNMG9nS0VJQ0FnSUNkNk5TYnF3RRAB"] + watermark
+    assert len(agences["agence_agdal.html"]["avis"]) == 2